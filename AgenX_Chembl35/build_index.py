@@ -0,0 +1,35 @@
+#!/usr/bin/env python
+import argparse
+import time
+
+import torch
+
+from src.similarity import FingerprintIndex, build_index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the Morgan fingerprint similarity index over the training set")
+    parser.add_argument("--model", default="models/best_r2_model.pt", help="Checkpoint whose config names the training dataset")
+    parser.add_argument("--data", default=None, help="Dataset CSV (defaults to the checkpoint's training dataset)")
+    parser.add_argument("--output", default="models/fingerprint_index")
+    parser.add_argument("--chunk_size", type=int, default=100000, help="CSV rows read per chunk")
+    args = parser.parse_args()
+
+    data_config = torch.load(args.model, map_location='cpu', weights_only=False)['config']['data']
+
+    start = time.perf_counter()
+    n_rows = build_index(
+        args.data or data_config['dataset_path'],
+        args.output,
+        smiles_col=data_config['smiles_col'],
+        target_col=data_config['target_col'],
+        delimiter=data_config['delimiter'],
+        chunk_size=args.chunk_size
+    )
+    print(f"Indexed {n_rows} molecules in {time.perf_counter() - start:.1f}s, saved to: {args.output}")
+
+    index = FingerprintIndex(args.output)
+    query = index.smiles(len(index) - 1)  # rows are sorted by bit count, so the last one is a valid molecule
+    start = time.perf_counter()
+    neighbors = index.search(query, k=5)
+    print(f"Sanity query {query}: top similarity {neighbors[0]['similarity']:.3f} in {(time.perf_counter() - start) * 1e3:.1f} ms")
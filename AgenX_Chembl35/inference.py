@@ -1,9 +1,17 @@
 #!/usr/bin/env python
+import copy
+import numpy as np
 import torch
 import os
+from contextlib import nullcontext
+from torch.func import functional_call, stack_module_state, vmap
 from typing import Dict, Tuple, List, Optional, Union
 
-from src.model import MoleculeGCN, MoleculeGraph, Standardizer
+try:
+    from .src.model import MoleculeGCN, MoleculeGraph, Standardizer, quantize_model
+except ImportError:
+    # Run from inside AgenX_Chembl35 (scripts, quantize_eval.py)
+    from src.model import MoleculeGCN, MoleculeGraph, Standardizer, quantize_model
 
 
 class MoleculePredictor:
@@ -11,21 +19,36 @@ class MoleculePredictor:
     A simplified predictor class for MoleculeGCN inference.
     """
 
-    def __init__(self, model_path: str = 'models/best_model.pt', device: Optional[str] = None):
+    def __init__(self, model_path: str = 'models/best_model.pt', device: Optional[str] = None, quantize: bool = False,
+                 metrics=None):
         """
         Initialize the predictor.
 
         Args:
             model_path: Path to the trained model checkpoint
             device: Device to run inference on ('cuda', 'cpu', or None for auto-detect)
+            quantize: Apply dynamic int8 quantization to the linear layers (CPU only)
+            metrics: Optional AgenX_Serving.metrics.Metrics recording featurize/forward latency and batch sizes
         """
-        if device is None:
+        self.metrics = metrics
+
+        if quantize:
+            # Quantized kernels are only available on CPU
+            self.device = torch.device('cpu')
+        elif device is None:
             self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
         else:
             self.device = torch.device(device)
 
+        self.quantize = quantize
         self.model, self.standardizer, self.config = self._load_model(model_path)
 
+        if self.quantize:
+            self.model = quantize_model(self.model)
+
+    def _timer(self, name: str):
+        return nullcontext() if self.metrics is None else self.metrics.timer(name)
+
     def _load_model(self, model_path: str) -> Tuple[MoleculeGCN, Standardizer, Dict]:
         """Load the model, standardizer, and configuration."""
         checkpoint = torch.load(model_path, map_location=self.device, weights_only=False)
@@ -66,26 +89,89 @@ class MoleculePredictor:
         else:
             return [self._predict_single(s) for s in smiles]
 
-    def _predict_single(self, smiles: str) -> Optional[float]:
-        """Predict pChEMBL value for a single SMILES string."""
+    def predict_batch(self, smiles_list: List[str], batch_size: int = 64) -> List[Optional[float]]:
+        """
+        Predict pChEMBL values for many SMILES strings with one forward pass per batch.
+
+        Graphs are padded to max_atoms, so they stack into a single tensor and give the
+        same predictions as predict() on each molecule.
+
+        Args:
+            smiles_list: List of SMILES strings
+            batch_size: Number of molecules per forward pass
+
+        Returns:
+            list: Predicted pChEMBL values, None for invalid SMILES
+        """
+        predictions: List[Optional[float]] = [None] * len(smiles_list)
+
+        for start in range(0, len(smiles_list), batch_size):
+            graphs = []
+            with self._timer('featurize'):
+                for i, smiles in enumerate(smiles_list[start:start + batch_size], start):
+                    graph = self._featurize(smiles)
+                    if graph is not None:
+                        graphs.append((i, graph))
+            if not graphs:
+                continue
+
+            with self._timer('forward'):
+                node_mat = torch.FloatTensor(np.stack([g.node_mat for _, g in graphs])).to(self.device)
+                adj_mat = torch.FloatTensor(np.stack([g.adj_mat for _, g in graphs])).to(self.device)
+
+                with torch.no_grad():
+                    output = self.standardizer.unstandardize(self.model(node_mat, adj_mat)).view(-1)
+            if self.metrics is not None:
+                self.metrics.observe('batch_size', len(graphs))
+
+            for (i, _), value in zip(graphs, output.tolist()):
+                predictions[i] = value
+
+        return predictions
+
+    def _featurize(self, smiles: str) -> Optional[MoleculeGraph]:
+        """Build the padded molecule graph, or return None if the SMILES is invalid."""
         try:
             graph = MoleculeGraph(
                 smiles,
                 node_vec_len=self.config['model']['node_vec_len'],
                 max_atoms=self.config['data']['max_atoms']
             )
+        except Exception as e:
+            print(f"Error processing SMILES '{smiles}': {str(e)}")
+            return None
+
+        # Check if molecule is valid
+        if not hasattr(graph, 'node_mat') or not hasattr(graph, 'adj_mat'):
+            print(f"Invalid SMILES: {smiles}")
+            return None
+
+        return graph
+
+    def _predict_single(self, smiles: str) -> Optional[float]:
+        """Predict pChEMBL value for a single SMILES string."""
+        try:
+            with self._timer('featurize'):
+                graph = MoleculeGraph(
+                    smiles,
+                    node_vec_len=self.config['model']['node_vec_len'],
+                    max_atoms=self.config['data']['max_atoms']
+                )
 
             # Check if molecule is valid
             if not hasattr(graph, 'node_mat') or not hasattr(graph, 'adj_mat'):
                 print(f"Invalid SMILES: {smiles}")
                 return None
 
-            node_mat = torch.FloatTensor(graph.node_mat).unsqueeze(0).to(self.device)
-            adj_mat = torch.FloatTensor(graph.adj_mat).unsqueeze(0).to(self.device)
+            with self._timer('forward'):
+                node_mat = torch.FloatTensor(graph.node_mat).unsqueeze(0).to(self.device)
+                adj_mat = torch.FloatTensor(graph.adj_mat).unsqueeze(0).to(self.device)
 
-            with torch.no_grad():
-                output = self.model(node_mat, adj_mat)
-                prediction = self.standardizer.unstandardize(output).item()
+                with torch.no_grad():
+                    output = self.model(node_mat, adj_mat)
+                    prediction = self.standardizer.unstandardize(output).item()
+            if self.metrics is not None:
+                self.metrics.observe('batch_size', 1)
 
             return prediction
 
@@ -94,10 +180,110 @@ class MoleculePredictor:
             return None
 
 
+class EnsemblePredictor(MoleculePredictor):
+    """
+    Deep ensemble of MoleculeGCN checkpoints evaluated in one vectorized forward pass.
+
+    The members' weights are stacked into batched tensors (torch.func.stack_module_state)
+    and the forward is vmapped over the member dimension, so M checkpoints cost one
+    forward on a batch instead of M sequential ones. Graph operations that only depend
+    on the inputs are computed once and shared by all members.
+
+    predict() and predict_batch() return the ensemble mean, so the predictor can replace
+    MoleculePredictor as is; predict_ensemble() also returns the spread.
+    """
+
+    def __init__(self, model_paths: List[str], device: Optional[str] = None, metrics=None):
+        """
+        Initialize the ensemble.
+
+        Args:
+            model_paths: Checkpoints of models trained with the same architecture
+            device: Device to run inference on ('cuda', 'cpu', or None for auto-detect)
+            metrics: Optional AgenX_Serving.metrics.Metrics recording featurize/forward latency and batch sizes
+        """
+        if len(model_paths) < 2:
+            raise ValueError("An ensemble needs at least two checkpoints")
+
+        self.metrics = metrics
+        self.quantize = False  # Quantized linear layers cannot be stacked
+        self.device = torch.device(device or ('cuda' if torch.cuda.is_available() else 'cpu'))
+
+        members = [self._load_model(path) for path in model_paths]
+        self.config = members[0][2]
+        for path, (_, _, config) in zip(model_paths, members):
+            if config['model'] != self.config['model'] or config['data']['max_atoms'] != self.config['data']['max_atoms']:
+                raise ValueError(f"Checkpoint {path} has a different architecture than {model_paths[0]}")
+
+        models = [model for model, _, _ in members]
+        self.n_models = len(models)
+        self.params, self.buffers = stack_module_state(models)
+
+        # Stateless copy of the architecture; the stacked tensors are passed in on every call
+        base = copy.deepcopy(models[0]).to('meta')
+
+        def member_forward(params, buffers, node_mat, adj_mat):
+            return functional_call(base, (params, buffers), (node_mat, adj_mat))
+
+        self._forward = vmap(member_forward, in_dims=(0, 0, None, None))
+        self._means = torch.tensor([[float(s.mean)] for _, s, _ in members], device=self.device)
+        self._stds = torch.tensor([[float(s.std)] for _, s, _ in members], device=self.device)
+
+    def _members(self, node_mat: torch.Tensor, adj_mat: torch.Tensor) -> torch.Tensor:
+        """Unstandardized predictions of every member, shape [n_models, batch_size]"""
+        with torch.no_grad():
+            output = self._forward(self.params, self.buffers, node_mat, adj_mat).squeeze(-1)
+        return output * self._stds + self._means
+
+    def predict_ensemble(self, smiles_list: List[str], batch_size: int = 64) -> List[Optional[Dict[str, float]]]:
+        """
+        Ensemble mean and standard deviation for many SMILES strings.
+
+        Args:
+            smiles_list: List of SMILES strings
+            batch_size: Number of molecules per forward pass
+
+        Returns:
+            list: {"mean": ..., "std": ...} per SMILES, None for invalid SMILES
+        """
+        predictions: List[Optional[Dict[str, float]]] = [None] * len(smiles_list)
+
+        for start in range(0, len(smiles_list), batch_size):
+            graphs = []
+            with self._timer('featurize'):
+                for i, smiles in enumerate(smiles_list[start:start + batch_size], start):
+                    graph = self._featurize(smiles)
+                    if graph is not None:
+                        graphs.append((i, graph))
+            if not graphs:
+                continue
+
+            with self._timer('forward'):
+                node_mat = torch.FloatTensor(np.stack([g.node_mat for _, g in graphs])).to(self.device)
+                adj_mat = torch.FloatTensor(np.stack([g.adj_mat for _, g in graphs])).to(self.device)
+                output = self._members(node_mat, adj_mat)
+                means, stds = output.mean(dim=0).tolist(), output.std(dim=0, unbiased=False).tolist()
+            if self.metrics is not None:
+                self.metrics.observe('batch_size', len(graphs))
+
+            for (i, _), mean, std in zip(graphs, means, stds):
+                predictions[i] = {"mean": mean, "std": std}
+
+        return predictions
+
+    def predict_batch(self, smiles_list: List[str], batch_size: int = 64) -> List[Optional[float]]:
+        """Ensemble mean per SMILES, None for invalid SMILES"""
+        return [None if p is None else p["mean"] for p in self.predict_ensemble(smiles_list, batch_size)]
+
+    def _predict_single(self, smiles: str) -> Optional[float]:
+        return self.predict_batch([smiles])[0]
+
+
 # Simple function for direct testing
 def predict_smiles(smiles: Union[str, List[str]],
                    model_path: str = 'models/best_r2_model.pt',
-                   device: Optional[str] = None) -> Union[float, List[float], None]:
+                   device: Optional[str] = None,
+                   quantize: bool = False) -> Union[float, List[float], None]:
     """
     Direct function to predict pChEMBL values from SMILES strings.
 
@@ -105,12 +291,13 @@ def predict_smiles(smiles: Union[str, List[str]],
         smiles: A SMILES string or list of SMILES strings
         model_path: Path to the trained model checkpoint
         device: Device to run inference on ('cuda', 'cpu', or None for auto-detect)
+        quantize: Apply dynamic int8 quantization to the linear layers (CPU only)
 
     Returns:
         float or list of floats: Predicted pChEMBL value(s)
         None: If the SMILES is invalid
     """
-    predictor = MoleculePredictor(model_path, device)
+    predictor = MoleculePredictor(model_path, device, quantize)
     return predictor.predict(smiles)
 
 
@@ -3,7 +3,11 @@ import os
 import logging
 from flask import Flask, request, jsonify
 
-from AgenX_Chembl35.inference import predict_smiles
+from AgenX_Chembl35.inference import EnsemblePredictor, MoleculePredictor
+from AgenX_Chembl35.src.analogs import canonicalize, enumerate_analogs
+from AgenX_Chembl35.src.similarity import FingerprintIndex
+from AgenX_Serving import wire
+from AgenX_Serving.metrics import Metrics
 
 # --- Flask App ---
 app = Flask(__name__)
@@ -12,10 +16,72 @@ app = Flask(__name__)
 logging.basicConfig(level=logging.DEBUG)
 logger = app.logger
 
+# Request counts, stage latencies and batch sizes, served at GET /metrics
+metrics = Metrics()
+metrics.instrument(app)
+
 # --- Configuration ---
 MODEL_PATH = os.path.join("models", "best_r2_model.pt")
+INDEX_DIR = os.path.join("models", "fingerprint_index")  # Built by build_index.py
 HOST = '127.0.0.1'  # Allow external connections
 PORT = 12500
+MAX_BATCH_SIZE = 1000
+MAX_ANALOGS = 1000
+# Set CHEMBL35_QUANTIZE=1 to serve the dynamic int8 model (see quantize_eval.py)
+QUANTIZE = os.getenv("CHEMBL35_QUANTIZE", "0").lower() in ("1", "true", "yes")
+# Comma-separated checkpoints served as one deep ensemble, e.g. models/seed0.pt,models/seed1.pt,models/seed2.pt
+ENSEMBLE = [path for path in os.getenv("CHEMBL35_ENSEMBLE", "").split(",") if path]
+
+
+# --- Load Model ---
+def load_predictor():
+    """Load the predictor once at startup so requests reuse the resident model"""
+    try:
+        if ENSEMBLE:
+            predictor = EnsemblePredictor(ENSEMBLE, metrics=metrics)
+            logger.info(f"Loaded ensemble of {predictor.n_models} models from {', '.join(ENSEMBLE)}")
+            return predictor
+        predictor = MoleculePredictor(MODEL_PATH, quantize=QUANTIZE, metrics=metrics)
+        logger.info(f"Loaded model from {MODEL_PATH} (quantized: {QUANTIZE})")
+        return predictor
+    except Exception as e:
+        logger.error(f"Failed to load model: {e}")
+        return None
+
+
+predictor = load_predictor()
+
+
+def load_index():
+    """Memory-map the training-set fingerprint index if it has been built"""
+    if not os.path.exists(INDEX_DIR):
+        logger.warning(f"No fingerprint index at {INDEX_DIR}, /neighbors is disabled (run build_index.py)")
+        return None
+    try:
+        index = FingerprintIndex(INDEX_DIR)
+        logger.info(f"Loaded fingerprint index with {len(index)} molecules")
+        return index
+    except Exception as e:
+        logger.error(f"Failed to load fingerprint index: {e}")
+        return None
+
+
+fingerprint_index = load_index()
+
+
+def wants_uncertainty(data):
+    """Whether the request asks for the ensemble spread; only available with CHEMBL35_ENSEMBLE"""
+    if not data.get('uncertainty'):
+        return False
+    if not isinstance(predictor, EnsemblePredictor):
+        raise ValueError("uncertainty requires an ensemble (set CHEMBL35_ENSEMBLE to two or more checkpoints)")
+    return True
+
+
+def ensemble_output(prediction):
+    if prediction is None:
+        return None
+    return {"pchembl": prediction["mean"], "pchembl_std": prediction["std"], "n_models": predictor.n_models}
 
 
 @app.route('/predict', methods=['POST'])
@@ -25,7 +91,8 @@ def predict():
 
     Expected JSON input:
     {
-        "smiles": "CC(=O)Oc1ccccc1C(=O)O"
+        "smiles": "CC(=O)Oc1ccccc1C(=O)O",
+        "uncertainty": false        (optional, ensemble only)
     }
 
     Returns:
@@ -35,6 +102,9 @@ def predict():
         "success": true,
         "error": ""
     }
+
+    With "uncertainty": true the output is {"pchembl": mean, "pchembl_std": std, "n_models": M}
+    over the ensemble members, all evaluated in one vectorized forward pass.
     """
     response = {
         "input": "",
@@ -44,6 +114,11 @@ def predict():
     }
 
     try:
+        # Check if model is loaded
+        if predictor is None:
+            response["error"] = "Model not loaded. Please check server logs."
+            return jsonify(response), 500
+
         # Get JSON data from request
         data = request.get_json()
         if not data:
@@ -52,19 +127,26 @@ def predict():
 
         # Extract SMILES
         smiles = data.get('smiles')
-        logger.debug(f"Received SMILES: {smiles}")
 
         if not smiles:
             response["error"] = "SMILES string is missing in request body"
             return jsonify(response), 400
 
         # Make prediction
-        predicted = predict_smiles(smiles, model_path=MODEL_PATH)
-        logger.debug(f"Predicted value: {predicted}")
+        try:
+            uncertainty = wants_uncertainty(data)
+        except ValueError as e:
+            response["error"] = f"Validation error: {str(e)}"
+            return jsonify(response), 400
+
+        if uncertainty:
+            predicted = ensemble_output(predictor.predict_ensemble([smiles])[0])
+        else:
+            predicted = predictor.predict(smiles)
 
         if predicted is not None:
             response["input"] = smiles
-            response["output"] = float(predicted)
+            response["output"] = predicted if uncertainty else float(predicted)
             response["success"] = True
             return jsonify(response), 200
         else:
@@ -73,11 +155,219 @@ def predict():
             return jsonify(response), 400
 
     except Exception as e:
+        metrics.error(e)
         logger.error(f"Error during prediction: {str(e)}")
         response["error"] = f"Internal server error: {str(e)}"
         return jsonify(response), 500
 
 
+@app.route('/predict_batch', methods=['POST'])
+def predict_batch():
+    """
+    API endpoint for pChEMBL prediction of many SMILES in batched forward passes.
+
+    Expected JSON input:
+    {
+        "smiles": ["CC(=O)Oc1ccccc1C(=O)O", "CCO"]
+    }
+
+    Returns the predictions in input order, null for invalid SMILES. Add "uncertainty": true
+    (ensemble only) to get {"pchembl", "pchembl_std", "n_models"} per SMILES instead.
+
+    Send Content-Type: application/msgpack to use msgpack instead of JSON in both
+    directions (see AgenX_Serving/wire.py).
+    """
+    response = {
+        "input": "",
+        "output": "",
+        "success": False,
+        "error": ""
+    }
+
+    try:
+        if predictor is None:
+            response["error"] = "Model not loaded. Please check server logs."
+            return wire.respond(response, 500)
+
+        data = wire.get_payload()
+        smiles_list = data.get('smiles') if isinstance(data, dict) else None
+
+        if not smiles_list or not isinstance(smiles_list, list) or not all(isinstance(s, str) for s in smiles_list):
+            response["error"] = "Field 'smiles' must be a non-empty list of SMILES strings"
+            return wire.respond(response, 400)
+        if len(smiles_list) > MAX_BATCH_SIZE:
+            response["error"] = f"At most {MAX_BATCH_SIZE} SMILES per request"
+            return wire.respond(response, 400)
+
+        response["input"] = smiles_list
+        if wants_uncertainty(data):
+            response["output"] = [ensemble_output(p) for p in predictor.predict_ensemble(smiles_list)]
+        else:
+            response["output"] = predictor.predict_batch(smiles_list)
+        response["success"] = True
+        return wire.respond(response, 200)
+
+    except ValueError as e:
+        metrics.error(e)
+        response["error"] = f"Validation error: {str(e)}"
+        return wire.respond(response, 400)
+
+    except Exception as e:
+        metrics.error(e)
+        logger.error(f"Error during batch prediction: {str(e)}")
+        response["error"] = f"Internal server error: {str(e)}"
+        return wire.respond(response, 500)
+
+
+@app.route('/analogs', methods=['POST'])
+def analogs():
+    """
+    API endpoint to expand a seed SMILES into local analogs and rank them by predicted pChEMBL.
+
+    Expected JSON input:
+    {
+        "smiles": "CC(=O)Oc1ccccc1C(=O)O",
+        "top_k": 10,
+        "max_analogs": 200
+    }
+
+    Returns:
+    {
+        "input": {...},
+        "output": {
+            "seed": {"smiles": "...", "pchembl": 5.23},
+            "n_enumerated": 41,
+            "analogs": [{"smiles": "...", "transform": "add_F", "pchembl": 5.61}, ...]
+        },
+        "success": true,
+        "error": ""
+    }
+    """
+    response = {
+        "input": "",
+        "output": "",
+        "success": False,
+        "error": ""
+    }
+
+    try:
+        if predictor is None:
+            response["error"] = "Model not loaded. Please check server logs."
+            return jsonify(response), 500
+
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict) or not data:
+            response["error"] = "Request body must be a JSON object"
+            return jsonify(response), 400
+
+        response["input"] = data
+        smiles = data.get('smiles')
+        top_k = int(data.get('top_k', 10))
+        max_analogs = int(data.get('max_analogs', 200))
+
+        seed = canonicalize(smiles) if isinstance(smiles, str) and smiles else None
+        if seed is None:
+            response["error"] = "Invalid or missing SMILES string"
+            return jsonify(response), 400
+        if not 1 <= top_k <= max_analogs <= MAX_ANALOGS:
+            response["error"] = f"Expected 1 <= top_k <= max_analogs <= {MAX_ANALOGS}"
+            return jsonify(response), 400
+
+        candidates = enumerate_analogs(seed, max_analogs=max_analogs)
+        metrics.count('analogs_enumerated', len(candidates))
+
+        # Seed and analogs are scored together in batched forward passes
+        predictions = predictor.predict_batch([seed] + [c['smiles'] for c in candidates])
+        scored = [
+            {**candidate, "pchembl": value}
+            for candidate, value in zip(candidates, predictions[1:])
+            if value is not None
+        ]
+        scored.sort(key=lambda c: c["pchembl"], reverse=True)
+
+        response["output"] = {
+            "seed": {"smiles": seed, "pchembl": predictions[0]},
+            "n_enumerated": len(candidates),
+            "analogs": scored[:top_k]
+        }
+        response["success"] = True
+        return jsonify(response), 200
+
+    except (ValueError, TypeError) as e:
+        response["error"] = f"Validation error: {str(e)}"
+        return jsonify(response), 400
+
+    except Exception as e:
+        metrics.error(e)
+        logger.error(f"Error during analog expansion: {str(e)}")
+        response["error"] = f"Internal server error: {str(e)}"
+        return jsonify(response), 500
+
+
+@app.route('/neighbors', methods=['POST'])
+def neighbors():
+    """
+    API endpoint for the most similar training-set molecules (Tanimoto on Morgan fingerprints).
+
+    Expected JSON input:
+    {
+        "smiles": "CC(=O)Oc1ccccc1C(=O)O",
+        "k": 10
+    }
+
+    Returns:
+    {
+        "input": {...},
+        "output": {
+            "max_similarity": 0.82,
+            "neighbors": [{"smiles": "...", "value": 6.1, "similarity": 0.82}, ...]
+        },
+        "success": true,
+        "error": ""
+    }
+    """
+    response = {
+        "input": "",
+        "output": "",
+        "success": False,
+        "error": ""
+    }
+
+    try:
+        if fingerprint_index is None:
+            response["error"] = "Fingerprint index not loaded. Please run build_index.py."
+            return jsonify(response), 500
+
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict) or not data.get('smiles'):
+            response["error"] = "SMILES string is missing in request body"
+            return jsonify(response), 400
+
+        response["input"] = data
+        k = int(data.get('k', 10))
+        if not 1 <= k <= 100:
+            response["error"] = "k must be between 1 and 100"
+            return jsonify(response), 400
+
+        results = fingerprint_index.search(data['smiles'], k=k)
+        response["output"] = {
+            "max_similarity": results[0]["similarity"] if results else 0.0,
+            "neighbors": results
+        }
+        response["success"] = True
+        return jsonify(response), 200
+
+    except (ValueError, TypeError) as e:
+        response["error"] = f"Validation error: {str(e)}"
+        return jsonify(response), 400
+
+    except Exception as e:
+        metrics.error(e)
+        logger.error(f"Error during neighbor search: {str(e)}")
+        response["error"] = f"Internal server error: {str(e)}"
+        return jsonify(response), 500
+
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """
@@ -86,6 +376,9 @@ def health_check():
     return jsonify({
         "status": "healthy",
         "model_path": MODEL_PATH,
+        "quantized": QUANTIZE,
+        "ensemble_size": predictor.n_models if isinstance(predictor, EnsemblePredictor) else 1,
+        "index_size": len(fingerprint_index) if fingerprint_index is not None else 0,
         "success": True
     }), 200
 
@@ -101,7 +394,11 @@ def home():
         "endpoints": {
             "/": "API documentation (this page)",
             "/health": "Health check endpoint",
-            "/predict": "POST endpoint for pChEMBL prediction"
+            "/metrics": "Request counts, featurize/forward latency percentiles, batch sizes and errors",
+            "/predict": "POST endpoint for pChEMBL prediction",
+            "/predict_batch": "POST endpoint for pChEMBL prediction of a list of SMILES",
+            "/analogs": "POST endpoint ranking local analogs of a seed SMILES by predicted pChEMBL",
+            "/neighbors": "POST endpoint returning the most similar training-set molecules"
         },
         "usage": {
             "method": "POST",
@@ -119,7 +416,7 @@ if __name__ == '__main__':
         exit(1)
 
     logger.info(f"Starting Flask server on {HOST}:{PORT}")
-    logger.info(f"Using model from {MODEL_PATH}")
+    logger.info(f"Using model from {MODEL_PATH} (quantized: {QUANTIZE})")
 
     app.run(
         debug=True,
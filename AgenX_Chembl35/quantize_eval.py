@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+import argparse
+import io
+import json
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import torch
+
+from inference import MoleculePredictor
+from src.model import MoleculeGraph, quantize_model
+
+
+def model_size_mb(model: torch.nn.Module) -> float:
+    """Serialized size of the model's state dict in MB."""
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.getbuffer().nbytes / 1e6
+
+
+def build_graphs(smiles_list: List[str], node_vec_len: int, max_atoms: int):
+    """Featurize SMILES once so both models see identical inputs."""
+    node_mats, adj_mats, keep = [], [], []
+    for i, smiles in enumerate(smiles_list):
+        graph = MoleculeGraph(smiles, node_vec_len=node_vec_len, max_atoms=max_atoms)
+        if not hasattr(graph, 'node_mat') or not hasattr(graph, 'adj_mat'):
+            continue
+        node_mats.append(graph.node_mat)
+        adj_mats.append(graph.adj_mat)
+        keep.append(i)
+    return torch.FloatTensor(np.stack(node_mats)), torch.FloatTensor(np.stack(adj_mats)), keep
+
+
+def run_model(model: torch.nn.Module, predictor: MoleculePredictor, node_mats, adj_mats, batch_size: int):
+    """Run batched inference and return unstandardized predictions with the average per-batch latency."""
+    predictions = []
+    latencies = []
+    with torch.no_grad():
+        for start in range(0, len(node_mats), batch_size):
+            t0 = time.perf_counter()
+            output = model(node_mats[start:start + batch_size], adj_mats[start:start + batch_size])
+            latencies.append(time.perf_counter() - t0)
+            predictions.append(predictor.standardizer.unstandardize(output).squeeze(-1))
+    return torch.cat(predictions).numpy(), float(np.mean(latencies))
+
+
+def evaluate(model_path: str, data_path: Optional[str] = None, batch_size: int = 64,
+             limit: Optional[int] = None, tolerance: float = 0.1) -> Dict:
+    """
+    Compare the fp32 MoleculeGCN with its dynamic int8 counterpart.
+
+    Args:
+        model_path: Path to the trained model checkpoint
+        data_path: Dataset CSV with SMILES and measured pChEMBL values (defaults to the training dataset)
+        batch_size: Inference batch size
+        limit: Only evaluate the first N molecules
+        tolerance: Accepted MAE increase for recommending the int8 model
+
+    Returns:
+        dict: MAE of both models, MAE drift between them, latency and model size
+    """
+    predictor = MoleculePredictor(model_path, device='cpu')
+    config = predictor.config
+
+    df = pd.read_csv(data_path or config['data']['dataset_path'], delimiter=config['data']['delimiter'])
+    if limit is not None:
+        df = df.iloc[:limit]
+
+    node_mats, adj_mats, keep = build_graphs(
+        df[config['data']['smiles_col']].tolist(),
+        node_vec_len=config['model']['node_vec_len'],
+        max_atoms=config['data']['max_atoms']
+    )
+    y = df[config['data']['target_col']].to_numpy()[keep]
+
+    fp32_model = predictor.model
+    int8_model = quantize_model(fp32_model)
+
+    fp32_pred, fp32_latency = run_model(fp32_model, predictor, node_mats, adj_mats, batch_size)
+    int8_pred, int8_latency = run_model(int8_model, predictor, node_mats, adj_mats, batch_size)
+    _, fp32_latency_single = run_model(fp32_model, predictor, node_mats[:50], adj_mats[:50], 1)
+    _, int8_latency_single = run_model(int8_model, predictor, node_mats[:50], adj_mats[:50], 1)
+
+    drift = np.abs(fp32_pred - int8_pred)
+    report = {
+        "n_samples": int(len(y)),
+        "fp32_mae": float(np.mean(np.abs(fp32_pred - y))),
+        "int8_mae": float(np.mean(np.abs(int8_pred - y))),
+        "mae_drift": float(np.mean(drift)),
+        "max_drift": float(np.max(drift)),
+        "fp32_batch_latency_ms": fp32_latency * 1e3,
+        "int8_batch_latency_ms": int8_latency * 1e3,
+        "fp32_single_latency_ms": fp32_latency_single * 1e3,
+        "int8_single_latency_ms": int8_latency_single * 1e3,
+        "fp32_size_mb": model_size_mb(fp32_model),
+        "int8_size_mb": model_size_mb(int8_model),
+        "tolerance": tolerance,
+    }
+    report["int8_recommended"] = report["int8_mae"] - report["fp32_mae"] <= tolerance
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate dynamic int8 quantization of MoleculeGCN")
+    parser.add_argument("--model", default="models/best_r2_model.pt")
+    parser.add_argument("--data", default=None, help="Dataset CSV (defaults to the checkpoint's training dataset)")
+    parser.add_argument("--batch_size", type=int, default=64)
+    parser.add_argument("--limit", type=int, default=2000, help="Only evaluate the first N molecules")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Accepted MAE increase (pChEMBL units) for int8")
+    parser.add_argument("--output", default=None, help="Optional path to save the report as JSON")
+    args = parser.parse_args()
+
+    report = evaluate(args.model, args.data, args.batch_size, args.limit, args.tolerance)
+
+    print("\n--- MoleculeGCN fp32 vs int8 ---")
+    for key, value in report.items():
+        print(f"{key:<26} {value}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
@@ -2,5 +2,6 @@
 MoleculeGCN package initialization.
 """
 
-from .model import MoleculeGCN, MoleculeGraph, Standardizer
-from .preprocessing import MoleculeDataset, get_data_loaders, analyze_dataset
\ No newline at end of file
+from .model import MoleculeGCN, MoleculeGraph, Standardizer, quantize_model
+from .preprocessing import MoleculeDataset, get_data_loaders, analyze_dataset
+from .analogs import enumerate_analogs, canonicalize
@@ -0,0 +1,105 @@
+"""
+Local analog enumeration around a seed molecule.
+"""
+
+from typing import Dict, List, Optional
+
+from rdkit import Chem, RDLogger
+from rdkit.Chem import AllChem
+
+# Reaction SMARTS applied one site at a time: (name, transform)
+TRANSFORMS = [
+    # Substituent swaps on aromatic carbons
+    *[(f"add_{name}", f"[cH:1]>>[c:1]{group}") for name, group in [
+        ('F', 'F'), ('Cl', 'Cl'), ('CH3', 'C'), ('OCH3', 'OC'), ('CF3', 'C(F)(F)F'),
+        ('OH', 'O'), ('NH2', 'N'), ('CN', 'C#N'),
+    ]],
+    *[(f"{old_name}_to_{new_name}", f"[c:1]{old}>>[c:1]{new}")
+      for old_name, old in [('F', '-[F;X1]'), ('Cl', '-[Cl;X1]'), ('Br', '-[Br;X1]'), ('CH3', '-[CH3;X4]'), ('OH', '-[OH;X2]')]
+      for new_name, new in [('H', ''), ('F', 'F'), ('Cl', 'Cl'), ('CH3', 'C'), ('CF3', 'C(F)(F)F'), ('OCH3', 'OC')]
+      if old_name != new_name],
+
+    # Ring edits
+    ('CH_to_N_in_ring', '[cH;r6:1]>>[n:1]'),
+    ('N_to_CH_in_ring', '[n;X2;r6:1]>>[cH:1]'),
+    ('NH_to_S_in_ring', '[nH;r5:1]>>[s:1]'),
+    ('S_to_O_in_ring', '[s;r5:1]>>[o:1]'),
+    ('cyclohexyl_to_phenyl', '[C;R1:1]1[C;R1:2][C;R1:3][C;R1:4][C;R1:5][C;R1:6]1>>[c:1]1[c:2][c:3][c:4][c:5][c:6]1'),
+
+    # Bioisosteric replacements
+    ('COOH_to_tetrazole', '[C:1](=O)[OH]>>[C:1]1=NN=N[NH]1'),
+    ('COOH_to_acylsulfonamide', '[C:1](=O)[OH]>>[C:1](=O)NS(=O)(=O)C'),
+    ('ester_to_amide', '[C:1](=[O:2])[O;X2:3][#6:4]>>[C:1](=[O:2])[N:3][#6:4]'),
+    ('amide_N_methylation', '[C:1](=[O:2])[NH:3][#6:4]>>[C:1](=[O:2])[N:3](C)[#6:4]'),
+    ('ether_to_thioether', '[#6:1][O;X2;!R:2][#6:3]>>[#6:1][S:2][#6:3]'),
+    ('ether_to_amine', '[#6:1][O;X2;!R:2][#6:3]>>[#6:1][N:2][#6:3]'),
+    ('ether_to_methylene', '[#6:1][O;X2;!R:2][#6:3]>>[#6:1][C:2][#6:3]'),
+]
+
+_REACTIONS = None
+
+
+def _reactions():
+    global _REACTIONS
+    if _REACTIONS is None:
+        _REACTIONS = [(name, AllChem.ReactionFromSmarts(smarts)) for name, smarts in TRANSFORMS]
+    return _REACTIONS
+
+
+def canonicalize(smiles: str) -> Optional[str]:
+    """Return the canonical SMILES, or None if the SMILES cannot be parsed."""
+    mol = Chem.MolFromSmiles(smiles)
+    return Chem.MolToSmiles(mol) if mol is not None else None
+
+
+def enumerate_analogs(smiles: str, max_analogs: int = 200, max_heavy_atoms: int = 100) -> List[Dict[str, str]]:
+    """
+    Enumerate single-step analogs of a seed molecule.
+
+    Every transform in TRANSFORMS is applied at each matching site of the seed; products
+    that fail sanitization are dropped and the rest are deduplicated by canonical SMILES.
+
+    Args:
+        smiles (str): Seed SMILES string
+        max_analogs (int): Stop after this many unique analogs
+        max_heavy_atoms (int): Skip products larger than this
+
+    Returns:
+        list: [{'smiles': canonical SMILES, 'transform': name of the first transform producing it}],
+        in TRANSFORMS order and excluding the seed itself
+
+    Raises:
+        ValueError: If the seed SMILES is invalid
+    """
+    mol = Chem.MolFromSmiles(smiles)
+    if mol is None:
+        raise ValueError(f"Invalid SMILES string: {smiles}")
+
+    seen = {Chem.MolToSmiles(mol)}
+    analogs = []
+
+    # Failed sanitizations are expected for many sites; keep RDKit quiet about them
+    RDLogger.DisableLog('rdApp.*')
+    try:
+        for name, rxn in _reactions():
+            for products in rxn.RunReactants((mol,)):
+                product = products[0]
+                try:
+                    Chem.SanitizeMol(product)
+                except Exception:
+                    continue
+                if product.GetNumHeavyAtoms() > max_heavy_atoms:
+                    continue
+
+                canonical = canonicalize(Chem.MolToSmiles(product))
+                if canonical is None or canonical in seen:
+                    continue
+
+                seen.add(canonical)
+                analogs.append({'smiles': canonical, 'transform': name})
+                if len(analogs) >= max_analogs:
+                    return analogs
+    finally:
+        RDLogger.EnableLog('rdApp.*')
+
+    return analogs
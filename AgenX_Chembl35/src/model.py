@@ -380,4 +380,21 @@ class Standardizer:
             state_dict (dict): State dictionary
         """
         self.mean = state_dict['mean']
-        self.std = state_dict['std']
\ No newline at end of file
+        self.std = state_dict['std']
+
+def quantize_model(model: nn.Module) -> nn.Module:
+    """
+    Apply dynamic int8 quantization to the linear layers of a trained model.
+
+    Only nn.Linear layers are converted (weights stored as int8, activations
+    quantized on the fly); the graph message passing stays in fp32. The
+    quantized model only runs on CPU.
+
+    Args:
+        model (nn.Module): Trained model in fp32
+
+    Returns:
+        nn.Module: Quantized copy of the model in eval mode
+    """
+    model = model.to('cpu').eval()
+    return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
@@ -0,0 +1,213 @@
+"""
+Morgan fingerprint index with bulk Tanimoto search over memory-mapped bit vectors.
+"""
+
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from rdkit import Chem, RDLogger
+from rdkit.Chem import rdFingerprintGenerator
+
+FP_RADIUS = 2
+FP_BITS = 2048
+FP_WORDS = FP_BITS // 64
+
+_generator = rdFingerprintGenerator.GetMorganGenerator(radius=FP_RADIUS, fpSize=FP_BITS)
+
+
+def fingerprint(smiles: str) -> Optional[np.ndarray]:
+    """
+    Packed Morgan fingerprint of a molecule.
+
+    Returns:
+        numpy.ndarray: FP_WORDS uint64 words, or None if the SMILES is invalid
+    """
+    mol = Chem.MolFromSmiles(smiles)
+    if mol is None:
+        return None
+    bits = _generator.GetFingerprintAsNumPy(mol).astype(np.uint8)
+    return np.packbits(bits).view(np.uint64)
+
+
+def build_index(csv_file: str, index_dir: str, smiles_col: str, target_col: str,
+                delimiter: str = ',', chunk_size: int = 100000) -> int:
+    """
+    Fingerprint every molecule of a CSV file and persist the index to index_dir.
+
+    The CSV is streamed in chunks into memory-mapped arrays, which are then reordered by
+    the number of bits set so a search can skip rows that cannot reach the current top-k:
+        fingerprints.npy  (n, FP_WORDS) uint64 packed bits, sorted by bit count
+        counts.npy        (n,) uint16 bits set per row (0 for unparsable SMILES)
+        values.npy        (n,) float32 target values
+        rows.npy          (n,) int64 original CSV row of each entry
+        smiles.bin        concatenated UTF-8 SMILES in CSV order, sliced by offsets.npy (n + 1,) int64
+
+    Args:
+        csv_file (str): Dataset CSV
+        index_dir (str): Output directory
+        smiles_col (str): Column with SMILES strings
+        target_col (str): Column with the measured values
+
+    Returns:
+        int: Number of indexed rows
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    with open(csv_file, 'rb') as f:
+        n_rows = sum(1 for _ in f) - 1
+
+    unsorted_path = os.path.join(index_dir, 'fingerprints.unsorted.npy')
+    fps = np.lib.format.open_memmap(unsorted_path, mode='w+', dtype=np.uint64, shape=(n_rows, FP_WORDS))
+    counts = np.zeros(n_rows, dtype=np.uint16)
+    values = np.zeros(n_rows, dtype=np.float32)
+    offsets = np.zeros(n_rows + 1, dtype=np.int64)
+
+    RDLogger.DisableLog('rdApp.*')
+    row = 0
+    try:
+        with open(os.path.join(index_dir, 'smiles.bin'), 'wb') as smiles_file:
+            for chunk in pd.read_csv(csv_file, delimiter=delimiter, usecols=[smiles_col, target_col], chunksize=chunk_size):
+                for smiles, value in zip(chunk[smiles_col].astype(str), chunk[target_col]):
+                    fp = fingerprint(smiles)
+                    if fp is not None:
+                        fps[row] = fp
+                        counts[row] = np.bitwise_count(fp).sum()
+                    values[row] = value
+                    encoded = smiles.encode('utf-8')
+                    smiles_file.write(encoded)
+                    offsets[row + 1] = offsets[row] + len(encoded)
+                    row += 1
+                print(f"Indexed {row}/{n_rows} molecules")
+    finally:
+        RDLogger.EnableLog('rdApp.*')
+
+    # Line count may overestimate rows when fields contain newlines
+    order = np.argsort(counts[:row], kind='stable')
+    sorted_fps = np.lib.format.open_memmap(os.path.join(index_dir, 'fingerprints.npy'), mode='w+',
+                                           dtype=np.uint64, shape=(row, FP_WORDS))
+    for start in range(0, row, chunk_size):
+        sorted_fps[start:start + chunk_size] = fps[order[start:start + chunk_size]]
+    sorted_fps.flush()
+    del fps
+    os.remove(unsorted_path)
+
+    np.save(os.path.join(index_dir, 'counts.npy'), counts[order])
+    np.save(os.path.join(index_dir, 'values.npy'), values[order])
+    np.save(os.path.join(index_dir, 'rows.npy'), order.astype(np.int64))
+    np.save(os.path.join(index_dir, 'offsets.npy'), offsets[:row + 1])
+    with open(os.path.join(index_dir, 'meta.json'), 'w') as f:
+        json.dump({'n_rows': row, 'radius': FP_RADIUS, 'n_bits': FP_BITS, 'source': csv_file,
+                   'target_col': target_col}, f, indent=4)
+    return row
+
+
+class FingerprintIndex:
+    """
+    Read-only Tanimoto top-k search over an index written by build_index.
+
+    Rows are memory-mapped, so loading is instant and pages are shared between processes.
+    Because rows are sorted by bit count, all rows with a given count c form one contiguous
+    block whose Tanimoto similarity to a query with q bits is at most min(q, c) / max(q, c).
+    A query scans blocks in order of decreasing bound and stops once the bound drops below
+    the current k-th best similarity; each round is split into chunks on a thread pool
+    (NumPy releases the GIL in the popcount and reductions).
+    """
+
+    def __init__(self, index_dir: str, n_threads: Optional[int] = None, chunk_size: int = 65536):
+        with open(os.path.join(index_dir, 'meta.json')) as f:
+            self.meta = json.load(f)
+        if self.meta['radius'] != FP_RADIUS or self.meta['n_bits'] != FP_BITS:
+            raise ValueError(f"Index at {index_dir} was built with different fingerprint settings")
+
+        self.fps = np.load(os.path.join(index_dir, 'fingerprints.npy'), mmap_mode='r')
+        self.counts = np.load(os.path.join(index_dir, 'counts.npy'))
+        self.values = np.load(os.path.join(index_dir, 'values.npy'), mmap_mode='r')
+        self.rows = np.load(os.path.join(index_dir, 'rows.npy'), mmap_mode='r')
+        self.offsets = np.load(os.path.join(index_dir, 'offsets.npy'), mmap_mode='r')
+        self.smiles_blob = np.memmap(os.path.join(index_dir, 'smiles.bin'), dtype=np.uint8, mode='r') \
+            if self.offsets[-1] > 0 else np.zeros(0, dtype=np.uint8)
+
+        # Rows with bit count c are block_starts[c]:block_starts[c + 1]
+        self.block_starts = np.searchsorted(self.counts, np.arange(FP_BITS + 2))
+
+        self.n_threads = n_threads or os.cpu_count()
+        self.chunk_size = chunk_size
+        self.executor = ThreadPoolExecutor(max_workers=self.n_threads)
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def smiles(self, i: int) -> str:
+        """SMILES of the i-th entry (in index order)."""
+        row = self.rows[i]
+        return self.smiles_blob[self.offsets[row]:self.offsets[row + 1]].tobytes().decode('utf-8')
+
+    def _search_range(self, start: int, stop: int, query: np.ndarray, query_count: int, k: int):
+        common = np.bitwise_count(self.fps[start:stop] & query).sum(axis=1, dtype=np.int32)
+        union = self.counts[start:stop].astype(np.int32) + query_count - common
+        similarity = common / np.maximum(union, 1)
+        if len(similarity) > k:
+            top = np.argpartition(-similarity, k - 1)[:k]
+        else:
+            top = np.arange(len(similarity))
+        return top + start, similarity[top]
+
+    def _scan_order(self, query_count: int):
+        """Non-empty bit-count blocks with their similarity bound, best bound first."""
+        bit_counts = np.arange(1, FP_BITS + 1)
+        bound = np.minimum(bit_counts, query_count) / np.maximum(bit_counts, query_count)
+        sizes = self.block_starts[bit_counts + 1] - self.block_starts[bit_counts]
+        keep = sizes > 0
+        bit_counts, bound = bit_counts[keep], bound[keep]
+        order = np.argsort(-bound, kind='stable')
+        return bit_counts[order], bound[order]
+
+    def search(self, smiles: str, k: int = 10) -> List[Dict]:
+        """
+        Return the k most similar indexed molecules, most similar first.
+
+        Raises:
+            ValueError: If the SMILES is invalid
+        """
+        query = fingerprint(smiles)
+        if query is None:
+            raise ValueError(f"Invalid SMILES string: {smiles}")
+        query_count = max(int(np.bitwise_count(query).sum()), 1)
+
+        best_rows = np.zeros(0, dtype=np.int64)
+        best_similarity = np.zeros(0)
+        round_size = self.chunk_size * self.n_threads
+
+        bit_counts, bounds = self._scan_order(query_count)
+        i = 0
+        while i < len(bit_counts):
+            if len(best_similarity) == k and bounds[i] < best_similarity.min():
+                break
+
+            # Collect blocks for this round, then split them into chunks for the pool
+            ranges, n_rows = [], 0
+            while i < len(bit_counts) and n_rows < round_size:
+                start, stop = self.block_starts[bit_counts[i]], self.block_starts[bit_counts[i] + 1]
+                ranges.extend((s, min(s + self.chunk_size, stop)) for s in range(start, stop, self.chunk_size))
+                n_rows += stop - start
+                i += 1
+
+            results = list(self.executor.map(
+                lambda r: self._search_range(r[0], r[1], query, query_count, k), ranges
+            ))
+            rows = np.concatenate([best_rows] + [r[0] for r in results])
+            similarity = np.concatenate([best_similarity] + [r[1] for r in results])
+            top = np.argsort(-similarity, kind='stable')[:k]
+            best_rows, best_similarity = rows[top], similarity[top]
+
+        return [
+            {
+                'smiles': self.smiles(int(row)),
+                'value': float(self.values[row]),
+                'similarity': float(similarity)
+            }
+            for row, similarity in zip(best_rows, best_similarity)
+        ]
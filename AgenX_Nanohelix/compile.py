@@ -0,0 +1,111 @@
+import argparse
+import copy
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from core.kernel import MLPKernel, export_mlp
+from core.models import PARAMETER_RANGES, compute_nanohelix_parameters, source_hash
+
+
+def fold_scalers(model, scaler_X, scaler_y):
+    """
+    Fold scaler_X into the first layer and scaler_y into the last layer of an MLPRegressor.
+
+    First layer:  ((x - mean_X) / scale_X) W + b = x (W / scale_X) + (b - (mean_X / scale_X) W)
+    Last layer:   (h W + b) * scale_y + mean_y  = h (W * scale_y) + (b * scale_y + mean_y)
+
+    The output activation of MLPRegressor is the identity, so the fused model predicts
+    the g-factor directly from the raw (unscaled) features.
+    """
+    fused = copy.deepcopy(model)
+    coefs = [w.astype(np.float64) for w in model.coefs_]
+    intercepts = [b.astype(np.float64) for b in model.intercepts_]
+
+    mean_X = scaler_X.mean_ if scaler_X.with_mean else np.zeros(coefs[0].shape[0])
+    scale_X = scaler_X.scale_ if scaler_X.with_std else np.ones(coefs[0].shape[0])
+    mean_y = scaler_y.mean_ if scaler_y.with_mean else np.zeros(1)
+    scale_y = scaler_y.scale_ if scaler_y.with_std else np.ones(1)
+
+    coefs[0] = coefs[0] / scale_X[:, None]
+    intercepts[0] = intercepts[0] - (mean_X / scale_X) @ model.coefs_[0]
+
+    coefs[-1] = coefs[-1] * scale_y
+    intercepts[-1] = intercepts[-1] * scale_y + mean_y
+
+    fused.coefs_ = coefs
+    fused.intercepts_ = intercepts
+    return fused
+
+
+def random_features(feature_names, n_samples, seed=42):
+    """Random in-range geometries expanded to the model's feature columns"""
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame({
+        name: rng.uniform(r['min'], r['max'], n_samples) for name, r in PARAMETER_RANGES.items()
+    })
+    data = compute_nanohelix_parameters(data)
+    for feature in feature_names:
+        if feature not in data.columns:
+            data[feature] = 0
+    return data[feature_names]
+
+
+def check_parity(model, scaler_X, scaler_y, fused, X, atol):
+    """Compare scaler_X -> model -> scaler_y against the fused model and return the max absolute difference"""
+    reference = scaler_y.inverse_transform(model.predict(scaler_X.transform(X)).reshape(-1, 1)).ravel()
+    output = fused.predict(X.to_numpy())
+    max_diff = float(np.max(np.abs(reference - output)))
+    if max_diff > atol:
+        raise ValueError(f"Fused model deviates from the reference by {max_diff:.3e} (tolerance {atol:.1e})")
+    return max_diff
+
+
+def check_kernel_parity(kernel, fused, X, atol):
+    """Compare the NumPy kernel against sklearn's predict (batch and single-row) and return the max absolute difference"""
+    reference = fused.predict(X.to_numpy())
+    batch = kernel.predict(X.to_numpy())
+    single = np.array([kernel.predict(row) for row in X.to_numpy()[:100]])
+    max_diff = float(max(np.max(np.abs(reference - batch)), np.max(np.abs(reference[:100] - single))))
+    if max_diff > atol:
+        raise ValueError(f"NumPy kernel deviates from sklearn by {max_diff:.3e} (tolerance {atol:.1e})")
+    return max_diff
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fold the nanohelix feature/target scalers into the MLP")
+    parser.add_argument("--model", default="models/nanohelix_mlp_model.pkl")
+    parser.add_argument("--scaler_X", default="models/nanohelix_scaler_X.pkl")
+    parser.add_argument("--scaler_y", default="models/nanohelix_scaler_y.pkl")
+    parser.add_argument("--output", default="models/nanohelix_mlp_fused.pkl")
+    parser.add_argument("--kernel_output", default="models/nanohelix_mlp.npz", help="Extracted weights for core.kernel.MLPKernel")
+    parser.add_argument("--n_check", type=int, default=10000, help="Number of random geometries for the parity check")
+    parser.add_argument("--atol", type=float, default=1e-9, help="Max absolute g-factor difference allowed")
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    scaler_X = joblib.load(args.scaler_X)
+    scaler_y = joblib.load(args.scaler_y)
+    feature_names = list(scaler_X.feature_names_in_)
+
+    fused = fold_scalers(model, scaler_X, scaler_y)
+
+    X = random_features(feature_names, args.n_check)
+    max_diff = check_parity(model, scaler_X, scaler_y, fused, X, args.atol)
+    print(f"Parity check on {args.n_check} geometries passed: max |dg| = {max_diff:.3e}")
+
+    # The source hash lets the services refuse the artifacts once the model or scalers are retrained
+    sources_hash = source_hash([args.model, args.scaler_X, args.scaler_y])
+    joblib.dump({'model': fused, 'feature_names': feature_names, 'source_hash': sources_hash}, args.output)
+    print(f"Fused model saved to: {args.output}")
+
+    export_mlp(fused, feature_names, args.kernel_output, source_hash=sources_hash)
+    try:
+        max_diff = check_kernel_parity(MLPKernel(args.kernel_output), fused, X, args.atol)
+    except ValueError:
+        os.remove(args.kernel_output)
+        raise
+    print(f"Kernel parity check against sklearn passed: max |dg| = {max_diff:.3e}")
+    print(f"NumPy kernel saved to: {args.kernel_output}")
@@ -0,0 +1,141 @@
+import threading
+
+import numpy as np
+from scipy.special import expit
+
+
+def _identity(x):
+    return x
+
+
+def _relu(x):
+    return np.maximum(x, 0, out=x)
+
+
+def _tanh(x):
+    return np.tanh(x, out=x)
+
+
+def _logistic(x):
+    return expit(x, out=x)
+
+
+# In-place versions of sklearn.neural_network._base.ACTIVATIONS
+ACTIVATIONS = {
+    'identity': _identity,
+    'relu': _relu,
+    'tanh': _tanh,
+    'logistic': _logistic,
+}
+
+
+def export_mlp(model, feature_names, path, source_hash=None):
+    """
+    Export the weights of a fitted MLPRegressor to an .npz file for MLPKernel.
+
+    Parameters:
+    -----------
+    model : MLPRegressor
+        Fitted model. Export the fused model (see compile.py) so that the kernel
+        works on raw features and returns the g-factor directly.
+    feature_names : list of str
+        Feature columns in the order expected by the model
+    path : str
+        Output .npz path
+    source_hash : str, optional
+        core.models.source_hash of the weights and scalers the model was built from,
+        checked by the services before they serve the kernel
+    """
+    arrays = {}
+    for i, (coef, intercept) in enumerate(zip(model.coefs_, model.intercepts_)):
+        arrays[f'coef_{i}'] = np.asarray(coef, dtype=np.float64)
+        arrays[f'intercept_{i}'] = np.asarray(intercept, dtype=np.float64)
+
+    np.savez(
+        path,
+        n_layers=len(model.coefs_),
+        activation=model.activation,
+        out_activation=model.out_activation_,
+        feature_names=np.asarray(feature_names),
+        source_hash=np.asarray(source_hash or ''),
+        **arrays
+    )
+
+
+class MLPKernel:
+    """
+    Forward pass of an exported MLPRegressor as plain NumPy matmuls.
+
+    Skips sklearn's input validation and dispatch; hidden activations are written into
+    per-thread buffers that are allocated once and reused across calls.
+    """
+
+    def __init__(self, path, max_batch=1024):
+        data = np.load(path, allow_pickle=False)
+        n_layers = int(data['n_layers'])
+
+        self.coefs = [np.ascontiguousarray(data[f'coef_{i}']) for i in range(n_layers)]
+        self.intercepts = [np.ascontiguousarray(data[f'intercept_{i}']) for i in range(n_layers)]
+        self.activation = str(data['activation'])
+        self.out_activation = str(data['out_activation'])
+        self.feature_names = [str(name) for name in data['feature_names']]
+        self.source_hash = (str(data['source_hash']) or None) if 'source_hash' in data.files else None
+        self.n_features = self.coefs[0].shape[0]
+        self.max_batch = max_batch
+
+        self._hidden_activation = ACTIVATIONS[self.activation]
+        self._output_activation = ACTIVATIONS[self.out_activation]
+        self._local = threading.local()
+
+    def _buffers(self):
+        buffers = getattr(self._local, 'buffers', None)
+        if buffers is None:
+            buffers = [np.empty((self.max_batch, coef.shape[1])) for coef in self.coefs]
+            self._local.buffers = buffers
+        return buffers
+
+    def _forward(self, X, buffers):
+        n = X.shape[0]
+        hidden = X
+        last = len(self.coefs) - 1
+        for i, (coef, intercept) in enumerate(zip(self.coefs, self.intercepts)):
+            out = buffers[i][:n]
+            np.matmul(hidden, coef, out=out)
+            out += intercept
+            if i < last:
+                self._hidden_activation(out)
+            else:
+                self._output_activation(out)
+            hidden = out
+        return hidden[:, 0].copy()
+
+    def predict(self, X):
+        """
+        Predict from raw feature rows.
+
+        Parameters:
+        -----------
+        X : array-like of shape (n_features,) or (n_samples, n_features)
+
+        Returns:
+        --------
+        float for a single feature vector, otherwise an array of shape (n_samples,)
+        """
+        X = np.asarray(X, dtype=np.float64)
+        single = X.ndim == 1
+        if single:
+            X = X[None, :]
+
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got {X.shape[1]}")
+
+        buffers = self._buffers()
+        if X.shape[0] <= self.max_batch:
+            y = self._forward(X, buffers)
+        else:
+            y = np.concatenate([
+                self._forward(X[start:start + self.max_batch], buffers)
+                for start in range(0, X.shape[0], self.max_batch)
+            ])
+
+        return float(y[0]) if single else y
@@ -1,7 +1,57 @@
 import numpy as np
 import pandas as pd
+import hashlib
 import joblib
 import os
+import warnings
+from functools import lru_cache
+
+from .kernel import MLPKernel
+
+BASIC_PARAMETERS = ['pitch', 'fiber_radius', 'n_turns', 'helix_radius']
+
+# Define the parameter ranges based on the physical constraints
+PARAMETER_RANGES = {
+    'pitch': {'min': 60, 'max': 200, 'unit': 'nm'},
+    'fiber_radius': {'min': 20, 'max': 60, 'unit': 'nm'},
+    'n_turns': {'min': 3, 'max': 10, 'unit': ''},
+    'helix_radius': {'min': 20, 'max': 90, 'unit': 'nm'}
+}
+KERNEL_PATH = "models/nanohelix_mlp.npz"
+# Files the compiled artifacts (fused MLP, NumPy kernel) are built from by compile.py
+MODEL_SOURCES = ["models/nanohelix_mlp_model.pkl", "models/nanohelix_scaler_X.pkl", "models/nanohelix_scaler_y.pkl"]
+
+
+def source_hash(paths):
+    """sha256 over the contents of the files a compiled artifact was built from"""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def check_artifact(path, stored_hash, sources=MODEL_SOURCES):
+    """
+    Raise ValueError unless the artifact at `path` was built from `sources` as they are now,
+    e.g. after retraining; it is accepted unchecked only when the sources are not deployed.
+    """
+    if stored_hash is None:
+        raise ValueError(f"{path} predates source hashing, re-run compile.py")
+    if all(os.path.exists(source) for source in sources) and stored_hash != source_hash(sources):
+        raise ValueError(f"{path} was built from other weights or scalers than {', '.join(map(str, sources))}, re-run compile.py")
+
+
+@lru_cache(maxsize=None)
+def load_kernel(path=KERNEL_PATH):
+    """Load the exported NumPy kernel once per process, or None if it is stale (see check_artifact)."""
+    kernel = MLPKernel(path)
+    try:
+        check_artifact(path, kernel.source_hash)
+    except ValueError as e:
+        warnings.warn(f"Ignoring NumPy kernel: {e}", UserWarning, stacklevel=2)
+        return None
+    return kernel
 
 
 def predict_g_factor(params_dict):
@@ -24,7 +74,22 @@ def predict_g_factor(params_dict):
         - 'g_factor': Predicted g-factor
         - All input parameters
         - All derived parameters
+
+    Uses the NumPy kernel (models/nanohelix_mlp.npz, written by compile.py) when it has
+    been exported from the current model and scalers, otherwise falls back to them.
     """
+    kernel = load_kernel() if os.path.exists(KERNEL_PATH) else None
+    if kernel is not None:
+        X = compute_nanohelix_features(
+            np.array([[params_dict[name] for name in BASIC_PARAMETERS]], dtype=np.float64),
+            kernel.feature_names
+        )
+        return {
+            'g_factor': kernel.predict(X[0]),
+            **params_dict,
+            **{k: v for k, v in zip(kernel.feature_names, X[0]) if k not in params_dict}
+        }
+
     # Extract parameters from dictionary
     pitch = params_dict['pitch']
     fiber_radius = params_dict['fiber_radius']
@@ -106,3 +171,46 @@ def compute_nanohelix_parameters(df):
     df_enriched['mass'] = df_enriched['V']
 
     return df_enriched
+
+
+def compute_nanohelix_features(params, feature_names):
+    """
+    NumPy counterpart of compute_nanohelix_parameters for the inference hot path.
+
+    Parameters:
+    -----------
+    params : ndarray of shape (n_samples, 4)
+        Columns in BASIC_PARAMETERS order: pitch, fiber_radius, n_turns, helix_radius
+    feature_names : list of str
+        Feature columns expected by the model; unknown columns are filled with 0
+
+    Returns:
+    --------
+    X : ndarray of shape (n_samples, len(feature_names))
+    """
+    pitch, fiber_radius, n_turns, helix_radius = np.asarray(params, dtype=np.float64).T
+
+    turn_length = np.sqrt((2 * np.pi * helix_radius) ** 2 + pitch ** 2)
+    total_length = turn_length * n_turns
+    total_fiber_length = total_length * (1 + (2 * np.pi * fiber_radius) / turn_length)
+    volume = np.pi * fiber_radius ** 2 * total_fiber_length
+
+    columns = {
+        'pitch': pitch,
+        'fiber_radius': fiber_radius,
+        'n_turns': n_turns,
+        'helix_radius': helix_radius,
+        'total_length': total_length,
+        'height': pitch * n_turns,
+        'curl': helix_radius / (helix_radius ** 2 + (pitch / (2 * np.pi)) ** 2),
+        'angle': np.arctan2(pitch, 2 * np.pi * helix_radius),
+        'total_fiber_length': total_fiber_length,
+        'V': volume,
+        'mass': volume,
+    }
+
+    X = np.zeros((len(pitch), len(feature_names)))
+    for j, name in enumerate(feature_names):
+        if name in columns:
+            X[:, j] = columns[name]
+    return X
@@ -0,0 +1,91 @@
+import numpy as np
+
+from .models import BASIC_PARAMETERS, PARAMETER_RANGES
+
+
+def _select_top_k(params, scores, top_k, min_distance, low, high):
+    """Best-first selection of up to top_k points that are at least min_distance apart in the unit cube"""
+    order = np.argsort(-scores)
+    unit = (params - low) / np.where(high > low, high - low, 1.0)
+    chosen = []
+    for i in order:
+        if all(np.max(np.abs(unit[i] - unit[j])) >= min_distance for j in chosen):
+            chosen.append(i)
+            if len(chosen) == top_k:
+                break
+    return np.array(chosen, dtype=np.int64)
+
+
+def differential_evolution(predict, top_k=5, population=64, n_generations=60, maximize=True, fixed=None,
+                           mutation=0.7, crossover=0.9, min_distance=0.02, seed=None, ranges=PARAMETER_RANGES):
+    """
+    Search PARAMETER_RANGES for the geometries with the highest (or lowest) predicted g-factor.
+
+    DE/rand/1/bin over the unit cube: every generation builds all trial vectors at once and
+    scores the whole population with a single batched predict call, so a run costs
+    n_generations + 1 forward passes regardless of population size.
+
+    Parameters:
+    -----------
+    predict : callable
+        Maps an array of shape (n_samples, 4) in BASIC_PARAMETERS order to g-factors
+    top_k : int
+        Number of geometries to return
+    maximize : bool
+        Search for the largest g-factor if True, the smallest otherwise
+    fixed : dict, optional
+        Parameters held constant during the search, e.g. {'n_turns': 5}
+    min_distance : float
+        Minimum Chebyshev distance (as a fraction of each range) between returned geometries,
+        so the top-k are distinct designs rather than copies of the optimum
+
+    Returns:
+    --------
+    result : dict
+        'candidates' (list of dicts with the 4 parameters and 'g_factor', best first)
+        and 'n_evaluated'
+    """
+    fixed = fixed or {}
+    rng = np.random.default_rng(seed)
+    n_dims = len(BASIC_PARAMETERS)
+    low = np.array([fixed.get(name, ranges[name]['min']) for name in BASIC_PARAMETERS], dtype=np.float64)
+    high = np.array([fixed.get(name, ranges[name]['max']) for name in BASIC_PARAMETERS], dtype=np.float64)
+    sign = 1.0 if maximize else -1.0
+
+    def evaluate(unit):
+        params = low + unit * (high - low)
+        return params, sign * np.asarray(predict(params), dtype=np.float64)
+
+    pop = rng.random((population, n_dims))
+    pop_params, fitness = evaluate(pop)
+    archive_params, archive_scores = [pop_params], [fitness]
+
+    rows = np.arange(population)
+    for _ in range(n_generations):
+        # Three distinct donors per individual, all different from the individual itself
+        donors = np.argsort(rng.random((population, population - 1)), axis=1)[:, :3]
+        donors += donors >= rows[:, None]
+        a, b, c = donors.T
+
+        mutant = np.clip(pop[a] + mutation * (pop[b] - pop[c]), 0.0, 1.0)
+        cross = rng.random((population, n_dims)) < crossover
+        cross[rows, rng.integers(n_dims, size=population)] = True
+        trial = np.where(cross, mutant, pop)
+
+        trial_params, trial_fitness = evaluate(trial)
+        archive_params.append(trial_params)
+        archive_scores.append(trial_fitness)
+
+        improved = trial_fitness >= fitness
+        pop[improved] = trial[improved]
+        fitness[improved] = trial_fitness[improved]
+
+    archive_params = np.concatenate(archive_params)
+    archive_scores = np.concatenate(archive_scores)
+    best = _select_top_k(archive_params, archive_scores, top_k, min_distance, low, high)
+
+    candidates = [
+        {**{name: float(v) for name, v in zip(BASIC_PARAMETERS, archive_params[i])}, 'g_factor': float(sign * archive_scores[i])}
+        for i in best
+    ]
+    return {'candidates': candidates, 'n_evaluated': int(len(archive_scores))}
@@ -0,0 +1,102 @@
+import itertools
+
+import numpy as np
+
+from .models import BASIC_PARAMETERS, PARAMETER_RANGES, compute_nanohelix_features
+
+
+class ResponseSurface:
+    """
+    Precomputed g-factor table on a regular 4-D grid with multilinear interpolation.
+
+    The grid spans PARAMETER_RANGES widened by the same 10% tolerance the service accepts,
+    so every valid query lands inside it. A lookup is a fixed amount of work per query
+    (one cell index and 16 corner values), independent of the model size.
+    """
+
+    def __init__(self, low, high, values, max_error=np.inf):
+        self.low = np.asarray(low, dtype=np.float64)
+        self.high = np.asarray(high, dtype=np.float64)
+        self.values = np.asarray(values, dtype=np.float64)
+        self.shape = self.values.shape
+        self.step = (self.high - self.low) / (np.array(self.shape) - 1)
+        self.max_error = float(max_error)
+
+        # The 16 cell corners as 0/1 offsets and as offsets into the flattened table
+        self._corners = np.array(list(itertools.product((0, 1), repeat=len(self.shape))), dtype=bool)
+        self._strides = np.array(self.values.strides) // self.values.itemsize
+        self._corner_offsets = self._corners @ self._strides
+        self._flat = self.values.ravel()
+
+    @classmethod
+    def build(cls, predict, feature_names, n_points=32, tolerance=0.1, chunk_size=65536, ranges=PARAMETER_RANGES):
+        """
+        Evaluate the exact model on every grid node.
+
+        Parameters:
+        -----------
+        predict : callable
+            Maps a raw feature matrix (n_samples, n_features) to g-factors
+        feature_names : list of str
+            Feature columns expected by predict
+        n_points : int
+            Grid nodes per axis (the table holds n_points ** 4 values)
+        tolerance : float
+            Relative widening of each range, matching the service's input validation
+        """
+        low = np.array([ranges[name]['min'] * (1 - tolerance) for name in BASIC_PARAMETERS])
+        high = np.array([ranges[name]['max'] * (1 + tolerance) for name in BASIC_PARAMETERS])
+        shape = (n_points,) * len(BASIC_PARAMETERS)
+        axes = [np.linspace(l, h, n_points) for l, h in zip(low, high)]
+
+        values = np.empty(int(np.prod(shape)))
+        for start in range(0, len(values), chunk_size):
+            index = np.unravel_index(np.arange(start, min(start + chunk_size, len(values))), shape)
+            params = np.stack([axis[i] for axis, i in zip(axes, index)], axis=1)
+            values[start:start + len(params)] = predict(compute_nanohelix_features(params, feature_names))
+
+        return cls(low, high, values.reshape(shape))
+
+    def lookup(self, params):
+        """
+        Interpolate g-factors for an array of shape (n_samples, 4) in BASIC_PARAMETERS order.
+
+        Returns:
+        --------
+        g_factor : ndarray of shape (n_samples,)
+            NaN for points outside the grid
+        inside : ndarray of bool, shape (n_samples,)
+        """
+        params = np.atleast_2d(np.asarray(params, dtype=np.float64))
+        inside = np.all((params >= self.low) & (params <= self.high), axis=1)
+
+        position = (params - self.low) / self.step
+        cell = np.clip(np.floor(position).astype(np.int64), 0, np.array(self.shape) - 2)
+        frac = np.clip(position - cell, 0.0, 1.0)[:, None, :]
+
+        # (n_samples, 16) corner weights and table values
+        weights = np.where(self._corners, frac, 1.0 - frac).prod(axis=2)
+        corners = self._flat[(cell @ self._strides)[:, None] + self._corner_offsets]
+        g_factor = (weights * corners).sum(axis=1)
+
+        g_factor[~inside] = np.nan
+        return g_factor, inside
+
+    def validate(self, predict, feature_names, n_samples=2000, seed=0):
+        """
+        Measure the interpolation error against the exact model on random off-grid points
+        inside the grid, store it as max_error and return it.
+        """
+        rng = np.random.default_rng(seed)
+        params = rng.uniform(self.low, self.high, (n_samples, len(BASIC_PARAMETERS)))
+        reference = predict(compute_nanohelix_features(params, feature_names))
+        self.max_error = float(np.max(np.abs(self.lookup(params)[0] - reference)))
+        return self.max_error
+
+    def save(self, path):
+        np.savez(path, low=self.low, high=self.high, values=self.values, max_error=self.max_error)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data['low'], data['high'], data['values'], float(data['max_error']))
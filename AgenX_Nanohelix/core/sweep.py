@@ -0,0 +1,168 @@
+import numpy as np
+from scipy.stats import qmc
+
+from .models import BASIC_PARAMETERS, PARAMETER_RANGES, compute_nanohelix_features
+
+# Columns of the memory-mapped result array
+RESULT_COLUMNS = BASIC_PARAMETERS + ['g_factor', 'V']
+DESIGNS = ('grid', 'lhs', 'sobol')
+# Default n_points per design: points per axis for 'grid' (32**4 = 2**20 geometries), total otherwise
+DEFAULT_POINTS = {'grid': 32, 'lhs': 2 ** 20, 'sobol': 2 ** 20}
+# Largest design evaluated (2**28 rows of RESULT_COLUMNS are 6 GiB of float32 results)
+MAX_DESIGN_SIZE = 2 ** 28
+
+
+def _bounds(ranges):
+    low = np.array([ranges[name]['min'] for name in BASIC_PARAMETERS], dtype=np.float64)
+    high = np.array([ranges[name]['max'] for name in BASIC_PARAMETERS], dtype=np.float64)
+    return low, high
+
+
+def design_size(design, n_points=None):
+    """
+    Number of geometries a design evaluates (n_points is per axis for 'grid', total otherwise,
+    None for the design's DEFAULT_POINTS). Raises ValueError beyond MAX_DESIGN_SIZE.
+    """
+    if design not in DESIGNS:
+        raise ValueError(f"Unknown design '{design}', expected one of {DESIGNS}")
+    n_points = DEFAULT_POINTS[design] if n_points is None else n_points
+    if n_points < 1:
+        raise ValueError(f"n_points must be positive, got {n_points}")
+    total = n_points ** len(BASIC_PARAMETERS) if design == 'grid' else n_points
+    if total > MAX_DESIGN_SIZE:
+        raise ValueError(
+            f"The {design} design with n_points={n_points} has {total:,} geometries, more than "
+            f"{MAX_DESIGN_SIZE:,}" + (" (n_points is per axis for 'grid')" if design == 'grid' else "")
+        )
+    return total
+
+
+def iter_design(design, n_points=None, chunk_size=65536, ranges=PARAMETER_RANGES, seed=42):
+    """
+    Generate the design in chunks of shape (<= chunk_size, 4), columns in BASIC_PARAMETERS order.
+
+    Parameters:
+    -----------
+    design : str
+        'grid' (full factorial with n_points values per axis), 'lhs' (Latin hypercube)
+        or 'sobol' (scrambled Sobol sequence)
+    n_points : int, optional
+        Points per axis for 'grid', total number of points otherwise (default: DEFAULT_POINTS)
+    """
+    total = design_size(design, n_points)
+    n_points = DEFAULT_POINTS[design] if n_points is None else n_points
+    low, high = _bounds(ranges)
+    n_dims = len(BASIC_PARAMETERS)
+    rng = np.random.default_rng(seed)
+
+    if design == 'grid':
+        axes = [np.linspace(l, h, n_points) for l, h in zip(low, high)]
+        for start in range(0, total, chunk_size):
+            index = np.unravel_index(np.arange(start, min(start + chunk_size, total)), (n_points,) * n_dims)
+            yield np.stack([axis[i] for axis, i in zip(axes, index)], axis=1)
+
+    elif design == 'lhs':
+        # One stratum per point and axis; strata are shuffled independently per axis
+        strata = np.stack([rng.permutation(total) for _ in range(n_dims)], axis=1)
+        for start in range(0, total, chunk_size):
+            rows = strata[start:start + chunk_size]
+            unit = (rows + rng.random(rows.shape)) / total
+            yield low + unit * (high - low)
+
+    else:
+        sampler = qmc.Sobol(d=n_dims, scramble=True, seed=seed)
+        for start in range(0, total, chunk_size):
+            unit = sampler.random(min(chunk_size, total - start))
+            yield low + unit * (high - low)
+
+
+def _top_k(rows, k):
+    if len(rows) > k:
+        rows = rows[np.argpartition(-rows[:, 4], k - 1)[:k]]
+    return rows[np.argsort(-rows[:, 4])]
+
+
+def _pareto_front(rows):
+    """Rows not dominated in (max g_factor, min V), sorted by increasing V."""
+    rows = rows[np.lexsort((-rows[:, 4], rows[:, 5]))]
+    best_so_far = np.maximum.accumulate(rows[:, 4])
+    keep = np.ones(len(rows), dtype=bool)
+    keep[1:] = rows[1:, 4] > best_so_far[:-1]
+    return rows[keep]
+
+
+def _as_records(rows):
+    return [dict(zip(RESULT_COLUMNS, map(float, row))) for row in rows]
+
+
+def run_sweep(model, design='sobol', n_points=None, output_path=None, top_k=20,
+              chunk_size=65536, ranges=PARAMETER_RANGES, seed=42):
+    """
+    Evaluate the surrogate over a design of the nanohelix parameter space.
+
+    Each chunk is expanded to model features, scored in one batched forward and streamed
+    to a memory-mapped .npy file (columns: RESULT_COLUMNS), while the running top-k by
+    g-factor and the Pareto front of (max g-factor, min volume V) are kept in memory.
+
+    Parameters:
+    -----------
+    model : MLPKernel
+        Any object with predict(X) and feature_names
+    n_points : int, optional
+        Points per axis for 'grid', total number of points otherwise (default: DEFAULT_POINTS);
+        designs beyond MAX_DESIGN_SIZE raise ValueError before anything is allocated
+    output_path : str, optional
+        .npy file for all evaluated rows; load it with np.load(path, mmap_mode='r')
+
+    Returns:
+    --------
+    summary : dict
+        n_evaluated, g-factor statistics, top_k and pareto rows as dicts
+    """
+    total = design_size(design, n_points)
+    results = None
+    if output_path is not None:
+        results = np.lib.format.open_memmap(
+            output_path, mode='w+', dtype=np.float32, shape=(total, len(RESULT_COLUMNS))
+        )
+
+    v_index = model.feature_names.index('V') if 'V' in model.feature_names else None
+    best = np.empty((0, len(RESULT_COLUMNS)))
+    front = np.empty((0, len(RESULT_COLUMNS)))
+    g_sum, g_sq_sum, g_min, g_max = 0.0, 0.0, np.inf, -np.inf
+
+    start = 0
+    for params in iter_design(design, n_points, chunk_size, ranges, seed):
+        X = compute_nanohelix_features(params, model.feature_names)
+        g = model.predict(X)
+        volume = X[:, v_index] if v_index is not None else np.full(len(g), np.nan)
+        rows = np.column_stack([params, g, volume])
+
+        if results is not None:
+            results[start:start + len(rows)] = rows
+        start += len(rows)
+
+        best = _top_k(np.concatenate([best, rows]), top_k)
+        front = _pareto_front(np.concatenate([front, rows]))
+        g_sum += g.sum()
+        g_sq_sum += (g ** 2).sum()
+        g_min, g_max = min(g_min, g.min()), max(g_max, g.max())
+
+    if results is not None:
+        results.flush()
+
+    mean = g_sum / start
+    return {
+        'design': design,
+        'n_evaluated': start,
+        'output': output_path,
+        'columns': RESULT_COLUMNS,
+        'g_factor': {
+            'min': float(g_min),
+            'max': float(g_max),
+            'mean': float(mean),
+            'std': float(np.sqrt(max(g_sq_sum / start - mean ** 2, 0.0))),
+        },
+        'top_k': _as_records(best),
+        'pareto': _as_records(front),
+    }
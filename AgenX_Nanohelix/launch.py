@@ -6,13 +6,12 @@ import pandas as pd
 import joblib
 import os
 
-# Define the parameter ranges based on the physical constraints
-PARAMETER_RANGES = {
-    'pitch': {'min': 60, 'max': 200, 'unit': 'nm'},
-    'fiber_radius': {'min': 20, 'max': 60, 'unit': 'nm'},
-    'n_turns': {'min': 3, 'max': 10, 'unit': ''},
-    'helix_radius': {'min': 20, 'max': 90, 'unit': 'nm'}
-}
+from AgenX_Serving import wire
+from AgenX_Serving.metrics import Metrics
+from core.kernel import MLPKernel
+from core.models import BASIC_PARAMETERS, KERNEL_PATH, PARAMETER_RANGES, check_artifact, compute_nanohelix_features
+from core.optimize import differential_evolution
+from core.surface import ResponseSurface
 
 
 def validate_parameters(params_dict):
@@ -47,94 +46,178 @@ def validate_parameters(params_dict):
     return is_valid, error_msg
 
 
-def predict_g_factor(params_dict):
-    # Extract parameters from dictionary
-    pitch = params_dict['pitch']
-    fiber_radius = params_dict['fiber_radius']
-    n_turns = params_dict['n_turns']
-    helix_radius = params_dict['helix_radius']
-
-    # Check if model and scalers exist
-    model_path = "models/nanohelix_mlp_model.pkl"
-    scaler_X_path = "models/nanohelix_scaler_X.pkl"
-    scaler_y_path = "models/nanohelix_scaler_y.pkl"
-
-    if not all(os.path.exists(p) for p in [model_path, scaler_X_path, scaler_y_path]):
+def validate_param_array(params):
+    """validate_parameters for every row of an (n, 4) array in BASIC_PARAMETERS order; raises ValueError"""
+    low = np.array([PARAMETER_RANGES[name]['min'] * 0.9 for name in BASIC_PARAMETERS])
+    high = np.array([PARAMETER_RANGES[name]['max'] * 1.1 for name in BASIC_PARAMETERS])
+    bad = np.flatnonzero(~np.all(np.isfinite(params) & (params >= low) & (params <= high), axis=1))
+    if len(bad):
+        _, error_msg = validate_parameters(dict(zip(BASIC_PARAMETERS, params[bad[0]])))
+        raise ValueError(f"{len(bad)} input(s) out of range, first is input {bad[0]}: {error_msg or 'not a finite number'}")
+
+
+MAX_BATCH_SIZE = 10000  # Geometries per /predict_batch request
+
+MODEL_PATH = "models/nanohelix_mlp_model.pkl"
+SCALER_X_PATH = "models/nanohelix_scaler_X.pkl"
+SCALER_Y_PATH = "models/nanohelix_scaler_y.pkl"
+FUSED_MODEL_PATH = "models/nanohelix_mlp_fused.pkl"  # Scalers folded into the MLP (compile.py)
+SURFACE_PATH = "models/nanohelix_surface.npz"
+
+# Opt-in: answer in-range queries from a precomputed response surface instead of the MLP
+USE_SURFACE = os.environ.get("NANOHELIX_SURFACE", "0").lower() in ("1", "true", "yes")
+SURFACE_POINTS = int(os.environ.get("NANOHELIX_SURFACE_POINTS", "32"))
+SURFACE_MAX_ERROR = float(os.environ.get("NANOHELIX_SURFACE_MAX_ERROR", "5e-3"))
+
+
+def load_model():
+    """
+    Load the model once at startup, preferring (1) the NumPy kernel exported by compile.py,
+    (2) the fused MLP, (3) the MLP wrapped by scaler_X and scaler_y on every request.
+    Both (1) and (2) predict the g-factor directly from raw features, and are skipped with
+    a warning when they were compiled from other weights or scalers than the current ones.
+    """
+    if os.path.exists(KERNEL_PATH):
+        kernel = MLPKernel(KERNEL_PATH)
+        try:
+            check_artifact(KERNEL_PATH, kernel.source_hash)
+            return kernel, None, None, kernel.feature_names
+        except ValueError as e:
+            app.logger.warning(f"Ignoring NumPy kernel: {e}")
+
+    if os.path.exists(FUSED_MODEL_PATH):
+        artifact = joblib.load(FUSED_MODEL_PATH)
+        try:
+            check_artifact(FUSED_MODEL_PATH, artifact.get('source_hash'))
+            return artifact['model'], None, None, artifact['feature_names']
+        except ValueError as e:
+            app.logger.warning(f"Ignoring fused model: {e}")
+
+    if not all(os.path.exists(p) for p in [MODEL_PATH, SCALER_X_PATH, SCALER_Y_PATH]):
         raise FileNotFoundError("Model files not found. Please train the model first.")
 
-    # Load model and scalers
-    model = joblib.load(model_path)
-    scaler_X = joblib.load(scaler_X_path)
-    scaler_y = joblib.load(scaler_y_path)
+    scaler_X = joblib.load(SCALER_X_PATH)
+    return joblib.load(MODEL_PATH), scaler_X, joblib.load(SCALER_Y_PATH), list(scaler_X.feature_names_in_)
+
 
-    # Create a DataFrame with the 4 basic parameters
-    data = pd.DataFrame({
-        'pitch': [pitch],
-        'fiber_radius': [fiber_radius],
-        'n_turns': [n_turns],
-        'helix_radius': [helix_radius]
-    })
+def load_surface():
+    """
+    Load the response surface from SURFACE_PATH, or build and save it from the loaded model.
+    The table is always re-validated against the model on a held-out sample, so a stale
+    or too coarse table is rebuilt or, failing that, disabled in favour of the exact model.
+    """
+    if os.path.exists(SURFACE_PATH):
+        surface = ResponseSurface.load(SURFACE_PATH)
+        error = surface.validate(predict_features, feature_names)
+        if error <= SURFACE_MAX_ERROR:
+            return surface
+        app.logger.warning(f"Stored response surface is off by {error:.2e} (bound {SURFACE_MAX_ERROR:.1e}), rebuilding")
 
-    # Compute derived parameters
-    data_enriched = compute_nanohelix_parameters(data)
+    surface = ResponseSurface.build(predict_features, feature_names, n_points=SURFACE_POINTS)
+    error = surface.validate(predict_features, feature_names)
+    if error > SURFACE_MAX_ERROR:
+        app.logger.warning(f"Response surface error {error:.2e} exceeds {SURFACE_MAX_ERROR:.1e}, using the exact model")
+        return None
 
-    # Get the expected feature names from the scaler
-    expected_feature_names = scaler_X.feature_names_in_
+    surface.save(SURFACE_PATH)
+    return surface
 
-    # Check if additional features are needed
-    for feature in expected_feature_names:
-        if feature not in data_enriched.columns:
-            # Add default value of 0 for missing features
-            data_enriched[feature] = 0
 
-    # Ensure columns are in the same order as during training
-    X = data_enriched[expected_feature_names]
+def predict_features(X):
+    """Predict g-factors for a raw feature matrix of shape (n_samples, n_features)"""
+    if model is None:
+        raise FileNotFoundError("Model files not found. Please train the model first.")
 
-    # Scale features
-    X_scaled = scaler_X.transform(X)
+    if scaler_X is None:
+        # Kernel or fused model: scaling is part of the first and last layer
+        return model.predict(X)
 
-    # Make prediction
+    X_scaled = scaler_X.transform(pd.DataFrame(X, columns=feature_names))
     y_pred_scaled = model.predict(X_scaled)
-    g_factor = scaler_y.inverse_transform(y_pred_scaled.reshape(-1, 1))[0][0]
+    return scaler_y.inverse_transform(y_pred_scaled.reshape(-1, 1)).ravel()
+
+
+def predict_params(params):
+    """
+    Predict g-factors for an array of shape (n_samples, 4) in BASIC_PARAMETERS order.
+    Points inside the response surface are interpolated, the rest go through the model.
+
+    Returns the g-factors and the raw feature matrix.
+    """
+    metrics.observe('batch_size', len(params))
+    with metrics.timer('featurize'):
+        X = compute_nanohelix_features(params, feature_names)
+    if surface is None:
+        with metrics.timer('forward'):
+            return predict_features(X), X
+
+    with metrics.timer('surface'):
+        g_factor, inside = surface.lookup(params)
+    n_inside = int(inside.sum())
+    metrics.cache('surface', hits=n_inside, misses=len(params) - n_inside)
+    if n_inside < len(params):
+        with metrics.timer('forward'):
+            g_factor[~inside] = predict_features(X[~inside])
+    return g_factor, X
+
+
+def predict_g_factor(params_dict):
+    # Compute derived parameters in the column order used during training
+    params = np.array([[params_dict[name] for name in BASIC_PARAMETERS]], dtype=np.float64)
+
+    # Make prediction
+    g_factor, X = predict_params(params)
+    g_factor = float(g_factor[0])
 
     # Create result dictionary
     result_dict = {
         'g_factor': g_factor,
         **params_dict,  # Include input parameters
-        **{k: v for k, v in data_enriched.iloc[0].to_dict().items() if k not in params_dict}  # Add derived parameters
+        **{k: v for k, v in zip(feature_names, X[0]) if k not in params_dict}  # Add derived parameters
     }
 
     return result_dict
 
 
-def compute_nanohelix_parameters(df):
-    # Create a copy to avoid modifying the original
-    df_enriched = df.copy()
-
-    # Calculate derived parameters using vectorized operations
-    pitch = df_enriched['pitch']
-    fiber_radius = df_enriched['fiber_radius']
-    n_turns = df_enriched['n_turns']
-    helix_radius = df_enriched['helix_radius']
+def predict_g_factors(params_list):
+    """Predict g-factors for a list of parameter dicts in one batched forward"""
+    params = np.array([[p[name] for name in BASIC_PARAMETERS] for p in params_list], dtype=np.float64)
+    validate_param_array(params)
+    return predict_params(params)[0].tolist()
 
-    # Calculate turn length for all rows at once
-    turn_length = np.sqrt((2 * np.pi * helix_radius) ** 2 + pitch ** 2)
 
-    # Add all derived parameters using vectorized operations
-    df_enriched['total_length'] = turn_length * n_turns
-    df_enriched['height'] = pitch * n_turns
-    df_enriched['curl'] = helix_radius / (helix_radius ** 2 + (pitch / (2 * np.pi)) ** 2)
-    df_enriched['angle'] = np.arctan2(pitch, 2 * np.pi * helix_radius)
-    df_enriched['total_fiber_length'] = df_enriched['total_length'] * (1 + (2 * np.pi * fiber_radius) / turn_length)
-    df_enriched['V'] = np.pi * fiber_radius ** 2 * df_enriched['total_fiber_length']
-    df_enriched['mass'] = df_enriched['V']
-
-    return df_enriched
+def predict_param_array(params):
+    """Predict g-factors for an array-like of shape (n_samples, 4) in BASIC_PARAMETERS order"""
+    params = np.asarray(params, dtype=np.float64)
+    if params.ndim != 2 or params.shape[1] != len(BASIC_PARAMETERS) or not len(params):
+        raise ValueError(f"Field 'params' must have shape (n, {len(BASIC_PARAMETERS)}) in the order {', '.join(BASIC_PARAMETERS)}")
+    validate_param_array(params)
+    return np.asarray(predict_params(params)[0], dtype=np.float64)
 
 
 app = Flask(__name__)
 app.logger.setLevel(logging.DEBUG)
 
+# Request counts, stage latencies, batch sizes and surface hit ratio, served at GET /metrics
+metrics = Metrics()
+metrics.instrument(app)
+
+try:
+    model, scaler_X, scaler_y, feature_names = load_model()
+    app.logger.info(f"Loaded {type(model).__name__} ({'fused' if scaler_X is None else 'unfused'}) with {len(feature_names)} features")
+except Exception as e:
+    app.logger.error(f"Failed to load model: {e}")
+    model, scaler_X, scaler_y, feature_names = None, None, None, []
+
+surface = None
+if USE_SURFACE and model is not None:
+    try:
+        surface = load_surface()
+        if surface is not None:
+            app.logger.info(f"Serving from response surface {surface.shape} (max error {surface.max_error:.2e})")
+    except Exception as e:
+        app.logger.error(f"Failed to prepare response surface: {e}")
+
 
 @app.route('/predict', methods=['POST'])
 def predict():
@@ -148,11 +231,9 @@ def predict():
     try:
         # Get input data from request
         data = request.get_json()
-        app.logger.debug(f"Received input data: {data}")
 
         # Check if all required parameters are present
-        required_params = ['pitch', 'fiber_radius', 'n_turns', 'helix_radius']
-        missing_params = [param for param in required_params if param not in data]
+        missing_params = [param for param in BASIC_PARAMETERS if param not in data]
 
         if missing_params:
             raise ValueError(f"Missing required parameters: {', '.join(missing_params)}")
@@ -160,8 +241,6 @@ def predict():
         # Get prediction
         result = predict_g_factor(data)
 
-        app.logger.debug(f"Predicted g-factor: {result['g_factor']:.2f}")
-
         # Update response with prediction
         submit["input"] = data
         submit["error"] = ""
@@ -170,16 +249,147 @@ def predict():
         return jsonify(submit)
 
     except ValueError as e:
+        metrics.error(e)
         app.logger.warning(f"Validation error: {str(e)}")
         submit["error"] = f"Validation error: {str(e)}"
         submit["input"] = data if 'data' in locals() else {}
         return jsonify(submit), 400  # Bad Request
 
     except Exception as e:
+        metrics.error(e)
         app.logger.error(f"Error during prediction: {str(e)}")
         submit["error"] = f"Prediction failed: {str(e)}"
         return jsonify(submit), 500  # Internal Server Error
 
 
+@app.route('/predict_batch', methods=['POST'])
+def predict_batch():
+    """
+    Score many geometries in one forward pass.
+
+    Expected JSON input: {"inputs": [{"pitch": ..., "fiber_radius": ..., "n_turns": ..., "helix_radius": ...}, ...]}
+    or, column order as in BASIC_PARAMETERS: {"params": [[pitch, fiber_radius, n_turns, helix_radius], ...]}
+    At most MAX_BATCH_SIZE geometries, each within PARAMETER_RANGES (10% tolerance).
+
+    Send Content-Type: application/msgpack (see AgenX_Serving/wire.py) to pass "params" as a
+    float64 array and get the g-factors back as one; the output is then an array as well.
+    """
+    submit = {
+        "input": "",
+        "output": "",
+        "success": False,
+        "error": ""
+    }
+
+    try:
+        data = wire.get_payload()
+        if isinstance(data, dict) and data.get('params') is not None:
+            if not isinstance(data['params'], (list, np.ndarray)):
+                raise ValueError("Field 'params' must be a list of rows or an array")
+            if len(data['params']) > MAX_BATCH_SIZE:
+                raise ValueError(f"At most {MAX_BATCH_SIZE} geometries per request")
+            submit["input"] = data['params']
+            submit["output"] = predict_param_array(data['params'])
+            submit["success"] = True
+            return wire.respond(submit)
+
+        inputs = data.get('inputs') if isinstance(data, dict) else None
+
+        if not inputs or not isinstance(inputs, list):
+            raise ValueError("Field 'inputs' must be a non-empty list of parameter dicts")
+        if len(inputs) > MAX_BATCH_SIZE:
+            raise ValueError(f"At most {MAX_BATCH_SIZE} geometries per request")
+
+        for i, params in enumerate(inputs):
+            if not isinstance(params, dict):
+                raise ValueError(f"Input {i} must be a dict of {', '.join(BASIC_PARAMETERS)}")
+            missing_params = [param for param in BASIC_PARAMETERS if param not in params]
+            if missing_params:
+                raise ValueError(f"Input {i} is missing required parameters: {', '.join(missing_params)}")
+
+        submit["input"] = inputs
+        submit["output"] = predict_g_factors(inputs)
+        submit["success"] = True
+        return wire.respond(submit)
+
+    except ValueError as e:
+        metrics.error(e)
+        app.logger.warning(f"Validation error: {str(e)}")
+        submit["error"] = f"Validation error: {str(e)}"
+        return wire.respond(submit, 400)  # Bad Request
+
+    except Exception as e:
+        metrics.error(e)
+        app.logger.error(f"Error during batch prediction: {str(e)}")
+        submit["error"] = f"Prediction failed: {str(e)}"
+        return wire.respond(submit, 500)  # Internal Server Error
+
+
+@app.route('/optimize', methods=['POST'])
+def optimize():
+    """
+    Inverse design: search PARAMETER_RANGES for the top-k geometries by predicted g-factor.
+
+    Expected JSON input (all fields optional):
+    {"top_k": 5, "maximize": true, "fixed": {"n_turns": 5}, "population": 64, "n_generations": 60, "seed": 0}
+    """
+    submit = {
+        "input": "",
+        "output": "",
+        "success": False,
+        "error": ""
+    }
+
+    try:
+        data = request.get_json(silent=True) or {}
+        submit["input"] = data
+
+        top_k = int(data.get('top_k', 5))
+        population = int(data.get('population', 64))
+        n_generations = int(data.get('n_generations', 60))
+        fixed = data.get('fixed') or {}
+        maximize = data.get('maximize', True)
+
+        if not isinstance(maximize, bool):
+            raise ValueError("maximize must be a JSON boolean (true or false)")
+        if not 1 <= top_k <= 50:
+            raise ValueError("top_k must be between 1 and 50")
+        if not 4 <= population <= 4096 or not 1 <= n_generations <= 1000:
+            raise ValueError("population must be in [4, 4096] and n_generations in [1, 1000]")
+        if not isinstance(fixed, dict) or any(name not in BASIC_PARAMETERS for name in fixed):
+            raise ValueError(f"fixed must map a subset of {', '.join(BASIC_PARAMETERS)} to values")
+
+        is_valid, error_msg = validate_parameters(fixed)
+        if not is_valid:
+            raise ValueError(error_msg)
+
+        result = differential_evolution(
+            lambda params: predict_params(params)[0],
+            top_k=top_k,
+            population=population,
+            n_generations=n_generations,
+            maximize=maximize,
+            fixed={name: float(value) for name, value in fixed.items()},
+            seed=data.get('seed'),
+        )
+
+        metrics.count('optimize_evaluated', result['n_evaluated'])
+        submit["output"] = result['candidates']
+        submit["success"] = True
+        return jsonify(submit)
+
+    except (ValueError, TypeError) as e:
+        metrics.error(e)
+        app.logger.warning(f"Validation error: {str(e)}")
+        submit["error"] = f"Validation error: {str(e)}"
+        return jsonify(submit), 400  # Bad Request
+
+    except Exception as e:
+        metrics.error(e)
+        app.logger.error(f"Error during optimization: {str(e)}")
+        submit["error"] = f"Optimization failed: {str(e)}"
+        return jsonify(submit), 500  # Internal Server Error
+
+
 if __name__ == '__main__':
     app.run(debug=True, host='127.0.0.1', port=12501)
\ No newline at end of file
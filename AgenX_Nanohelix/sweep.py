@@ -0,0 +1,45 @@
+import argparse
+import json
+import time
+
+from core.kernel import MLPKernel
+from core.models import KERNEL_PATH
+from core.sweep import DEFAULT_POINTS, DESIGNS, design_size, run_sweep
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep the nanohelix design space with the NumPy MLP kernel")
+    parser.add_argument("--kernel", default=KERNEL_PATH, help="Weights exported by compile.py")
+    parser.add_argument("--design", choices=DESIGNS, default="sobol")
+    parser.add_argument("--n_points", type=int, default=None,
+                        help=f"Points per axis for 'grid', total points otherwise (default: {DEFAULT_POINTS})")
+    parser.add_argument("--chunk_size", type=int, default=65536)
+    parser.add_argument("--top_k", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="sweep_results.npy", help="Memory-mapped array of all evaluated rows")
+    parser.add_argument("--summary", default="sweep_summary.json")
+    args = parser.parse_args()
+
+    try:
+        n_geometries = design_size(args.design, args.n_points)
+    except ValueError as e:
+        parser.error(str(e))
+
+    kernel = MLPKernel(args.kernel, max_batch=args.chunk_size)
+    print(f"Evaluating {n_geometries:,} geometries ({args.design} design)")
+
+    start = time.perf_counter()
+    summary = run_sweep(kernel, design=args.design, n_points=args.n_points, output_path=args.output,
+                        top_k=args.top_k, chunk_size=args.chunk_size, seed=args.seed)
+    elapsed = time.perf_counter() - start
+    summary['elapsed_s'] = elapsed
+
+    with open(args.summary, 'w') as f:
+        json.dump(summary, f, indent=2)
+
+    print(f"Done in {elapsed:.2f}s ({summary['n_evaluated'] / elapsed:,.0f} geometries/s)")
+    print(f"g-factor range: [{summary['g_factor']['min']:.4f}, {summary['g_factor']['max']:.4f}]")
+    print(f"Best g-factor: {summary['top_k'][0]['g_factor']:.4f} at "
+          + ", ".join(f"{name}={summary['top_k'][0][name]:.2f}" for name in ('pitch', 'fiber_radius', 'n_turns', 'helix_radius')))
+    print(f"Pareto front (max g, min V): {len(summary['pareto'])} designs")
+    print(f"Results saved to: {args.output}, summary saved to: {args.summary}")
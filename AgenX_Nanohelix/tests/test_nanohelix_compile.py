@@ -0,0 +1,69 @@
+"""Parity of compile.py's scaler folding and the source-hash check (run from AgenX_Nanohelix: python -m pytest tests)"""
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.neural_network import MLPRegressor
+from sklearn.preprocessing import StandardScaler
+
+from compile import check_kernel_parity, check_parity, fold_scalers, random_features
+from core.kernel import MLPKernel, export_mlp
+from core.models import PARAMETER_RANGES, check_artifact, compute_nanohelix_parameters, source_hash
+
+
+@pytest.fixture(scope="module")
+def trained():
+    """A small MLP trained on scaled nanohelix features, with its fitted scalers"""
+    geometry = pd.DataFrame({name: [r['min']] for name, r in PARAMETER_RANGES.items()})
+    feature_names = list(compute_nanohelix_parameters(geometry).columns)
+    X = random_features(feature_names, 400, seed=0)
+    y = np.random.default_rng(0).normal(0.1, 0.05, len(X))
+
+    scaler_X = StandardScaler().fit(X)
+    scaler_y = StandardScaler().fit(y.reshape(-1, 1))
+    model = MLPRegressor(hidden_layer_sizes=(16, 8), max_iter=50, random_state=0)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", ConvergenceWarning)
+        model.fit(scaler_X.transform(X), scaler_y.transform(y.reshape(-1, 1)).ravel())
+    return model, scaler_X, scaler_y, feature_names
+
+
+def test_folded_model_matches_scalers_and_model(trained):
+    model, scaler_X, scaler_y, feature_names = trained
+    fused = fold_scalers(model, scaler_X, scaler_y)
+
+    X = random_features(feature_names, 1000, seed=1)
+    assert check_parity(model, scaler_X, scaler_y, fused, X, atol=1e-9) <= 1e-9
+
+
+def test_artifact_is_refused_when_sources_change(trained, tmp_path):
+    model, scaler_X, scaler_y, _ = trained
+    sources = [tmp_path / "model.pkl", tmp_path / "scaler_X.pkl", tmp_path / "scaler_y.pkl"]
+    for obj, path in zip((model, scaler_X, scaler_y), sources):
+        joblib.dump(obj, path)
+    stored_hash = source_hash(sources)
+
+    check_artifact("fused.pkl", stored_hash, sources)
+
+    joblib.dump(StandardScaler().fit(np.arange(10.0).reshape(-1, 1)), sources[2])
+    with pytest.raises(ValueError, match="re-run compile.py"):
+        check_artifact("fused.pkl", stored_hash, sources)
+    with pytest.raises(ValueError, match="predates source hashing"):
+        check_artifact("fused.pkl", None, sources)
+
+
+def test_kernel_matches_fused_model_and_keeps_source_hash(trained, tmp_path):
+    model, scaler_X, scaler_y, feature_names = trained
+    fused = fold_scalers(model, scaler_X, scaler_y)
+    path = tmp_path / "kernel.npz"
+    export_mlp(fused, feature_names, path, source_hash="abc123")
+
+    kernel = MLPKernel(path)
+    assert kernel.source_hash == "abc123"
+    assert check_kernel_parity(kernel, fused, random_features(feature_names, 2000, seed=2), atol=1e-9) <= 1e-9
+
+    export_mlp(fused, feature_names, path)
+    assert MLPKernel(path).source_hash is None
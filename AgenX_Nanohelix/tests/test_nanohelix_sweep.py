@@ -0,0 +1,38 @@
+"""Design sizes and sweeps of core.sweep (run from AgenX_Nanohelix: python -m pytest tests)"""
+import numpy as np
+import pytest
+
+from core.sweep import DEFAULT_POINTS, MAX_DESIGN_SIZE, design_size, run_sweep
+
+
+class VolumeModel:
+    """Stand-in surrogate scoring each geometry by its volume"""
+    feature_names = ['V']
+
+    def predict(self, X):
+        return X[:, 0]
+
+
+def test_default_points_per_design():
+    assert design_size('grid') == DEFAULT_POINTS['grid'] ** 4 == 2 ** 20
+    assert design_size('sobol') == design_size('lhs') == 2 ** 20
+
+
+def test_oversized_designs_are_rejected_before_allocating(tmp_path):
+    with pytest.raises(ValueError, match="per axis"):
+        design_size('grid', 2 ** 20)
+    with pytest.raises(ValueError, match="more than"):
+        run_sweep(VolumeModel(), design='lhs', n_points=MAX_DESIGN_SIZE + 1, output_path=tmp_path / 'rows.npy')
+    assert not (tmp_path / 'rows.npy').exists()
+    with pytest.raises(ValueError, match="positive"):
+        design_size('sobol', 0)
+
+
+@pytest.mark.parametrize("design, n_points, total", [('grid', 4, 256), ('lhs', 300, 300), ('sobol', 256, 256)])
+def test_sweep_writes_every_row(tmp_path, design, n_points, total):
+    output = tmp_path / 'rows.npy'
+    summary = run_sweep(VolumeModel(), design=design, n_points=n_points, output_path=str(output), top_k=5, chunk_size=64)
+
+    rows = np.load(output, mmap_mode='r')
+    assert summary['n_evaluated'] == len(rows) == total
+    assert summary['top_k'][0]['g_factor'] == pytest.approx(rows[:, 4].max(), rel=1e-6)
@@ -0,0 +1,26 @@
+import os
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# The three predictor services: working directory (models are loaded relative to it),
+# default port and a representative request used by the load test
+SERVICES = {
+    'chembl35': {
+        'dir': os.path.join(REPO_ROOT, 'AgenX_Chembl35'),
+        'port': 12500,
+        'path': '/predict',
+        'payload': {'smiles': 'CC(=O)Oc1ccccc1C(=O)O'},
+    },
+    'nanohelix': {
+        'dir': os.path.join(REPO_ROOT, 'AgenX_Nanohelix'),
+        'port': 12501,
+        'path': '/predict',
+        'payload': {'pitch': 100.0, 'fiber_radius': 40.0, 'n_turns': 5.0, 'helix_radius': 50.0},
+    },
+    'supercon': {
+        'dir': os.path.join(REPO_ROOT, 'AgenX_Supercon'),
+        'port': 12502,
+        'path': '/predict',
+        'payload': {'element': 'Ba0.2La1.8Cu1O4-Y'},
+    },
+}
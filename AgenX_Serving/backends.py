@@ -0,0 +1,205 @@
+"""
+Predictor backends hosted by the gateway.
+
+Each backend loads its model from the service directory once and exposes the same
+two-step interface, so the gateway can batch, cache and meter all domains alike:
+
+    key = backend.parse(payload)        # validate one request, return a hashable input
+    outputs = backend.predict(keys)     # score a batch of inputs, None for invalid ones
+
+Call `backend.set_metrics(metrics)` (a Metrics or Scope) to record featurize/forward
+latency and batch sizes.
+"""
+import logging
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import torch
+
+from AgenX_Serving import SERVICES
+from AgenX_Serving.metrics import timer
+
+logger = logging.getLogger("gateway")
+
+
+class Backend:
+    name = None
+
+    def __init__(self):
+        self.dir = SERVICES[self.name]['dir']
+        self.loaded = False
+        self.metrics = None
+
+    def path(self, *parts):
+        return os.path.join(self.dir, *parts)
+
+    def set_metrics(self, metrics):
+        self.metrics = metrics
+
+    def load(self):
+        raise NotImplementedError
+
+    def parse(self, payload):
+        """Validate one request payload and return its hashable model input (raises ValueError)"""
+        raise NotImplementedError
+
+    def predict(self, keys):
+        """Predict a batch of parsed inputs, returning one float (or None if invalid) per input"""
+        raise NotImplementedError
+
+
+class ChemblBackend(Backend):
+    """MoleculeGCN pChEMBL predictor (AgenX_Chembl35)"""
+    name = 'chembl35'
+
+    def __init__(self, quantize=False):
+        super().__init__()
+        self.quantize = quantize
+        self.predictor = None
+
+    def load(self):
+        from AgenX_Chembl35.inference import MoleculePredictor
+        self.predictor = MoleculePredictor(
+            self.path('models', 'best_r2_model.pt'), quantize=self.quantize, metrics=self.metrics
+        )
+        self.loaded = True
+
+    def set_metrics(self, metrics):
+        self.metrics = metrics
+        if self.predictor is not None:
+            self.predictor.metrics = metrics
+
+    def parse(self, payload):
+        smiles = payload.get('smiles') if isinstance(payload, dict) else None
+        if not smiles or not isinstance(smiles, str):
+            raise ValueError("SMILES string is missing in request body")
+        return smiles
+
+    def predict(self, keys):
+        return self.predictor.predict_batch(list(keys))
+
+
+class NanohelixBackend(Backend):
+    """MLP g-factor predictor (AgenX_Nanohelix), preferring the NumPy kernel, then the fused MLP"""
+    name = 'nanohelix'
+
+    def __init__(self):
+        super().__init__()
+        self.model = None
+        self.scaler_X = None
+        self.scaler_y = None
+        self.feature_names = []
+
+    def load(self):
+        from AgenX_Nanohelix.core.kernel import MLPKernel
+        from AgenX_Nanohelix.core.models import MODEL_SOURCES, check_artifact
+
+        sources = [self.path(source) for source in MODEL_SOURCES]
+        kernel_path = self.path('models', 'nanohelix_mlp.npz')
+        fused_path = self.path('models', 'nanohelix_mlp_fused.pkl')
+        self.model = None
+        if os.path.exists(kernel_path):
+            kernel = MLPKernel(kernel_path)
+            try:
+                check_artifact(kernel_path, kernel.source_hash, sources)
+                self.model, self.feature_names = kernel, kernel.feature_names
+            except ValueError as e:
+                logger.warning(f"Ignoring NumPy kernel: {e}")
+        if self.model is None and os.path.exists(fused_path):
+            artifact = joblib.load(fused_path)
+            try:
+                check_artifact(fused_path, artifact.get('source_hash'), sources)
+                self.model, self.feature_names = artifact['model'], artifact['feature_names']
+            except ValueError as e:
+                logger.warning(f"Ignoring fused model: {e}")
+        if self.model is None:
+            self.model = joblib.load(self.path('models', 'nanohelix_mlp_model.pkl'))
+            self.scaler_X = joblib.load(self.path('models', 'nanohelix_scaler_X.pkl'))
+            self.scaler_y = joblib.load(self.path('models', 'nanohelix_scaler_y.pkl'))
+            self.feature_names = list(self.scaler_X.feature_names_in_)
+        self.loaded = True
+
+    def parse(self, payload):
+        from AgenX_Nanohelix.core.models import BASIC_PARAMETERS
+
+        if isinstance(payload, (list, tuple)) and len(payload) == len(BASIC_PARAMETERS):
+            payload = dict(zip(BASIC_PARAMETERS, payload))
+        if not isinstance(payload, dict):
+            raise ValueError(f"Input must be an object or a list of {', '.join(BASIC_PARAMETERS)}")
+        missing_params = [param for param in BASIC_PARAMETERS if param not in payload]
+        if missing_params:
+            raise ValueError(f"Missing required parameters: {', '.join(missing_params)}")
+        try:
+            return tuple(float(payload[param]) for param in BASIC_PARAMETERS)
+        except (TypeError, ValueError):
+            raise ValueError(f"Parameters {', '.join(BASIC_PARAMETERS)} must be numbers")
+
+    def predict(self, keys):
+        from AgenX_Nanohelix.core.models import compute_nanohelix_features
+
+        if self.metrics is not None:
+            self.metrics.observe('batch_size', len(keys))
+        with timer(self.metrics, 'featurize'):
+            X = compute_nanohelix_features(np.array(keys, dtype=np.float64), self.feature_names)
+            if self.scaler_X is not None:
+                X = self.scaler_X.transform(pd.DataFrame(X, columns=self.feature_names))
+
+        with timer(self.metrics, 'forward'):
+            if self.scaler_X is None:
+                return np.atleast_1d(self.model.predict(X)).tolist()
+            return self.scaler_y.inverse_transform(self.model.predict(X).reshape(-1, 1)).ravel().tolist()
+
+
+class SuperconBackend(Backend):
+    """TcPredictor critical-temperature predictor (AgenX_Supercon)"""
+    name = 'supercon'
+
+    def __init__(self, quantize=False):
+        super().__init__()
+        self.quantize = quantize
+        self.model = None
+        self.processor = None
+        self.fused = False
+
+    def load(self):
+        from AgenX_Supercon.src.data_processor import SuperconDataProcessor
+        from AgenX_Supercon.src.model import TcPredictor, load_fused_state_dict, quantize_model
+
+        processor_path = self.path('models', 'supercon_processor.pkl')
+        self.processor = SuperconDataProcessor(processor_path=processor_path)
+        self.processor.load_processor()
+
+        model_path = self.path('models', 'best_supercon_model.pth')
+        fused_path = self.path('models', 'best_supercon_model_fused.pth')
+        state_dict = None
+        if os.path.exists(fused_path):
+            try:
+                state_dict = load_fused_state_dict(fused_path, [model_path, processor_path])
+            except ValueError as e:
+                logger.warning(f"Ignoring fused model: {e}")
+        self.fused = state_dict is not None
+        model = TcPredictor(input_size=self.processor.n_features)
+        model.load_state_dict(state_dict if self.fused else torch.load(model_path, map_location='cpu'))
+        model.eval()
+        self.model = quantize_model(model) if self.quantize else model
+        self.loaded = True
+
+    def parse(self, payload):
+        if not isinstance(payload, dict) or 'element' not in payload:
+            raise ValueError("Missing required field: 'element' (chemical formula)")
+        str3 = payload.get('str3')
+        return str(payload['element']), None if str3 is None else str(str3)
+
+    def predict(self, keys):
+        if self.metrics is not None:
+            self.metrics.observe('batch_size', len(keys))
+        with timer(self.metrics, 'featurize'):
+            input_df = pd.DataFrame({'element': [k[0] for k in keys], 'str3': [k[1] for k in keys]})
+            features = torch.FloatTensor(self.processor.process_input(input_df, scale=not self.fused))
+        with timer(self.metrics, 'forward'), torch.no_grad():
+            return self.model(features).view(-1).tolist()
+
+
+BACKENDS = {backend.name: backend for backend in (ChemblBackend, NanohelixBackend, SuperconBackend)}
@@ -0,0 +1,322 @@
+"""
+Unified predictor gateway hosting the ChEMBL35, nanohelix and Supercon backends in one process.
+
+Routes (same {"input", "output", "success", "error"} schema as the individual services):
+    POST /<domain>/predict          one input, e.g. /nanohelix/predict
+    POST /<domain>/predict_batch    {"inputs": [...]}, JSON or msgpack (Content-Type: application/msgpack)
+    POST /predict, /predict_batch   domain taken from a "domain" field, or from the port the
+                                    request arrived on when the gateway also listens on the
+                                    legacy ports 12500-12502 (compatibility aliases)
+    GET  /health
+    GET  /metrics                   per-domain request counts, featurize/forward/batch latency
+                                    percentiles, batch sizes, cache hit ratios and errors
+    any  /<domain>/<endpoint>       domain-specific endpoints (/optimize, /analogs, /neighbors,
+                                    /variants), also as /<endpoint> on a legacy port, and
+                                    predictions with "uncertainty": forwarded to the domain's
+                                    own service when GATEWAY_UPSTREAM_<DOMAIN> is set, else 404/400
+
+All backends share one micro-batching scheduler, one result cache and one thread budget.
+To take over the legacy ports without breaking any tool, run the individual services on
+other ports and point the gateway at them, e.g.
+
+    cd AgenX_Nanohelix && PYTHONPATH=.. gunicorn -c ../AgenX_Serving/gunicorn_conf.py -b 127.0.0.1:13501 launch:app
+    GATEWAY_UPSTREAM_NANOHELIX=http://127.0.0.1:13501 PYTHONPATH=. python -m AgenX_Serving.gateway --aliases
+
+Development server (also binds the legacy ports with --aliases):
+    PYTHONPATH=. python -m AgenX_Serving.gateway --aliases
+
+Production:
+    GATEWAY_DOMAINS=chembl35,nanohelix,supercon gunicorn -c AgenX_Serving/gunicorn_conf.py \
+        -b 127.0.0.1:12510 -b 127.0.0.1:12500 -b 127.0.0.1:12501 -b 127.0.0.1:12502 AgenX_Serving.gateway:app
+
+Environment variables:
+    GATEWAY_DOMAINS          comma-separated backends to load (default: all)
+    GATEWAY_MAX_BATCH        largest model batch (default: 64)
+    GATEWAY_MAX_WAIT_MS      how long a batch waits to fill up (default: 2)
+    GATEWAY_THREADS          concurrent model batches (default: number of cores)
+    GATEWAY_INTRA_THREADS    torch/BLAS threads per batch (default: 1); the compute budget is
+                             GATEWAY_THREADS x GATEWAY_INTRA_THREADS
+    GATEWAY_CACHE_SIZE       cached predictions, 0 to disable (default: 100000)
+    GATEWAY_TIMEOUT_S        longest wait for a prediction before answering 504 (default: 30)
+    GATEWAY_REPLICAS         run each backend's batches in N forked model replicas (ReplicaPool)
+                             with GATEWAY_INTRA_THREADS threads each, 0 to predict in-process
+                             (default: 0); with gunicorn, every worker forks its own replicas
+    GATEWAY_UPSTREAM_<DOMAIN>  base URL of the domain's own service for forwarded requests
+    CHEMBL35_QUANTIZE, SUPERCON_QUANTIZE   as for the individual services
+"""
+import argparse
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+import requests
+from flask import Flask, Response, request, jsonify
+from werkzeug.serving import make_server
+
+from AgenX_Serving import SERVICES, wire
+from AgenX_Serving.backends import BACKENDS
+from AgenX_Serving.metrics import Metrics, Scope
+from AgenX_Serving.replicas import ReplicaPool
+from AgenX_Serving.scheduler import BatchScheduler, ResultCache
+
+GATEWAY_PORT = 12510
+MAX_BATCH_INPUTS = 10000
+PORT_DOMAINS = {str(service['port']): name for name, service in SERVICES.items()}
+
+logger = logging.getLogger("gateway")
+
+
+def _flag(name):
+    return os.getenv(name, "0").lower() in ("1", "true", "yes")
+
+
+class Gateway:
+    """Loads the backends and answers predictions through the shared cache and scheduler"""
+
+    def __init__(self, domains=None, max_batch=64, max_wait_ms=2.0, n_threads=None, intra_threads=1,
+                 cache_size=100000, timeout_s=30.0, upstreams=None, replicas=0):
+        self.metrics = Metrics()
+        self.timeout_s = timeout_s
+        # Base URL of each domain's own service, for the requests the gateway does not serve
+        self.upstreams = {domain: url.rstrip('/') for domain, url in (upstreams or {}).items()}
+        self.backends = {}
+        for name in domains or BACKENDS:
+            kwargs = {'quantize': _flag(f"{name.upper()}_QUANTIZE")} if name in ('chembl35', 'supercon') else {}
+            backend = BACKENDS[name](**kwargs)
+            backend.set_metrics(Scope(self.metrics, name))
+            try:
+                backend.load()
+                logger.info(f"Loaded backend '{name}'")
+            except Exception as e:
+                logger.error(f"Failed to load backend '{name}': {e}")
+            self.backends[name] = backend
+
+        # Replicas fork on the first batch, so each serving process gets its own; they run without
+        # the featurize/forward timers, the scheduler still records the batch latency
+        self.pools = {
+            name: ReplicaPool(backend, n_replicas=replicas, intra_threads=intra_threads, timeout_s=timeout_s)
+            for name, backend in self.backends.items() if backend.loaded and replicas > 0
+        }
+
+        self.cache = ResultCache(cache_size)
+        self.scheduler = BatchScheduler(
+            {name: self.pools.get(name, b) for name, b in self.backends.items() if b.loaded},
+            max_batch=max_batch, max_wait_ms=max_wait_ms, n_threads=n_threads, intra_threads=intra_threads,
+            on_batch=self._record_batch
+        )
+
+    def _record_batch(self, domain, batch_size, seconds):
+        self.metrics.observe(f'batch.{domain}', seconds * 1e3)
+
+    def backend(self, domain):
+        if domain not in self.backends:
+            raise ValueError(f"Unknown domain '{domain}', expected one of {', '.join(self.backends)}")
+        backend = self.backends[domain]
+        if not backend.loaded:
+            raise RuntimeError(f"Model for '{domain}' not loaded. Please check server logs.")
+        return backend
+
+    def predict(self, domain, payloads):
+        """Parse, look up in the cache, and schedule the misses; returns one output per payload"""
+        backend = self.backend(domain)
+        keys = [backend.parse(payload) for payload in payloads]
+        self.metrics.count(f'inputs.{domain}', len(keys))
+
+        outputs, pending = [None] * len(keys), {}
+        for i, key in enumerate(keys):
+            hit, value = self.cache.get((domain, key))
+            if hit:
+                outputs[i] = value
+            else:
+                pending.setdefault(key, []).append(i)
+        n_missed = sum(len(indices) for indices in pending.values())
+        self.metrics.cache(f'result.{domain}', hits=len(keys) - n_missed, misses=n_missed)
+
+        if pending:
+            futures = self.scheduler.submit(domain, list(pending))
+            deadline = time.monotonic() + self.timeout_s
+            for (key, indices), future in zip(pending.items(), futures):
+                try:
+                    value = future.result(timeout=max(deadline - time.monotonic(), 0))
+                except TimeoutError:
+                    raise TimeoutError(f"No prediction from '{domain}' within {self.timeout_s:g} s")
+                if value is not None:
+                    self.cache.put((domain, key), value)
+                for i in indices:
+                    outputs[i] = value
+        return outputs
+
+    def forward(self, domain, path):
+        """Relay the current request to the domain's own service under `path` (requests.RequestException on failure)"""
+        response = requests.request(
+            request.method, self.upstreams[domain] + path, params=request.args, data=request.get_data(),
+            headers={'Content-Type': request.content_type} if request.content_type else None,
+            timeout=self.timeout_s,
+        )
+        self.metrics.count(f'forwarded.{domain}')
+        return Response(response.content, status=response.status_code, content_type=response.headers.get('Content-Type'))
+
+
+def resolve_domain(domain, data):
+    """Domain from the URL, else from the 'domain' field, else from the legacy port the request came in on"""
+    if domain:
+        return domain
+    if isinstance(data, dict) and data.get('domain'):
+        return data['domain']
+    port = request.environ.get('SERVER_PORT')
+    if port in PORT_DOMAINS:
+        return PORT_DOMAINS[port]
+    raise ValueError("Missing 'domain' (one of chembl35, nanohelix, supercon)")
+
+
+def create_app(gateway):
+    app = Flask(__name__)
+    gateway.metrics.instrument(app)
+
+    def error(submit, message, status):
+        submit["error"] = message
+        return wire.respond(submit, status)
+
+    def relay(submit, domain, path, reason, status):
+        """Forward to the domain's own service, or answer `reason` with `status` if it has none"""
+        if domain not in gateway.upstreams:
+            return error(submit, f"{reason}; set GATEWAY_UPSTREAM_{domain.upper()} to forward it to the {domain} service", status)
+        try:
+            return gateway.forward(domain, path)
+        except requests.RequestException as e:
+            gateway.metrics.error(e)
+            return error(submit, f"The {domain} service at {gateway.upstreams[domain]} is unavailable: {str(e)}", 502)
+
+    @app.route('/predict', methods=['POST'])
+    @app.route('/<domain>/predict', methods=['POST'])
+    def predict(domain=None):
+        submit = {"input": "", "output": "", "success": False, "error": ""}
+        try:
+            data = request.get_json(silent=True)
+            if not data:
+                return error(submit, "Input data is missing in request body", 400)
+            submit["input"] = data
+            if not isinstance(data, dict):
+                return error(submit, "Request body must be a JSON object", 400)
+            domain = resolve_domain(domain, data)
+            if data.get('uncertainty'):
+                return relay(submit, domain, '/predict', "uncertainty is not served by the gateway", 400)
+            payload = {k: v for k, v in data.items() if k != 'domain'}
+
+            output = gateway.predict(domain, [payload])[0]
+            if output is None:
+                gateway.metrics.count(f'invalid.{domain}')
+                return error(submit, "Invalid input or prediction failed", 400)
+
+            submit["output"] = output
+            submit["success"] = True
+            return wire.respond(submit)
+
+        except ValueError as e:
+            gateway.metrics.error(e)
+            return error(submit, f"Validation error: {str(e)}", 400)
+        except TimeoutError as e:
+            gateway.metrics.error(e)
+            return error(submit, str(e), 504)
+        except Exception as e:
+            gateway.metrics.error(e)
+            logger.error(f"Error during prediction: {str(e)}")
+            return error(submit, f"Prediction failed: {str(e)}", 500)
+
+    @app.route('/predict_batch', methods=['POST'])
+    @app.route('/<domain>/predict_batch', methods=['POST'])
+    def predict_batch(domain=None):
+        submit = {"input": "", "output": "", "success": False, "error": ""}
+        try:
+            data = wire.get_payload(silent=True)
+            inputs = data.get('inputs') if isinstance(data, dict) else None
+            if isinstance(inputs, np.ndarray):
+                # msgpack clients may send nanohelix geometries as one (n, 4) array
+                inputs = inputs.tolist()
+            if not inputs or not isinstance(inputs, list):
+                return error(submit, "Field 'inputs' must be a non-empty list", 400)
+            if len(inputs) > MAX_BATCH_INPUTS:
+                return error(submit, f"At most {MAX_BATCH_INPUTS} inputs per request", 400)
+            domain = resolve_domain(domain, data)
+            if data.get('uncertainty'):
+                return relay(submit, domain, '/predict_batch', "uncertainty is not served by the gateway", 400)
+
+            submit["input"] = inputs
+            submit["output"] = gateway.predict(domain, inputs)
+            submit["success"] = True
+            return wire.respond(submit)
+
+        except ValueError as e:
+            gateway.metrics.error(e)
+            return error(submit, f"Validation error: {str(e)}", 400)
+        except TimeoutError as e:
+            gateway.metrics.error(e)
+            return error(submit, str(e), 504)
+        except Exception as e:
+            gateway.metrics.error(e)
+            logger.error(f"Error during batch prediction: {str(e)}")
+            return error(submit, f"Prediction failed: {str(e)}", 500)
+
+    @app.route('/<path:path>', methods=['GET', 'POST'])
+    def domain_endpoint(path):
+        """/<domain>/<endpoint>, or /<endpoint> on a legacy port: the individual services' other endpoints"""
+        submit = {"input": "", "output": "", "success": False, "error": ""}
+        domain, _, endpoint = path.partition('/')
+        if domain not in gateway.backends or not endpoint:
+            domain, endpoint = PORT_DOMAINS.get(request.environ.get('SERVER_PORT')), path
+        if domain is None:
+            return error(submit, f"Unknown endpoint '/{path}'", 404)
+        return relay(submit, domain, f"/{endpoint}", f"'/{endpoint}' is not served by the gateway", 404)
+
+    @app.route('/health', methods=['GET'])
+    def health_check():
+        return jsonify({
+            "status": "healthy",
+            "backends": {name: backend.loaded for name, backend in gateway.backends.items()},
+            "cache_size": len(gateway.cache),
+            "success": True
+        }), 200
+
+    return app
+
+
+def gateway_from_env():
+    domains = os.getenv("GATEWAY_DOMAINS")
+    return Gateway(
+        domains=domains.split(',') if domains else None,
+        max_batch=int(os.getenv("GATEWAY_MAX_BATCH", "64")),
+        max_wait_ms=float(os.getenv("GATEWAY_MAX_WAIT_MS", "2")),
+        n_threads=int(os.getenv("GATEWAY_THREADS", "0")) or None,
+        intra_threads=int(os.getenv("GATEWAY_INTRA_THREADS", "1")),
+        cache_size=int(os.getenv("GATEWAY_CACHE_SIZE", "100000")),
+        timeout_s=float(os.getenv("GATEWAY_TIMEOUT_S", "30")),
+        replicas=int(os.getenv("GATEWAY_REPLICAS", "0")),
+        upstreams={
+            name: os.environ[f"GATEWAY_UPSTREAM_{name.upper()}"]
+            for name in BACKENDS if os.getenv(f"GATEWAY_UPSTREAM_{name.upper()}")
+        },
+    )
+
+
+logging.basicConfig(level=logging.INFO)
+gateway = gateway_from_env()
+app = create_app(gateway)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Unified predictor gateway (development server)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=GATEWAY_PORT)
+    parser.add_argument("--aliases", action="store_true", help="Also listen on the legacy ports 12500-12502")
+    args = parser.parse_args()
+
+    if args.aliases:
+        for port in PORT_DOMAINS:
+            server = make_server(args.host, int(port), app, threaded=True)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            logger.info(f"Compatibility alias for '{PORT_DOMAINS[port]}' on {args.host}:{port}")
+
+    logger.info(f"Starting gateway on {args.host}:{args.port}")
+    make_server(args.host, args.port, app, threaded=True).serve_forever()
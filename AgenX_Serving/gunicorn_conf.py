@@ -0,0 +1,57 @@
+"""
+Production gunicorn settings shared by the three predictor services.
+
+Run from the service directory so relative model paths resolve, e.g.
+
+    cd AgenX_Nanohelix
+    PYTHONPATH=.. gunicorn -c ../AgenX_Serving/gunicorn_conf.py -b 127.0.0.1:12501 launch:app
+
+The app module (and with it the model) is imported once in the master and the workers
+are forked from it, so model weights are shared copy-on-write instead of loaded per worker.
+
+Environment variables:
+    PREDICTOR_WORKERS        worker processes (default: number of cores)
+    PREDICTOR_THREADS        request threads per worker (default: 1)
+    PREDICTOR_TORCH_THREADS  torch / BLAS threads per worker (default: cores // workers)
+"""
+import gc
+import os
+
+cpu_count = os.cpu_count() or 1
+
+workers = int(os.getenv("PREDICTOR_WORKERS", cpu_count))
+threads = int(os.getenv("PREDICTOR_THREADS", "1"))
+worker_class = "gthread" if threads > 1 else "sync"
+torch_threads = int(os.getenv("PREDICTOR_TORCH_THREADS", max(1, cpu_count // workers)))
+
+preload_app = True
+timeout = 120
+graceful_timeout = 30
+keepalive = 5
+accesslog = None
+loglevel = "info"
+
+
+def pre_fork(server, worker):
+    # Move everything allocated while loading the model out of the collector's reach,
+    # so GC passes in the workers do not touch (and thereby copy) the shared pages
+    gc.collect()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # Split the cores between workers instead of letting every worker spawn one
+    # intra-op thread per core
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(limits=torch_threads)
+    except ImportError:
+        pass
+
+    server.log.info(f"Worker {worker.pid}: {threads} request thread(s), {torch_threads} compute thread(s)")
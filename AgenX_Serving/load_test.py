@@ -0,0 +1,121 @@
+"""
+Closed-loop load test for the predictor services.
+
+Starts the service under gunicorn with each requested worker count, drives it with
+concurrent client processes for a fixed duration and reports throughput and latency,
+so throughput scaling with cores can be checked on the local machine:
+
+    python -m AgenX_Serving.load_test --service nanohelix --workers 1 2 4 8
+
+Use --url to load-test an already running server instead.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import requests
+
+from AgenX_Serving import REPO_ROOT, SERVICES
+
+GUNICORN_CONF = os.path.join(REPO_ROOT, 'AgenX_Serving', 'gunicorn_conf.py')
+
+
+def _client(url, payload, duration):
+    """One client: send requests back to back until the deadline, return latencies and error count"""
+    session = requests.Session()
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            ok = session.post(url, json=payload, timeout=30).status_code == 200
+        except requests.exceptions.RequestException:
+            ok = False
+        if ok:
+            latencies.append(time.perf_counter() - start)
+        else:
+            errors += 1
+    return latencies, errors
+
+
+def run_load(url, payload, concurrency, duration):
+    with ProcessPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(_client, [url] * concurrency, [payload] * concurrency, [duration] * concurrency))
+
+    latencies = np.array([lat for r in results for lat in r[0]]) * 1e3
+    errors = sum(r[1] for r in results)
+    report = {'requests': int(len(latencies)), 'errors': int(errors), 'throughput_rps': len(latencies) / duration}
+    if len(latencies):
+        report.update({f'p{q}_ms': float(np.percentile(latencies, q)) for q in (50, 95, 99)})
+    return report
+
+
+def wait_until_ready(url, payload, timeout=180):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.post(url, json=payload, timeout=5).status_code == 200:
+                return
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"Service at {url} did not become ready within {timeout}s")
+
+
+def start_server(service, port, workers, threads, torch_threads):
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT, PREDICTOR_WORKERS=str(workers), PREDICTOR_THREADS=str(threads))
+    if torch_threads:
+        env['PREDICTOR_TORCH_THREADS'] = str(torch_threads)
+    return subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', GUNICORN_CONF, '-b', f'127.0.0.1:{port}', 'launch:app'],
+        cwd=service['dir'], env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test a predictor service across gunicorn worker counts")
+    parser.add_argument("--service", choices=sorted(SERVICES), default="nanohelix")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--threads", type=int, default=1, help="Request threads per worker")
+    parser.add_argument("--torch_threads", type=int, default=None, help="Compute threads per worker (default: cores // workers)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent client processes")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load per configuration")
+    parser.add_argument("--port", type=int, default=None, help="Port for the spawned server (default: service port + 100)")
+    parser.add_argument("--url", default=None, help="Test this running server instead of spawning gunicorn")
+    parser.add_argument("--output", default=None, help="Optional path to save the results as JSON")
+    args = parser.parse_args()
+
+    service = SERVICES[args.service]
+    results = []
+
+    if args.url:
+        report = run_load(args.url, service['payload'], args.concurrency, args.duration)
+        results.append({'url': args.url, **report})
+    else:
+        port = args.port or service['port'] + 100
+        url = f"http://127.0.0.1:{port}{service['path']}"
+        for workers in args.workers:
+            server = start_server(service, port, workers, args.threads, args.torch_threads)
+            try:
+                wait_until_ready(url, service['payload'])
+                report = run_load(url, service['payload'], args.concurrency, args.duration)
+            finally:
+                server.terminate()
+                server.wait()
+            results.append({'workers': workers, 'threads': args.threads, **report})
+            print(f"workers={workers:<3} {report['throughput_rps']:>9.1f} req/s  "
+                  f"p50={report.get('p50_ms', float('nan')):.2f}ms  p99={report.get('p99_ms', float('nan')):.2f}ms  "
+                  f"errors={report['errors']}")
+
+    print(f"\n--- {args.service} load test ({os.cpu_count()} cores, {args.concurrency} clients) ---")
+    for result in results:
+        print(result)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4)
@@ -0,0 +1,195 @@
+"""
+Low-overhead operational metrics for the predictor services and the gateway.
+
+Counters and log-bucketed histograms are updated in place under one lock, so recording
+a value costs about a microsecond and nothing is formatted or logged on the request path.
+Percentiles are only computed when /metrics is read.
+
+    metrics = Metrics()
+    metrics.instrument(app)                 # request counts, status codes, latency, GET /metrics
+
+    with metrics.timer('featurize'):        # stage latency in ms
+        X = featurize(inputs)
+    metrics.observe('batch_size', len(X))
+    metrics.cache('surface', hits=n_inside, misses=n_outside)
+    metrics.error(exc)                      # error counts by exception type (status codes are counted apart)
+    Scope(metrics, 'chembl35').observe('batch_size', 8)   # recorded as batch_size.chembl35
+
+Under gunicorn every worker keeps its own metrics; the snapshot carries the worker pid.
+"""
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+from flask import g, jsonify, request
+
+PERCENTILES = (50, 95, 99)
+
+
+class Histogram:
+    """
+    Fixed log-spaced buckets covering [low, high): each bucket is `growth` times wider
+    than the previous one, so percentiles are accurate to about (growth - 1) / 2
+    """
+
+    def __init__(self, low=1e-3, high=1e6, growth=1.1):
+        self.low = low
+        self.scale = 1.0 / math.log(growth)
+        self.growth = growth
+        self.buckets = [0] * (int(math.log(high / low) * self.scale) + 2)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def observe(self, value):
+        index = int(math.log(value / self.low) * self.scale) + 1 if value > self.low else 0
+        self.buckets[min(index, len(self.buckets) - 1)] += 1
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q):
+        rank = q / 100.0 * self.count
+        seen = 0
+        for index, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank and n:
+                # Geometric middle of the bucket, clipped to the observed range
+                value = self.low * self.growth ** (index - 0.5) if index else self.low
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def summary(self):
+        if not self.count:
+            return {'count': 0}
+        return {
+            'count': self.count,
+            'mean': self.total / self.count,
+            **{f'p{q}': self.percentile(q) for q in PERCENTILES},
+            'min': self.min,
+            'max': self.max,
+        }
+
+
+class Metrics:
+    """Thread-safe registry of counters, histograms, cache and error counts"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.counters = {}
+        self.histograms = {}
+        self.caches = {}
+        self.errors = {}
+        self.status_codes = {}
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name, value):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name):
+        """Record the wall time of the block in milliseconds under `name`"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - start) * 1e3)
+
+    def cache(self, name, hits=0, misses=0):
+        with self._lock:
+            stats = self.caches.setdefault(name, [0, 0])
+            stats[0] += hits
+            stats[1] += misses
+
+    def error(self, error):
+        """Count an error by exception type (or by the given name)"""
+        name = error if isinstance(error, str) else type(error).__name__
+        with self._lock:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    def status(self, code):
+        """Count a response status code; kept apart from errors, which are counted by their handlers"""
+        with self._lock:
+            self.status_codes[code] = self.status_codes.get(code, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            histograms = {name: h.summary() for name, h in self.histograms.items()}
+            return {
+                'pid': os.getpid(),
+                'uptime_s': time.time() - self.started,
+                'counters': dict(self.counters),
+                'latency_ms': {name: s for name, s in histograms.items() if not name.startswith('batch_size')},
+                'batch_size': {name: s for name, s in histograms.items() if name.startswith('batch_size')},
+                'cache': {
+                    name: {'hits': hits, 'misses': misses, 'hit_ratio': hits / (hits + misses) if hits + misses else 0.0}
+                    for name, (hits, misses) in self.caches.items()
+                },
+                'errors': dict(self.errors),
+                'status_codes': {str(code): n for code, n in sorted(self.status_codes.items())},
+            }
+
+    def instrument(self, app):
+        """Count requests and status codes, time every endpoint and serve GET /metrics on a Flask app"""
+
+        @app.before_request
+        def _start_timer():
+            g.metrics_start = time.perf_counter()
+
+        @app.after_request
+        def _record_request(response):
+            start = g.pop('metrics_start', None)
+            endpoint = request.endpoint or 'unknown'
+            if start is not None and endpoint != 'metrics':
+                self.observe(f'request.{endpoint}', (time.perf_counter() - start) * 1e3)
+                self.count(f'requests.{endpoint}')
+                self.status(response.status_code)
+            return response
+
+        @app.route('/metrics', methods=['GET'])
+        def metrics():
+            return jsonify({**self.snapshot(), 'success': True}), 200
+
+        return app
+
+
+class Scope:
+    """View of a Metrics registry that appends `.suffix` to every name, e.g. one per gateway domain"""
+
+    def __init__(self, metrics, suffix):
+        self.metrics = metrics
+        self.suffix = suffix
+
+    def count(self, name, n=1):
+        self.metrics.count(f'{name}.{self.suffix}', n)
+
+    def observe(self, name, value):
+        self.metrics.observe(f'{name}.{self.suffix}', value)
+
+    def timer(self, name):
+        return self.metrics.timer(f'{name}.{self.suffix}')
+
+    def cache(self, name, hits=0, misses=0):
+        self.metrics.cache(f'{name}.{self.suffix}', hits, misses)
+
+    def error(self, error):
+        self.metrics.error(error)
+
+
+def timer(metrics, name):
+    """metrics.timer(name), or a no-op context when metrics is None"""
+    return nullcontext() if metrics is None else metrics.timer(name)
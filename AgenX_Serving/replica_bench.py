@@ -0,0 +1,96 @@
+"""
+Find the best replicas x intra-op threads configuration for a backend on this machine.
+
+Every configuration gets a fresh ReplicaPool, driven by concurrent client threads that
+submit fixed-size batches back to back for a fixed duration:
+
+    python -m AgenX_Serving.replica_bench --service chembl35 --replicas 1 2 4 8 --threads 1 2 4 --batch 32
+
+Configurations needing more cores than are available are skipped unless --oversubscribe
+is given (they then run unpinned).
+"""
+import argparse
+import json
+import threading
+import time
+
+import numpy as np
+
+from AgenX_Serving import SERVICES
+from AgenX_Serving.backends import BACKENDS
+from AgenX_Serving.replicas import ReplicaPool, available_cores
+
+
+def run_config(backend, keys, n_replicas, intra_threads, inter_threads, concurrency, duration):
+    with ReplicaPool(backend, n_replicas=n_replicas, intra_threads=intra_threads, inter_threads=inter_threads) as pool:
+        pool.predict(keys)  # Warm up every replica's first batch out of the measurement
+        for _ in range(n_replicas):
+            pool.predict(keys)
+
+        latencies = [[] for _ in range(concurrency)]
+        deadline = time.perf_counter() + duration
+
+        def client(out):
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                pool.predict(keys)
+                out.append(time.perf_counter() - start)
+
+        threads = [threading.Thread(target=client, args=(out,)) for out in latencies]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        pinned = pool.core_sets is not None
+
+    latencies = np.array([lat for out in latencies for lat in out]) * 1e3
+    return {
+        'replicas': n_replicas,
+        'intra_threads': intra_threads,
+        'inter_threads': inter_threads,
+        'pinned': pinned,
+        'batches': int(len(latencies)),
+        'throughput_per_s': len(latencies) * len(keys) / duration,
+        **{f'p{q}_ms': float(np.percentile(latencies, q)) for q in (50, 99)},
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark replica x thread configurations of a predictor backend")
+    parser.add_argument("--service", choices=sorted(SERVICES), default="chembl35")
+    parser.add_argument("--replicas", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4], help="Intra-op threads per replica")
+    parser.add_argument("--inter_threads", type=int, default=1, help="Inter-op threads per replica")
+    parser.add_argument("--batch", type=int, default=32, help="Inputs per batch")
+    parser.add_argument("--concurrency", type=int, default=None, help="Client threads (default: 2 x replicas)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per configuration")
+    parser.add_argument("--oversubscribe", action="store_true", help="Also run configurations needing more cores than available")
+    parser.add_argument("--output", default=None, help="Optional path to save the results as JSON")
+    args = parser.parse_args()
+
+    backend = BACKENDS[args.service]()
+    backend.load()
+    keys = [backend.parse(SERVICES[args.service]['payload'])] * args.batch
+    n_cores = len(available_cores())
+
+    results = []
+    for n_replicas in args.replicas:
+        for intra_threads in args.threads:
+            if n_replicas * intra_threads > n_cores and not args.oversubscribe:
+                print(f"replicas={n_replicas} threads={intra_threads}: skipped, needs more than {n_cores} cores")
+                continue
+            report = run_config(backend, keys, n_replicas, intra_threads, args.inter_threads,
+                                args.concurrency or 2 * n_replicas, args.duration)
+            results.append(report)
+            print(f"replicas={n_replicas:<3} threads={intra_threads:<3} {report['throughput_per_s']:>10.1f} inputs/s  "
+                  f"p50={report['p50_ms']:.2f}ms  p99={report['p99_ms']:.2f}ms  pinned={report['pinned']}")
+
+    if results:
+        best = max(results, key=lambda r: r['throughput_per_s'])
+        print(f"\n--- {args.service}, {n_cores} cores, batch {args.batch} ---")
+        print(f"Best: {best['replicas']} replica(s) x {best['intra_threads']} intra-op thread(s), "
+              f"{best['throughput_per_s']:.1f} inputs/s")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4)
@@ -0,0 +1,203 @@
+"""
+Process-based replica pool for CPU inference.
+
+The backend's model is loaded once in the parent, then N replica processes are forked
+from it, so the read-only weights are shared copy-on-write. Each replica is pinned to
+its own set of cores (os.sched_setaffinity) and runs torch with a fixed intra-op /
+inter-op thread split. Requests go through one shared queue, so an idle replica always
+picks up the next batch:
+
+    backend = BACKENDS['chembl35']()
+    backend.load()
+    with ReplicaPool(backend, n_replicas=4, intra_threads=2) as pool:
+        outputs = pool.predict([backend.parse({'smiles': 'CCO'})])
+
+A pool exposes the backend's parse/predict interface, so it can stand in for the backend
+in BatchScheduler (the gateway does this with GATEWAY_REPLICAS). Replicas are forked on the
+first request in the serving process. If a replica dies (OOM, segfault, terminate), the pool
+is broken like a concurrent.futures ProcessPoolExecutor: every pending and later request
+fails with BrokenProcessPool instead of waiting forever. `python -m AgenX_Serving.replica_bench`
+finds the fastest replicas x threads configuration on the local machine.
+"""
+import itertools
+import multiprocessing as mp
+import multiprocessing.connection
+import os
+import threading
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+
+def available_cores():
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def plan_cores(n_replicas, threads_per_replica, cores=None):
+    """
+    Disjoint core sets of threads_per_replica cores for each replica, or None when
+    the machine has too few cores to pin without overlap
+    """
+    cores = available_cores() if cores is None else list(cores)
+    if n_replicas * threads_per_replica > len(cores):
+        return None
+    return [set(cores[i * threads_per_replica:(i + 1) * threads_per_replica]) for i in range(n_replicas)]
+
+
+def set_torch_threads(intra_threads, inter_threads):
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(intra_threads)
+    try:
+        torch.set_num_interop_threads(inter_threads)
+    except RuntimeError:
+        # Only possible before the first inter-op parallel call in this process
+        pass
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(limits=intra_threads)
+    except ImportError:
+        pass
+
+
+def _replica_main(backend, cores, intra_threads, inter_threads, requests, results):
+    # Metrics live in the parent (and their locks may have been held at fork time)
+    backend.set_metrics(None)
+    if cores and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cores)
+    set_torch_threads(intra_threads, inter_threads)
+
+    while True:
+        item = requests.get()
+        if item is None:
+            return
+        request_id, keys = item
+        try:
+            results.put((request_id, True, backend.predict(keys)))
+        except Exception as e:
+            results.put((request_id, False, f"{type(e).__name__}: {e}"))
+
+
+class ReplicaPool:
+    """N forked replicas of a loaded backend, pinned to disjoint cores and fed from one queue"""
+
+    def __init__(self, backend, n_replicas=None, intra_threads=1, inter_threads=1, pin=True, timeout_s=60.0):
+        if not backend.loaded:
+            raise RuntimeError(f"Backend '{backend.name}' must be loaded before forking replicas")
+
+        self.backend = backend
+        self.name = backend.name
+        self.n_replicas = n_replicas or max(1, len(available_cores()) // intra_threads)
+        self.intra_threads = intra_threads
+        self.inter_threads = inter_threads
+        self.timeout_s = timeout_s
+        self.core_sets = plan_cores(self.n_replicas, intra_threads) if pin else None
+
+        self._pid = None
+        self._processes = []
+        self._start_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._broken = None
+        self._closing = False
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            context = mp.get_context('fork')
+            self._requests = context.Queue()
+            self._results = context.Queue()
+            self._processes = [
+                context.Process(
+                    target=_replica_main, daemon=True, name=f'{self.name}-replica-{i}',
+                    args=(self.backend, self.core_sets[i] if self.core_sets else None,
+                          self.intra_threads, self.inter_threads, self._requests, self._results),
+                )
+                for i in range(self.n_replicas)
+            ]
+            for process in self._processes:
+                process.start()
+
+            self._pending = {}
+            self._ids = itertools.count()
+            self._collector = threading.Thread(target=self._collect, daemon=True, name=f'{self.name}-results')
+            self._collector.start()
+            threading.Thread(target=self._watch, daemon=True, name=f'{self.name}-watch').start()
+            self._pid = os.getpid()
+
+    @property
+    def loaded(self):
+        return True
+
+    def parse(self, payload):
+        return self.backend.parse(payload)
+
+    def submit(self, keys):
+        """Queue one batch of parsed inputs and return a Future of its outputs"""
+        self._ensure_started()
+        future = Future()
+        with self._lock:
+            if self._broken is not None:
+                raise BrokenProcessPool(self._broken)
+            request_id = next(self._ids)
+            self._pending[request_id] = future
+        self._requests.put((request_id, list(keys)))
+        return future
+
+    def predict(self, keys, timeout=None):
+        """Outputs of one batch; raises TimeoutError after `timeout` (default: timeout_s) seconds"""
+        return self.submit(keys).result(timeout=self.timeout_s if timeout is None else timeout)
+
+    def _collect(self):
+        while True:
+            item = self._results.get()
+            if item is None:
+                return
+            request_id, ok, value = item
+            with self._lock:
+                future = self._pending.pop(request_id, None)
+            if future is None:
+                continue  # Already failed when a replica died
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(RuntimeError(value))
+
+    def _watch(self):
+        """Break the pool as soon as any replica exits while it is not being closed"""
+        processes = {process.sentinel: process for process in self._processes}
+        ready = mp.connection.wait(list(processes))
+        if self._closing:
+            return
+        process = processes[ready[0]]
+        process.join(timeout=1)
+        message = f"Replica {process.name} (pid {process.pid}) exited with code {process.exitcode}"
+        with self._lock:
+            self._broken = message
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(BrokenProcessPool(message))
+
+    def close(self):
+        self._closing = True
+        if self._pid != os.getpid():
+            return
+        for _ in self._processes:
+            self._requests.put(None)
+        for process in self._processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        self._results.put(None)
+        self._collector.join(timeout=10)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
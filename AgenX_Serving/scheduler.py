@@ -0,0 +1,117 @@
+"""
+Shared micro-batching scheduler and result cache for the gateway.
+"""
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from AgenX_Serving.replicas import set_torch_threads
+
+
+class ResultCache:
+    """Thread-safe LRU cache of predictions keyed by (domain, parsed input)"""
+
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return True, self._data[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class BatchScheduler:
+    """
+    Collects single predictions from concurrent requests into model batches.
+
+    Every backend has its own queue and dispatcher thread. A dispatcher takes the first
+    waiting item, keeps collecting for up to max_wait_ms or until max_batch items, and
+    hands the batch to one executor shared by all backends. The thread budget is
+    n_threads executor workers x intra_threads torch/BLAS threads per batch; the intra-op
+    pools are limited accordingly, so concurrent batches do not each spawn one thread per
+    core. Threads are started lazily in the serving process, so the scheduler can be
+    created before gunicorn forks its workers.
+    """
+
+    def __init__(self, backends, max_batch=64, max_wait_ms=2.0, n_threads=None, intra_threads=1, on_batch=None):
+        self.backends = backends
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.n_threads = n_threads or os.cpu_count() or 1
+        self.intra_threads = intra_threads
+        self.on_batch = on_batch  # callback(domain, batch_size, seconds)
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            set_torch_threads(self.intra_threads, 1)
+            self._executor = ThreadPoolExecutor(max_workers=self.n_threads, thread_name_prefix='predict')
+            self._queues = {name: queue.Queue() for name in self.backends}
+            for name in self.backends:
+                threading.Thread(target=self._dispatch, args=(name,), daemon=True, name=f'batch-{name}').start()
+            self._pid = os.getpid()
+
+    def submit(self, domain, keys):
+        """Queue inputs for a backend and return one Future per input"""
+        self._ensure_started()
+        futures = []
+        for key in keys:
+            future = Future()
+            self._queues[domain].put((key, future))
+            futures.append(future)
+        return futures
+
+    def _dispatch(self, domain):
+        q = self._queues[domain]
+        while True:
+            batch = [q.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(q.get(timeout=remaining) if remaining > 0 else q.get_nowait())
+                except queue.Empty:
+                    break
+            self._executor.submit(self._run, domain, batch)
+
+    def _run(self, domain, batch):
+        keys = [key for key, _ in batch]
+        start = time.perf_counter()
+        try:
+            outputs = self.backends[domain].predict(keys)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        if self.on_batch is not None:
+            self.on_batch(domain, len(batch), time.perf_counter() - start)
+        for (_, future), output in zip(batch, outputs):
+            future.set_result(output)
@@ -0,0 +1,23 @@
+import argparse
+import time
+
+from src.data_processor import SuperconDataProcessor
+from src.neighbors import CompositionIndex, build_index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the nearest-neighbor index over the training-set compositions")
+    parser.add_argument("--data", required=True, help="Training TSV with 'element', 'tc' and optional 'str3' columns")
+    parser.add_argument("--output", default="./models/composition_index")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    processor = SuperconDataProcessor()
+    n_rows = build_index(processor, args.data, args.output)
+    print(f"Indexed {n_rows} materials in {time.perf_counter() - start:.1f}s, saved to: {args.output}")
+
+    index = CompositionIndex(args.output)
+    query = index.materials.iloc[0]['element']
+    start = time.perf_counter()
+    neighbors = index.search(index.query_vector(processor, query), k=5)
+    print(f"Sanity query {query}: nearest L1 distance {neighbors[0]['distance']:.3f} in {(time.perf_counter() - start) * 1e3:.1f} ms")
@@ -0,0 +1,86 @@
+import argparse
+import pickle
+
+import numpy as np
+import torch
+
+from src.model import TcPredictor, source_hash
+
+
+def fold_input_scaler(model, scaler):
+    """
+    Fold a fitted StandardScaler into the first linear layer of TcPredictor.
+
+    layer1(scaler(x)) = W ((x - mean) / scale) + b = (W / scale) x + (b - (W / scale) mean),
+    so the fused model consumes raw composition features directly.
+    """
+    fused = TcPredictor(input_size=model.layer1.in_features, hidden=model.layer1.out_features)
+    fused.load_state_dict(model.state_dict())
+    fused.eval()
+
+    weight = model.layer1.weight.detach().double()
+    bias = model.layer1.bias.detach().double()
+    mean = torch.as_tensor(scaler.mean_ if scaler.with_mean else np.zeros(weight.shape[1]), dtype=torch.float64)
+    scale = torch.as_tensor(scaler.scale_ if scaler.with_std else np.ones(weight.shape[1]), dtype=torch.float64)
+
+    fused_weight = weight / scale
+    fused_bias = bias - fused_weight @ mean
+
+    with torch.no_grad():
+        fused.layer1.weight.copy_(fused_weight.float())
+        fused.layer1.bias.copy_(fused_bias.float())
+    return fused
+
+
+def random_compositions(processor_data, n_samples, seed=42):
+    """Random raw feature rows shaped like real inputs: a few element fractions plus one structure type"""
+    rng = np.random.default_rng(seed)
+    n_elements = len(processor_data['used_elements'])
+    n_structures = len(processor_data['structure_types'])
+    X = np.zeros((n_samples, processor_data['n_features']))
+
+    for i in range(n_samples):
+        n_present = rng.integers(1, 6)
+        columns = rng.choice(n_elements, size=n_present, replace=False)
+        X[i, columns] = rng.dirichlet(np.ones(n_present))
+        if n_structures:
+            X[i, n_elements + rng.integers(n_structures)] = 1
+    return X
+
+
+def check_parity(model, fused, scaler, X, atol):
+    """Compare scaler + model against the fused model and return the max absolute difference"""
+    with torch.no_grad():
+        reference = model(torch.FloatTensor(scaler.transform(X))).numpy()
+        output = fused(torch.FloatTensor(X)).numpy()
+    max_diff = float(np.max(np.abs(reference - output)))
+    if max_diff > atol:
+        raise ValueError(f"Fused model deviates from the reference by {max_diff:.3e} (tolerance {atol:.1e})")
+    return max_diff
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Fold the Supercon feature scaler into TcPredictor.layer1")
+    parser.add_argument("--model", default="./models/best_supercon_model.pth")
+    parser.add_argument("--processor", default="./models/supercon_processor.pkl")
+    parser.add_argument("--output", default="./models/best_supercon_model_fused.pth")
+    parser.add_argument("--n_check", type=int, default=2000, help="Number of random inputs for the parity check")
+    parser.add_argument("--atol", type=float, default=1e-3, help="Max absolute Tc difference (K) allowed")
+    args = parser.parse_args()
+
+    with open(args.processor, 'rb') as f:
+        processor_data = pickle.load(f)
+
+    model = TcPredictor(input_size=processor_data['n_features'])
+    model.load_state_dict(torch.load(args.model, map_location='cpu'))
+    model.eval()
+
+    fused = fold_input_scaler(model, processor_data['scaler'])
+
+    X = random_compositions(processor_data, args.n_check)
+    max_diff = check_parity(model, fused, processor_data['scaler'], X, args.atol)
+    print(f"Parity check on {args.n_check} inputs passed: max |dTc| = {max_diff:.3e} K")
+
+    # The source hash lets the service refuse this file once the model or scaler is retrained
+    torch.save({'state_dict': fused.state_dict(), 'source_hash': source_hash([args.model, args.processor])}, args.output)
+    print(f"Fused model saved to: {args.output}")
@@ -1,12 +1,13 @@
 import torch
-from src.model import TcPredictor
+from src.model import TcPredictor, quantize_model
 from src.data_processor import SuperconDataProcessor
 
 
 class Inference:
-    def __init__(self, model_path, input_size):
+    def __init__(self, model_path, input_size, quantize=False):
         self.model_path = model_path
         self.input_size = input_size
+        self.quantize = quantize
         self.device = torch.device('cpu')  # or 'cuda' if you want to run on GPU
         self.processor = SuperconDataProcessor()
 
@@ -15,6 +16,8 @@ class Inference:
         self.model.load_state_dict(torch.load(self.model_path, map_location=self.device))
         self.model.eval()
         self.model.to(self.device)
+        if self.quantize:
+            self.model = quantize_model(self.model)
         print(f"Inference Model loaded from: {self.model_path}")
 
     def predict_tc_from_formula(self, chemical_formula, structure_type=None):
@@ -3,24 +3,44 @@ from flask import Flask, request, jsonify
 import torch
 import os
 import pickle
-from src.model import TcPredictor
+import numpy as np
+from src.model import TcPredictor, load_fused_state_dict, mc_dropout_predict, quantize_model
 from src.data_processor import SuperconDataProcessor
+from src.variants import composition_vector, enumerate_variants, format_formula
+from src.neighbors import METRICS, CompositionIndex
 import pandas as pd
 
+from AgenX_Serving.metrics import Metrics
+
 # --- Flask App ---
 app = Flask(__name__)
 
 # Configure logging level to DEBUG
 app.logger.setLevel(logging.DEBUG)
 
+# Request counts, stage latencies and batch sizes, served at GET /metrics
+metrics = Metrics()
+metrics.instrument(app)
+
 # --- Configuration ---
 MODEL_PATH = './models/best_supercon_model.pth'  # Model path
+FUSED_MODEL_PATH = './models/best_supercon_model_fused.pth'  # Model with the scaler folded in (compile.py)
 PROCESSOR_PATH = './models/supercon_processor.pkl'  # Processor data path
+INDEX_DIR = './models/composition_index'  # Training-set neighbor index (build_index.py)
+# Set SUPERCON_QUANTIZE=1 to serve the dynamic int8 model (see quantize_eval.py)
+QUANTIZE = os.getenv("SUPERCON_QUANTIZE", "0").lower() in ("1", "true", "yes")
+MC_SAMPLES = 30  # Default dropout samples for "uncertainty": true
+MAX_MC_SAMPLES = 256
 
 
 # --- Load Model and Processor ---
 def load_model():
-    """Load the trained model and get input size from saved processor data"""
+    """
+    Load the trained model and get input size from saved processor data
+
+    The fused model (scaler folded into layer1) is preferred when it has been compiled
+    from the current weights and processor, so requests skip the separate scaling step
+    """
     try:
         # Get input size from processor data
         with open(PROCESSOR_PATH, 'rb') as f:
@@ -29,24 +49,65 @@ def load_model():
             app.logger.info(f"Loaded processor data with {input_size} features")
 
         # Load model with correct input size
+        state_dict = None
+        if os.path.exists(FUSED_MODEL_PATH):
+            try:
+                state_dict = load_fused_state_dict(FUSED_MODEL_PATH, [MODEL_PATH, PROCESSOR_PATH])
+            except ValueError as e:
+                app.logger.warning(f"Ignoring fused model: {e}")
+        fused = state_dict is not None
         model = TcPredictor(input_size=input_size)
-        model.load_state_dict(torch.load(MODEL_PATH, map_location='cpu'))
+        model.load_state_dict(state_dict if fused else torch.load(MODEL_PATH, map_location='cpu'))
         model.eval()
+        app.logger.info(f"Loaded {'fused' if fused else 'unfused'} model")
 
-        return model, input_size
+        if QUANTIZE:
+            model = quantize_model(model)
+            app.logger.info("Applied dynamic int8 quantization to linear layers")
+
+        return model, input_size, fused
     except Exception as e:
         app.logger.error(f"Failed to load model: {e}")
-        return None, None
+        return None, None, False
 
 
 try:
-    model, input_size = load_model()
+    model, input_size, fused = load_model()
     processor = SuperconDataProcessor()
+    processor.load_processor()
     app.logger.info(f"Model loaded successfully with input size: {input_size}")
 except Exception as e:
     app.logger.error(f"Failed to load model: {e}")
     model = None
     input_size = None
+    fused = False
+
+
+def load_index():
+    """Load the training-set composition index if it has been built"""
+    if not os.path.exists(INDEX_DIR):
+        app.logger.warning(f"No composition index at {INDEX_DIR}, /neighbors is disabled (run build_index.py)")
+        return None
+    try:
+        index = CompositionIndex(INDEX_DIR)
+        app.logger.info(f"Loaded composition index with {len(index)} materials")
+        return index
+    except Exception as e:
+        app.logger.error(f"Failed to load composition index: {e}")
+        return None
+
+
+composition_index = load_index()
+
+def mc_samples(data):
+    """Number of Monte-Carlo dropout samples requested, or None for a point estimate"""
+    if not data.get('uncertainty'):
+        return None
+    n_samples = int(data.get('n_samples', MC_SAMPLES))
+    if not 2 <= n_samples <= MAX_MC_SAMPLES:
+        raise ValueError(f"n_samples must be between 2 and {MAX_MC_SAMPLES}")
+    return n_samples
+
 
 # Tutorial documentation
 TUTORIAL_DOCUMENT = """
@@ -61,6 +122,9 @@ TUTORIAL_DOCUMENT = """
 - element: Chemical formula of the material (e.g., "Ba0.2La1.8Cu1O4-Y")
 - str3 (optional): Structure type code (e.g., "T" for tetragonal)
 
+- uncertainty (optional): true to return {"tc": mean, "tc_std": std} over Monte-Carlo dropout samples
+- n_samples (optional): number of dropout samples with uncertainty (default 30)
+
 ## Prediction Output:
 - The tool returns the predicted critical temperature (Tc) in Kelvin.
 
@@ -102,7 +166,6 @@ def predict_tc():
 
         # Get input data from request
         data = request.get_json()
-        app.logger.debug(f"Received input data: {data}")
 
         if not data:
             submit["error"] = "Input data is missing in request body"
@@ -116,34 +179,212 @@ def predict_tc():
         # Store input data
         submit["input"] = data
 
+        try:
+            n_samples = mc_samples(data)
+        except (TypeError, ValueError) as e:
+            submit["error"] = f"Validation error: {str(e)}"
+            return jsonify(submit), 400
+
         # Process input data
         input_df = pd.DataFrame([data])
         try:
-            processed_input = processor.process_input(input_df)
-            input_tensor = torch.FloatTensor(processed_input)
+            with metrics.timer('featurize'):
+                processed_input = processor.process_input(input_df, scale=not fused)
+                input_tensor = torch.FloatTensor(processed_input)
         except Exception as e:
+            metrics.error(e)
             app.logger.error(f"Error processing input: {str(e)}")
             submit["error"] = f"Error processing input: {str(e)}"
             return jsonify(submit), 400
 
         # Make prediction
-        with torch.no_grad():
+        metrics.observe('batch_size', n_samples or 1)
+        if n_samples:
+            # All dropout samples as one tiled batch
+            with metrics.timer('forward'):
+                mean, std = mc_dropout_predict(model, input_tensor, n_samples=n_samples)
+            submit["output"] = {"tc": float(mean[0]), "tc_std": float(std[0]), "n_samples": n_samples}
+            submit["success"] = True
+            return jsonify(submit)
+
+        with metrics.timer('forward'), torch.no_grad():
             prediction = model(input_tensor)
             predicted_tc = float(prediction[0][0])
 
-        app.logger.debug(f"Predicted Tc: {predicted_tc}")
-
         # Update response with prediction
         submit["output"] = predicted_tc
         submit["success"] = True
         return jsonify(submit)
 
     except Exception as e:
+        metrics.error(e)
         app.logger.error(f"Error during prediction: {str(e)}")
         submit["error"] = f"Prediction failed: {str(e)}"
         return jsonify(submit), 500  # Internal Server Error
 
 
+@app.route('/variants', methods=['POST'])
+def predict_variants():
+    """
+    Local composition search around a parent formula.
+
+    Expected JSON input:
+    {
+        "element": "Ba0.2La1.8Cu1O4",
+        "str3": "T",                     (optional)
+        "dopants": ["Sr", "Ca"],         (optional, all known elements if absent or empty)
+        "top_k": 10,                     (optional)
+        "uncertainty": true,             (optional, adds "tc_std" from Monte-Carlo dropout)
+        "n_samples": 30                  (optional)
+    }
+
+    All doping/substitution and stoichiometry variants are featurized together and
+    scored in one batched forward pass; the output lists the top_k by predicted Tc.
+    With uncertainty, "tc" is the mean over the dropout samples, which all run in the
+    same tiled forward pass.
+    """
+    submit = {
+        "input": "",
+        "output": "",
+        "success": False,
+        "error": ""
+    }
+
+    try:
+        if model is None:
+            submit["error"] = "Model not loaded. Please check server logs."
+            return jsonify(submit), 500
+
+        data = request.get_json()
+
+        if not data or 'element' not in data:
+            submit["error"] = "Missing required field: 'element' (chemical formula)"
+            return jsonify(submit), 400
+
+        submit["input"] = data
+        top_k = int(data.get('top_k', 10))
+        if not 1 <= top_k <= 100:
+            submit["error"] = "top_k must be between 1 and 100"
+            return jsonify(submit), 400
+        try:
+            n_samples = mc_samples(data)
+        except (TypeError, ValueError) as e:
+            submit["error"] = f"Validation error: {str(e)}"
+            return jsonify(submit), 400
+
+        # An empty list means all elements, like an absent one
+        dopants = data.get('dopants') or None
+        if dopants is not None:
+            if not isinstance(dopants, list) or not all(isinstance(d, str) for d in dopants):
+                submit["error"] = "dopants must be a list of element symbols"
+                return jsonify(submit), 400
+            unknown = [d for d in dopants if d not in processor.used_elements]
+            if unknown:
+                submit["error"] = f"Unknown dopant element(s): {', '.join(unknown)} (not among the model's composition features)"
+                return jsonify(submit), 400
+
+        try:
+            with metrics.timer('featurize'):
+                parent = composition_vector(processor, data['element'])
+                compositions, modifications = enumerate_variants(parent, processor.used_elements, dopants=dopants)
+                features = processor.process_compositions(
+                    np.vstack([parent, compositions]), structure_type=data.get('str3'), scale=not fused
+                )
+        except Exception as e:
+            metrics.error(e)
+            app.logger.error(f"Error processing input: {str(e)}")
+            submit["error"] = f"Error processing input: {str(e)}"
+            return jsonify(submit), 400
+
+        metrics.observe('batch_size', len(features) * (n_samples or 1))
+        with metrics.timer('forward'):
+            if n_samples:
+                mean, std = mc_dropout_predict(model, torch.FloatTensor(features), n_samples=n_samples)
+                predictions, stds = mean.numpy(), std.numpy()
+            else:
+                with torch.no_grad():
+                    predictions = model(torch.FloatTensor(features)).view(-1).numpy()
+
+        def scored(i, entry):
+            if n_samples:
+                entry["tc_std"] = float(stds[i])
+            return entry
+
+        ranked = np.argsort(-predictions[1:])[:top_k]
+        submit["output"] = {
+            "parent": scored(0, {"element": format_formula(parent, processor.used_elements), "tc": float(predictions[0])}),
+            "n_variants": len(compositions),
+            "variants": [
+                scored(i + 1, {
+                    "element": format_formula(compositions[i], processor.used_elements),
+                    "modification": modifications[i],
+                    "tc": float(predictions[i + 1])
+                })
+                for i in ranked
+            ]
+        }
+        submit["success"] = True
+        return jsonify(submit)
+
+    except Exception as e:
+        metrics.error(e)
+        app.logger.error(f"Error during variant search: {str(e)}")
+        submit["error"] = f"Variant search failed: {str(e)}"
+        return jsonify(submit), 500
+
+@app.route('/neighbors', methods=['POST'])
+def neighbors():
+    """
+    Nearest known superconductors of a formula, with their measured Tc.
+
+    Expected JSON input:
+    {
+        "element": "La1.85Sr0.15Cu1O4",
+        "k": 10,                (optional)
+        "metric": "l1"          (optional, "l1" or "cosine")
+    }
+    """
+    submit = {
+        "input": "",
+        "output": "",
+        "success": False,
+        "error": ""
+    }
+
+    try:
+        if composition_index is None:
+            submit["error"] = "Composition index not loaded. Please run build_index.py."
+            return jsonify(submit), 500
+
+        data = request.get_json()
+        if not data or 'element' not in data:
+            submit["error"] = "Missing required field: 'element' (chemical formula)"
+            return jsonify(submit), 400
+
+        submit["input"] = data
+        k = int(data.get('k', 10))
+        metric = data.get('metric', 'l1')
+        if not 1 <= k <= 100 or metric not in METRICS:
+            submit["error"] = f"k must be between 1 and 100 and metric one of {METRICS}"
+            return jsonify(submit), 400
+
+        try:
+            q = composition_index.query_vector(processor, data['element'])
+        except ValueError as e:
+            metrics.error(e)
+            submit["error"] = f"Error processing input: {str(e)}"
+            return jsonify(submit), 400
+
+        submit["output"] = composition_index.search(q, k=k, metric=metric)
+        submit["success"] = True
+        return jsonify(submit)
+
+    except Exception as e:
+        metrics.error(e)
+        app.logger.error(f"Error during neighbor search: {str(e)}")
+        submit["error"] = f"Neighbor search failed: {str(e)}"
+        return jsonify(submit), 500
+
 
 if __name__ == '__main__':
     app.run(debug=True, host='127.0.0.1', port=12502)
\ No newline at end of file
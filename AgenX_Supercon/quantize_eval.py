@@ -0,0 +1,97 @@
+import argparse
+import io
+import json
+import time
+
+import numpy as np
+import pandas as pd
+import torch
+
+from src.model import TcPredictor, quantize_model
+from src.data_processor import SuperconDataProcessor
+
+
+def model_size_mb(model):
+    """Serialized size of the model's state dict in MB"""
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.getbuffer().nbytes / 1e6
+
+
+def run_model(model, X, batch_size):
+    """Run batched inference and return predictions with the average per-batch latency"""
+    predictions = []
+    latencies = []
+    with torch.no_grad():
+        for start in range(0, len(X), batch_size):
+            batch = X[start:start + batch_size]
+            t0 = time.perf_counter()
+            predictions.append(model(batch).squeeze(-1))
+            latencies.append(time.perf_counter() - t0)
+    return torch.cat(predictions).numpy(), float(np.mean(latencies))
+
+
+def evaluate(model_path, data_path, batch_size=256, limit=None, tolerance=1.0):
+    """
+    Compare the fp32 TcPredictor with its dynamic int8 counterpart.
+
+    Reports MAE of both models against the measured Tc, the MAE drift between the
+    two models, the per-batch latency and the serialized model size.
+    """
+    df = pd.read_csv(data_path, sep='\t')
+    df = df.dropna(subset=['element', 'tc'])
+    if limit is not None:
+        df = df.iloc[:limit]
+
+    processor = SuperconDataProcessor()
+    X = torch.FloatTensor(processor.process_input(df))
+    y = df['tc'].values
+
+    fp32_model = TcPredictor(input_size=X.shape[1])
+    fp32_model.load_state_dict(torch.load(model_path, map_location='cpu'))
+    fp32_model.eval()
+    int8_model = quantize_model(fp32_model)
+
+    fp32_pred, fp32_latency = run_model(fp32_model, X, batch_size)
+    int8_pred, int8_latency = run_model(int8_model, X, batch_size)
+    _, fp32_latency_single = run_model(fp32_model, X[:100], 1)
+    _, int8_latency_single = run_model(int8_model, X[:100], 1)
+
+    drift = np.abs(fp32_pred - int8_pred)
+    report = {
+        "n_samples": int(len(y)),
+        "fp32_mae": float(np.mean(np.abs(fp32_pred - y))),
+        "int8_mae": float(np.mean(np.abs(int8_pred - y))),
+        "mae_drift": float(np.mean(drift)),
+        "max_drift": float(np.max(drift)),
+        "fp32_batch_latency_ms": fp32_latency * 1e3,
+        "int8_batch_latency_ms": int8_latency * 1e3,
+        "fp32_single_latency_ms": fp32_latency_single * 1e3,
+        "int8_single_latency_ms": int8_latency_single * 1e3,
+        "fp32_size_mb": model_size_mb(fp32_model),
+        "int8_size_mb": model_size_mb(int8_model),
+        "tolerance": tolerance,
+    }
+    report["int8_recommended"] = report["int8_mae"] - report["fp32_mae"] <= tolerance
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate dynamic int8 quantization of TcPredictor")
+    parser.add_argument("--model", default="./models/best_supercon_model.pth")
+    parser.add_argument("--data", required=True, help="TSV file with `element`, `str3` and `tc` columns")
+    parser.add_argument("--batch_size", type=int, default=256)
+    parser.add_argument("--limit", type=int, default=None, help="Only evaluate the first N rows")
+    parser.add_argument("--tolerance", type=float, default=1.0, help="Accepted MAE increase (K) for int8")
+    parser.add_argument("--output", default=None, help="Optional path to save the report as JSON")
+    args = parser.parse_args()
+
+    report = evaluate(args.model, args.data, args.batch_size, args.limit, args.tolerance)
+
+    print("\n--- TcPredictor fp32 vs int8 ---")
+    for key, value in report.items():
+        print(f"{key:<26} {value}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
@@ -8,7 +8,8 @@ import re
 
 
 class SuperconDataProcessor:
-    def __init__(self):
+    def __init__(self, processor_path='./models/supercon_processor.pkl'):
+        self.processor_path = processor_path
         self.scaler = StandardScaler()
         # Define the periodic table elements
         self.elements = ['H', 'He', 'Li', 'Be', 'B', 'C', 'N', 'O', 'F', 'Ne',
@@ -23,6 +24,9 @@ class SuperconDataProcessor:
                          'Pa', 'U', 'Np', 'Pu', 'Am', 'Cm', 'Bk', 'Cf', 'Es', 'Fm']
         self.structure_types = []
         self.feature_columns = []
+        self.used_elements = []
+        self.n_features = None
+        self._processor_loaded = False
 
     def _parse_formula(self, formula):
         """
@@ -172,25 +176,40 @@ class SuperconDataProcessor:
 
         return X_train_scaled, X_test_scaled, y_train, y_test
 
-    def process_input(self, input_data):
+    def load_processor(self):
         """
-        Process input data for inference
+        Load the saved scaler and feature layout, once per processor instance
         """
-        # Load saved processor data
+        if self._processor_loaded:
+            return
+
         try:
-            with open('./models/supercon_processor.pkl', 'rb') as f:
+            with open(self.processor_path, 'rb') as f:
                 processor_data = pickle.load(f)
                 self.scaler = processor_data['scaler']
                 self.elements = processor_data['elements']
-                used_elements = processor_data['used_elements']
+                self.used_elements = processor_data['used_elements']
                 self.structure_types = processor_data['structure_types']
                 self.feature_columns = processor_data['feature_columns']
-                expected_features = processor_data['n_features']
+                self.n_features = processor_data['n_features']
 
             print(f"Loaded processor with {len(self.feature_columns)} features")
         except FileNotFoundError:
             raise FileNotFoundError("Processor data not found. Please train the model first.")
 
+        self._processor_loaded = True
+
+    def process_input(self, input_data, scale=True):
+        """
+        Process input data for inference
+
+        With scale=False the raw composition features are returned, for models whose
+        first layer already has the scaler folded in (see compile.py)
+        """
+        self.load_processor()
+        used_elements = self.used_elements
+        expected_features = self.n_features
+
         # Convert input to DataFrame if it's a dictionary
         if isinstance(input_data, dict):
             input_data = pd.DataFrame([input_data])
@@ -223,6 +242,40 @@ class SuperconDataProcessor:
                         idx = self.structure_types.index(struct_str)
                         X[i, len(used_elements) + idx] = 1
 
+        if not scale:
+            return X
+
         # Scale features
         scaled_data = self.scaler.transform(X)
-        return scaled_data
\ No newline at end of file
+        return scaled_data
+
+    def process_compositions(self, compositions, structure_type=None, scale=True):
+        """
+        Vectorized feature builder for many compositions at once
+
+        Args:
+            compositions (ndarray): Element amounts of shape (n_samples, len(used_elements)),
+                columns in used_elements order
+            structure_type (str, optional): Structure type code shared by all samples
+
+        Returns:
+            ndarray: Features of shape (n_samples, n_features), identical to process_input
+                on the corresponding formulas
+        """
+        self.load_processor()
+
+        compositions = np.asarray(compositions, dtype=np.float64)
+        total_count = compositions.sum(axis=1, keepdims=True)
+
+        X = np.zeros((len(compositions), self.n_features))
+        X[:, :len(self.used_elements)] = np.divide(
+            compositions, total_count, out=np.zeros_like(compositions), where=total_count > 0
+        )
+
+        if structure_type is not None and str(structure_type) in self.structure_types:
+            X[:, len(self.used_elements) + self.structure_types.index(str(structure_type))] = 1
+
+        if not scale:
+            return X
+
+        return self.scaler.transform(X)
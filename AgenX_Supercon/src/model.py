@@ -1,4 +1,9 @@
+import hashlib
+import os
+
+import torch
 import torch.nn as nn
+import torch.nn.functional as F
 
 
 class TcPredictor(nn.Module):
@@ -11,11 +16,83 @@ class TcPredictor(nn.Module):
         self.l_relu = nn.LeakyReLU()
         self.dropout = nn.Dropout(0.25)
 
-    def forward(self, x):
+    def forward(self, x, sample=False):
+        # sample=True keeps dropout active in eval mode (Monte-Carlo dropout) without
+        # touching the module state, so concurrent deterministic requests are unaffected
         x = self.l_relu(self.layer1(x))
-        x = self.dropout(x)
+        x = F.dropout(x, self.dropout.p, training=True) if sample else self.dropout(x)
         x = self.l_relu(self.layer2(x))
-        x = self.dropout(x)
+        x = F.dropout(x, self.dropout.p, training=True) if sample else self.dropout(x)
         x = self.l_relu(self.layer3(x))
         x = self.layer4(x)
-        return x
\ No newline at end of file
+        return x
+
+
+def source_hash(paths):
+    """sha256 over the contents of the files a compiled model was built from"""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def load_fused_state_dict(path, sources):
+    """
+    Load the fused state dict written by compile.py.
+
+    Raises ValueError if it was not built from `sources` (the model weights and processor
+    pickle) as they are now, e.g. after retraining; it is accepted unchecked only when the
+    sources themselves are not deployed.
+    """
+    artifact = torch.load(path, map_location='cpu')
+    if 'source_hash' not in artifact:
+        raise ValueError(f"{path} predates source hashing, re-run compile.py")
+    if all(os.path.exists(source) for source in sources) and artifact['source_hash'] != source_hash(sources):
+        raise ValueError(f"{path} was built from other weights or scalers than {', '.join(map(str, sources))}, re-run compile.py")
+    return artifact['state_dict']
+
+
+def quantize_model(model):
+    """
+    Apply dynamic int8 quantization to the nn.Linear layers of a trained model.
+
+    Weights are stored as int8 and activations are quantized on the fly, so no
+    calibration data is needed. The quantized model only runs on CPU.
+    """
+    model.eval()
+    return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+
+def mc_dropout_predict(model, x, n_samples=30, max_rows=65536, seed=None):
+    """
+    Monte-Carlo dropout: mean and standard deviation of n_samples stochastic predictions.
+
+    The input is tiled into one [n_samples * batch, features] tensor, so all samples run in
+    a single forward pass (chunked along the batch to at most max_rows rows) instead of
+    n_samples separate calls. Dropout is sampled through forward(sample=True), the model
+    itself stays in eval mode.
+
+    Args:
+        model: TcPredictor (plain, fused or quantized)
+        x (Tensor): Features of shape (batch, features)
+        n_samples (int): Number of stochastic passes K
+        max_rows (int): Largest tiled batch evaluated at once, bounds peak memory
+        seed (int, optional): Seed for the dropout masks, for reproducible estimates
+
+    Returns:
+        tuple: (mean, std) tensors of shape (batch,)
+    """
+    chunk = max(1, max_rows // n_samples)
+    means, stds = [], []
+
+    with torch.random.fork_rng(devices=[], enabled=seed is not None), torch.no_grad():
+        if seed is not None:
+            torch.manual_seed(seed)
+        for start in range(0, len(x), chunk):
+            xb = x[start:start + chunk]
+            samples = model(xb.repeat(n_samples, 1), sample=True).view(n_samples, len(xb))
+            means.append(samples.mean(dim=0))
+            stds.append(samples.std(dim=0, unbiased=False))
+
+    return torch.cat(means), torch.cat(stds)
@@ -0,0 +1,120 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+METRICS = ('l1', 'cosine')
+
+
+def build_index(processor, tsv_path, index_dir):
+    """
+    Build the nearest-neighbor index over the training-set composition vectors
+
+    Saves to index_dir:
+        compositions.npz  CSR matrix (n, len(used_elements)) of atomic fractions
+        tc.npy            measured Tc of each row
+        materials.csv     formula and structure type of each row
+
+    Returns:
+        int: Number of indexed materials
+    """
+    processor.load_processor()
+    df = pd.read_csv(tsv_path, sep='\t').dropna(subset=['element', 'tc']).reset_index(drop=True)
+
+    X = processor.process_input(df[['element']], scale=False)[:, :len(processor.used_elements)]
+    keep = X.sum(axis=1) > 0
+    df = df[keep].reset_index(drop=True)
+
+    os.makedirs(index_dir, exist_ok=True)
+    sparse.save_npz(os.path.join(index_dir, 'compositions.npz'), sparse.csr_matrix(X[keep]))
+    np.save(os.path.join(index_dir, 'tc.npy'), df['tc'].to_numpy(dtype=np.float64))
+    columns = ['element', 'str3'] if 'str3' in df.columns else ['element']
+    df[columns].to_csv(os.path.join(index_dir, 'materials.csv'), index=False)
+    with open(os.path.join(index_dir, 'meta.json'), 'w') as f:
+        json.dump({'n_rows': int(keep.sum()), 'used_elements': processor.used_elements, 'source': tsv_path}, f, indent=4)
+
+    return int(keep.sum())
+
+
+class CompositionIndex:
+    """
+    k-nearest known superconductors of a composition
+
+    Rows are atomic-fraction vectors (each row sums to 1), so for the L1 metric
+    |x - q|_1 = 2 - 2 * sum_j min(x_j, q_j), which only touches the columns of the few
+    elements present in the query. Cosine similarity is a single sparse mat-vec over
+    row-normalized CSR data. Both cost O(nnz of the touched rows), not O(n * n_elements).
+    """
+
+    def __init__(self, index_dir):
+        with open(os.path.join(index_dir, 'meta.json')) as f:
+            self.meta = json.load(f)
+
+        self.used_elements = self.meta['used_elements']
+        X = sparse.load_npz(os.path.join(index_dir, 'compositions.npz')).tocsr()
+        self.columns = X.tocsc()
+        self.normalized = sparse.csr_matrix(X.multiply(1.0 / np.sqrt(X.multiply(X).sum(axis=1))))
+        self.tc = np.load(os.path.join(index_dir, 'tc.npy'))
+        self.materials = pd.read_csv(os.path.join(index_dir, 'materials.csv'), keep_default_na=False)
+
+    def __len__(self):
+        return len(self.tc)
+
+    def query_vector(self, processor, formula):
+        """
+        Atomic-fraction vector of a formula in the index's element order
+
+        Raises:
+            ValueError: If the formula cannot be parsed or has elements outside the index
+        """
+        element_counts = processor._parse_formula(formula)
+        total_count = sum(element_counts.values())
+        if total_count <= 0:
+            raise ValueError(f"Could not parse chemical formula: {formula}")
+
+        unknown = [element for element in element_counts if element not in self.used_elements]
+        if unknown:
+            raise ValueError(f"Elements not covered by the training set: {', '.join(unknown)}")
+
+        q = np.zeros(len(self.used_elements))
+        for element, count in element_counts.items():
+            q[self.used_elements.index(element)] = count / total_count
+        return q
+
+    def search(self, q, k=10, metric='l1'):
+        """
+        Return the k nearest materials to the atomic-fraction vector q
+
+        Returns:
+            list: [{'element', 'str3', 'tc', 'distance' (l1) or 'similarity' (cosine)}], nearest first
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric '{metric}', expected one of {METRICS}")
+
+        if metric == 'l1':
+            overlap = np.zeros(len(self))
+            for j in np.flatnonzero(q):
+                start, stop = self.columns.indptr[j], self.columns.indptr[j + 1]
+                rows = self.columns.indices[start:stop]
+                overlap[rows] += np.minimum(self.columns.data[start:stop], q[j])
+            score = 2.0 - 2.0 * overlap
+            order_key = score
+        else:
+            score = self.normalized @ (q / np.linalg.norm(q))
+            order_key = -score
+
+        k = min(k, len(self))
+        top = np.argpartition(order_key, k - 1)[:k] if k < len(self) else np.arange(len(self))
+        top = top[np.argsort(order_key[top], kind='stable')]
+
+        score_name = 'distance' if metric == 'l1' else 'similarity'
+        return [
+            {
+                **{column: self.materials.iloc[i][column] for column in self.materials.columns},
+                'tc': float(self.tc[i]),
+                score_name: float(score[i])
+            }
+            for i in top
+        ]
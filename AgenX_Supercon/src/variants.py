@@ -0,0 +1,83 @@
+import numpy as np
+
+# Fraction of a host site replaced by the dopant
+SUBSTITUTION_FRACTIONS = (0.05, 0.1, 0.2, 0.3, 0.5)
+# Multipliers applied to the amount of one host element (e.g. oxygen off-stoichiometry)
+STOICHIOMETRY_FACTORS = (0.8, 0.9, 0.95, 1.05, 1.1, 1.2)
+
+
+def composition_vector(processor, formula):
+    """
+    Parse a formula into element amounts in the processor's used_elements order
+
+    Raises:
+        ValueError: If the formula is empty or contains elements the model has never seen
+    """
+    processor.load_processor()
+    element_counts = processor._parse_formula(formula)
+    if not element_counts:
+        raise ValueError(f"Could not parse chemical formula: {formula}")
+
+    unknown = [element for element in element_counts if element not in processor.used_elements]
+    if unknown:
+        raise ValueError(f"Elements not covered by the model: {', '.join(unknown)}")
+
+    counts = np.zeros(len(processor.used_elements))
+    for element, count in element_counts.items():
+        counts[processor.used_elements.index(element)] = count
+    return counts
+
+
+def format_formula(counts, used_elements):
+    """Element amounts back to a formula string, e.g. 'Ba0.2La1.8Cu1O4'"""
+    return ''.join(
+        f"{element}{round(amount, 4):g}" for element, amount in zip(used_elements, counts) if amount > 1e-9
+    )
+
+
+def enumerate_variants(parent, used_elements, dopants=None, fractions=SUBSTITUTION_FRACTIONS,
+                       factors=STOICHIOMETRY_FACTORS):
+    """
+    Enumerate doping/substitution and stoichiometry variants of a parent composition
+
+    Substitution replaces a fraction x of every host element h by a dopant d
+    (h -> h(1-x) d(x)); stoichiometry variants scale the amount of one host element.
+    All variants are built with array broadcasting, not one formula at a time.
+
+    Args:
+        parent (ndarray): Element amounts of the parent, in used_elements order
+        used_elements (list): Element symbols of the model's composition features
+        dopants (list, optional): Candidate dopant symbols, all used_elements by default
+
+    Returns:
+        compositions (ndarray): (n_variants, len(used_elements)) element amounts
+        modifications (list): Human-readable description of each variant
+    """
+    parent = np.asarray(parent, dtype=np.float64)
+    hosts = np.flatnonzero(parent > 0)
+    dopant_idx = np.arange(len(used_elements)) if dopants is None else np.array(
+        [used_elements.index(d) for d in dopants if d in used_elements], dtype=np.int64
+    )
+    fractions = np.asarray(fractions, dtype=np.float64)
+    factors = np.asarray(factors, dtype=np.float64)
+
+    # Substitution grid of shape (hosts, dopants, fractions, elements)
+    moved = parent[hosts][:, None] * fractions[None, :]
+    substituted = np.tile(parent, (len(hosts), len(dopant_idx), len(fractions), 1))
+    h, d = np.meshgrid(np.arange(len(hosts)), np.arange(len(dopant_idx)), indexing='ij')
+    substituted[h, d, :, hosts[h]] -= moved[:, None, :]
+    substituted[h, d, :, dopant_idx[d]] += moved[:, None, :]
+    keep = hosts[:, None] != dopant_idx[None, :]
+    substituted = substituted[keep].reshape(-1, len(parent))
+    substitution_labels = [
+        f"{used_elements[hosts[i]]}->{used_elements[dopant_idx[j]]} {x:.0%}"
+        for i, j in zip(*np.nonzero(keep)) for x in fractions
+    ]
+
+    # Stoichiometry grid of shape (hosts, factors, elements)
+    scaled = np.tile(parent, (len(hosts), len(factors), 1))
+    scaled[np.arange(len(hosts)), :, hosts] *= factors[None, :]
+    scaled = scaled.reshape(-1, len(parent))
+    stoichiometry_labels = [f"{used_elements[host]} x{factor:g}" for host in hosts for factor in factors]
+
+    return np.vstack([substituted, scaled]), substitution_labels + stoichiometry_labels
@@ -0,0 +1,51 @@
+"""Parity of compile.py's scaler folding and the source-hash check (run from AgenX_Supercon: python -m pytest tests)"""
+import pickle
+
+import numpy as np
+import pytest
+import torch
+from sklearn.preprocessing import StandardScaler
+
+from compile import check_parity, fold_input_scaler
+from src.model import TcPredictor, load_fused_state_dict, source_hash
+
+N_FEATURES = 24
+
+
+@pytest.fixture
+def model():
+    torch.manual_seed(0)
+    model = TcPredictor(input_size=N_FEATURES, hidden=32)
+    model.eval()
+    return model
+
+
+@pytest.mark.parametrize("with_mean,with_std", [(True, True), (False, True), (True, False)])
+def test_folded_model_matches_scaler_and_model(model, with_mean, with_std):
+    rng = np.random.default_rng(0)
+    scaler = StandardScaler(with_mean=with_mean, with_std=with_std).fit(rng.gamma(2.0, 3.0, (500, N_FEATURES)))
+    fused = fold_input_scaler(model, scaler)
+
+    X = rng.gamma(2.0, 3.0, (200, N_FEATURES))
+    assert check_parity(model, fused, scaler, X, atol=1e-4) <= 1e-4
+
+
+def test_fused_state_dict_is_refused_when_sources_change(model, tmp_path):
+    model_path, processor_path, fused_path = tmp_path / "model.pth", tmp_path / "processor.pkl", tmp_path / "fused.pth"
+    torch.save(model.state_dict(), model_path)
+    with open(processor_path, 'wb') as f:
+        pickle.dump({'scaler': StandardScaler().fit(np.eye(N_FEATURES))}, f)
+    sources = [model_path, processor_path]
+    torch.save({'state_dict': model.state_dict(), 'source_hash': source_hash(sources)}, fused_path)
+
+    assert load_fused_state_dict(fused_path, sources).keys() == model.state_dict().keys()
+
+    with torch.no_grad():
+        model.layer1.bias.add_(1.0)
+    torch.save(model.state_dict(), model_path)
+    with pytest.raises(ValueError, match="re-run compile.py"):
+        load_fused_state_dict(fused_path, sources)
+
+    torch.save(model.state_dict(), fused_path)
+    with pytest.raises(ValueError, match="predates source hashing"):
+        load_fused_state_dict(fused_path, sources)
@@ -0,0 +1,302 @@
+"""
+End-to-end benchmark of the discovery loop itself, offline.
+
+Runs complete PriM teams against the LLM stub (bench/llm_stub.py) and the predictor gateway
+served in-process on the legacy tool port, across modes (combinations of --sas,
+--principled, --prompted) and max_turn values. Every run gets a fresh process, so peak RSS
+is per configuration:
+
+    python -m bench.discovery_bench --modes sas sas+principled sas+principled+prompted \
+        --max_turns 10 20 --repeats 3 --latency_scale 0 --output bench_results/discovery.json
+
+Reported per run: wall-clock per turn, LLM calls and tokens per turn (counted by the stub),
+time in PrincipleFlow scoring (suggest_action) and listening (judges, principle extraction),
+peak RSS, and the discovery AUC: the mean best-so-far objective over the experiments, i.e.
+the area under the best-value-vs-exploration-step curve normalized by the number of steps.
+The output JSON carries the commit and machine, so results are comparable across commits.
+"""
+import argparse
+import ast
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing as mp
+
+import numpy as np
+import requests
+import yaml
+
+from AgenX_Serving import REPO_ROOT, SERVICES
+
+MODE_FLAGS = ('sas', 'principled', 'prompted')
+
+logger = logging.getLogger("discovery_bench")
+
+
+def parse_mode(mode):
+    flags = set(mode.split('+')) - {'base'}
+    unknown = flags - set(MODE_FLAGS)
+    if unknown:
+        raise ValueError(f"Unknown mode flag(s) {sorted(unknown)}, expected a '+'-joined subset of {MODE_FLAGS}")
+    return {flag: flag in flags for flag in MODE_FLAGS}
+
+
+def write_stub_configs(task_config, model_config, stub_url, out_dir):
+    """Copies of the task and model configs with every LLM and embedding endpoint on the stub"""
+    with open(task_config) as f:
+        task = yaml.safe_load(f)
+    with open(model_config) as f:
+        model = yaml.safe_load(f)
+
+    for agent in model.get('agents', {}).values():
+        agent['api_config'] = {
+            'base_url': stub_url, 'model_name': 'stub', 'api_key': 'bench',
+            'is_reasoning': False, 'temperature': 0.0, 'max_tokens': 1024,
+        }
+    task['environment'] = {
+        **{key: str(value) for key, value in (task.get('environment') or {}).items() if value is not None},
+        'UTIL_LLM_CONFIG_BASE_URL': stub_url,
+        'UTIL_LLM_CONFIG_NAME': 'stub',
+        'UTIL_LLM_CONFIG_API_KEY': 'bench',
+        'UTIL_LLM_CONFIG_TEMPERATURE': '0.0',
+        'UTIL_LLM_CONFIG_MAX_TOKENS': '1024',
+        'PIFLOW_EMBEDDING_MODEL_NAME': 'stub',
+        'PIFLOW_EMBEDDING_MODEL_URL': stub_url,
+        'PIFLOW_EMBEDDING_MODEL_API_KEY': 'bench',
+        'PIFLOW_EMBEDDING_MODEL_DIMENSIONS': '256',
+    }
+
+    os.makedirs(out_dir, exist_ok=True)
+    paths = os.path.join(out_dir, 'task.yaml'), os.path.join(out_dir, 'model.yaml')
+    for path, config in zip(paths, (task, model)):
+        with open(path, 'w') as f:
+            yaml.safe_dump(config, f, sort_keys=False, allow_unicode=True)
+    # PriM copies the configs to save_dir/<config path>, so keep them relative
+    return tuple(os.path.relpath(path, REPO_ROOT) for path in paths)
+
+
+def start_predictors(domain):
+    """Serve the gateway for `domain` in this process on the port the tools call"""
+    os.environ.setdefault('GATEWAY_DOMAINS', domain)
+    from AgenX_Serving.gateway import app, gateway
+    from bench.llm_stub import serve_in_thread
+
+    if not gateway.backends[domain].loaded:
+        logger.warning(f"Backend '{domain}' failed to load; tool calls will report errors")
+    return serve_in_thread(app, port=SERVICES[domain]['port'])
+
+
+def objective_values(content):
+    """Numeric objective values in a tool call summary (one tool result per line)"""
+    values = []
+    for line in content.strip().split("\n"):
+        try:
+            result = ast.literal_eval(line)
+        except (ValueError, SyntaxError):
+            continue
+        if not isinstance(result, dict) or not result.get('success'):
+            continue
+        output = result.get('output')
+        if isinstance(output, dict):
+            output = next((v for v in output.values() if isinstance(v, (int, float)) and not isinstance(v, bool)), None)
+        if isinstance(output, (int, float)) and not isinstance(output, bool):
+            values.append(float(output))
+    return values
+
+
+def discovery_auc(values, minimize=False):
+    """Mean best-so-far value over the exploration steps"""
+    if not values:
+        return None
+    best_so_far = np.minimum.accumulate(values) if minimize else np.maximum.accumulate(values)
+    return float(np.mean(best_so_far))
+
+
+def _stub_counters(stub_url):
+    snapshot = requests.get(stub_url.rsplit('/v1', 1)[0] + '/metrics', timeout=10).json()
+    return snapshot['counters'], snapshot['errors']
+
+
+def _timed(method, totals, name):
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            totals[name] += time.perf_counter() - start
+    return wrapper
+
+
+async def _run_team(spec):
+    from autogen_agentchat.base import TaskResult
+    from autogen_agentchat.messages import BaseChatMessage, ToolCallSummaryMessage
+    from inference import PriM
+
+    flags = parse_mode(spec['mode'])
+    prim = PriM(
+        argparse.Namespace(max_turn=spec['max_turn']),
+        task_cfg_path=spec['task_config'],
+        model_cfg_path=spec['model_config'],
+        save_dir=spec['save_dir'],
+        is_sas=flags['sas'],
+        is_mas=False,
+        is_principled=flags['principled'],
+        is_prompted=flags['prompted'],
+        cache_dir=spec['cache_dir'],
+    )
+
+    flow_time = {'scoring': 0.0, 'listening': 0.0}
+    if prim.principle_flow is not None:
+        flow = prim.principle_flow
+        flow.suggest_action = _timed(flow.suggest_action, flow_time, 'scoring')
+        flow.listen_messages = _timed(flow.listen_messages, flow_time, 'listening')
+
+    counters_before, errors_before = _stub_counters(spec['stub_url'])
+    turn_times, values, stop_reason = [], [], None
+    start = last = time.perf_counter()
+    async for item in prim.team.run_stream(task=prim.task):
+        if isinstance(item, TaskResult):
+            stop_reason = item.stop_reason
+        elif isinstance(item, BaseChatMessage) and item.source != 'user':
+            now = time.perf_counter()
+            turn_times.append(now - last)
+            last = now
+            if isinstance(item, ToolCallSummaryMessage):
+                values.extend(objective_values(item.content))
+    if prim.principle_flow is not None:
+        await prim.principle_flow.wait_principles()
+    wall = time.perf_counter() - start
+    counters_after, errors_after = _stub_counters(spec['stub_url'])
+
+    def delta(name):
+        return counters_after.get(name, 0) - counters_before.get(name, 0)
+
+    turns = max(len(turn_times), 1)
+    llm_calls = delta('requests.chat_completions')
+    tokens = delta('tokens.prompt') + delta('tokens.completion')
+    return {
+        **{key: spec[key] for key in ('mode', 'max_turn', 'repeat')},
+        **flags,
+        'turns': len(turn_times),
+        'stop_reason': stop_reason,
+        'wall_s': wall,
+        'wall_per_turn_s': wall / turns,
+        'turn_p50_s': float(np.percentile(turn_times, 50)) if turn_times else None,
+        'turn_p95_s': float(np.percentile(turn_times, 95)) if turn_times else None,
+        'llm_calls': llm_calls,
+        'llm_calls_per_turn': llm_calls / turns,
+        'prompt_tokens': delta('tokens.prompt'),
+        'completion_tokens': delta('tokens.completion'),
+        'tokens_per_turn': tokens / turns,
+        'embedding_calls': delta('requests.embeddings'),
+        'flow_scoring_s': flow_time['scoring'],
+        'flow_listening_s': flow_time['listening'],
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'n_experiments': len(values),
+        'best': (min(values) if spec['minimize'] else max(values)) if values else None,
+        'auc': discovery_auc(values, spec['minimize']),
+        'usage': prim.usage.summary(),
+        'response_cache': prim.cache_storage.stats() if prim.cache_storage is not None else None,
+        'injected_errors': {name: n - errors_before.get(name, 0) for name, n in errors_after.items()
+                            if name.startswith('injected') and n > errors_before.get(name, 0)},
+    }
+
+
+def run_one(spec):
+    """Entry point of the per-run worker process"""
+    from src.utils import tracing
+
+    os.chdir(REPO_ROOT)
+    logging.getLogger().setLevel(logging.WARNING)
+    if spec['trace']:
+        tracing.enable(os.path.join(spec['save_dir'], 'trace.json'))
+    try:
+        return asyncio.run(_run_team(spec))
+    finally:
+        tracing.disable()
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO_ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark of PriM discovery runs")
+    parser.add_argument("--task_config", default="configs/demo_config_for_task.yaml")
+    parser.add_argument("--model_config", default="configs/demo_config_for_model.yaml")
+    parser.add_argument("--modes", nargs="+", default=["sas", "sas+principled", "sas+principled+prompted"],
+                        help="'+'-joined subsets of sas, principled, prompted ('base' for none)")
+    parser.add_argument("--max_turns", type=int, nargs="+", default=[10])
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--domain", choices=sorted(SERVICES), default="nanohelix", help="Predictor the task's tools call")
+    parser.add_argument("--external_predictors", action="store_true", help="Use already running predictor services")
+    parser.add_argument("--minimize", action="store_true", help="The objective is minimized (AUC of the best-so-far minimum)")
+    parser.add_argument("--stub_script", default=None, help="LLM stub script (default: bench/stub_script.yaml)")
+    parser.add_argument("--stub_port", type=int, default=None)
+    parser.add_argument("--latency_scale", type=float, default=1.0, help="Scale of the scripted LLM latencies (0 disables them)")
+    parser.add_argument("--error_rate", type=float, default=None, help="Override the stub's injected error rate")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cache_dir", default=None, help="Share one LLM response cache across all runs (repeats then measure cached reruns)")
+    parser.add_argument("--trace", action="store_true", help="Save a Chrome trace of every run to its directory")
+    parser.add_argument("--output", default="bench_results/discovery.json")
+    args = parser.parse_args()
+
+    from bench.llm_stub import DEFAULT_SCRIPT, STUB_PORT, StubScript, create_app, serve_in_thread
+
+    logging.basicConfig(level=logging.INFO)
+    output = os.path.abspath(args.output)
+    run_dir = os.path.splitext(output)[0]
+    os.chdir(REPO_ROOT)
+    for mode in args.modes:
+        parse_mode(mode)
+
+    stub_port = args.stub_port or STUB_PORT
+    stub_url = f"http://127.0.0.1:{stub_port}/v1"
+    stub = StubScript.load(args.stub_script or DEFAULT_SCRIPT, seed=args.seed,
+                           latency_scale=args.latency_scale, error_rate=args.error_rate)
+    serve_in_thread(create_app(stub), port=stub_port)
+    if not args.external_predictors:
+        start_predictors(args.domain)
+    task_config, model_config = write_stub_configs(args.task_config, args.model_config, stub_url,
+                                                   os.path.join(run_dir, 'configs'))
+
+    results = []
+    context = mp.get_context('spawn')
+    for max_turn in args.max_turns:
+        for mode in args.modes:
+            for repeat in range(args.repeats):
+                spec = {
+                    'mode': mode, 'max_turn': max_turn, 'repeat': repeat, 'minimize': args.minimize, 'trace': args.trace,
+                    'cache_dir': os.path.abspath(args.cache_dir) if args.cache_dir else None,
+                    'task_config': task_config, 'model_config': model_config, 'stub_url': stub_url,
+                    'save_dir': os.path.join(run_dir, f'{mode}-t{max_turn}-r{repeat}'),
+                }
+                # A fresh process per run, so peak RSS and module state are per configuration
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                    report = executor.submit(run_one, spec).result()
+                results.append(report)
+                auc = f"{report['auc']:.4f}" if report['auc'] is not None else "n/a"
+                print(f"{mode:<26} max_turn={max_turn:<4} #{repeat}  {report['wall_per_turn_s']:.3f}s/turn  "
+                      f"{report['llm_calls_per_turn']:.1f} calls/turn  {report['tokens_per_turn']:.0f} tokens/turn  "
+                      f"scoring={report['flow_scoring_s']:.3f}s  rss={report['peak_rss_mb']:.0f}MB  auc={auc}")
+
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({
+            'commit': git_commit(),
+            'created': time.time(),
+            'machine': {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count()},
+            'settings': {key: value for key, value in vars(args).items() if key != 'output'},
+            'results': results,
+        }, f, indent=4)
+    print(f"Results saved to {output}")
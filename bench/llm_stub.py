@@ -0,0 +1,354 @@
+"""
+Offline stand-in for an OpenAI-compatible LLM endpoint, for load-testing the agent loop.
+
+Serves the two APIs PriM uses, with scripted instead of generated responses:
+    POST /v1/chat/completions   hypotheses, tool calls, YES/NO judgments, principles (JSON or
+                                SSE streaming, including tool-call deltas and usage chunks)
+    POST /v1/embeddings         deterministic bag-of-words embeddings, so similar principles
+                                get similar vectors
+    GET  /health, GET /metrics  request counts, latency percentiles, tokens and errors
+
+Responses, latency distributions and error injection come from a YAML script (default:
+bench/stub_script.yaml, which documents the format). Point PriM at it by setting every
+`base_url` in the model config, UTIL_LLM_CONFIG_BASE_URL and PIFLOW_EMBEDDING_MODEL_URL to
+http://127.0.0.1:12600/v1 (any api_key / model name is accepted):
+
+    python -m bench.llm_stub --port 12600
+    python -m bench.llm_stub --latency_scale 0 --error_rate 0.05     # no delays, 5% errors
+"""
+import argparse
+import base64
+import hashlib
+import itertools
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+import uuid
+
+import numpy as np
+import yaml
+from flask import Flask, Response, jsonify, request
+from werkzeug.serving import make_server
+
+from AgenX_Serving.metrics import Metrics
+
+STUB_PORT = 12600
+DEFAULT_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stub_script.yaml')
+ERROR_TYPES = {429: 'rate_limit_exceeded', 500: 'server_error', 503: 'service_unavailable'}
+
+logger = logging.getLogger("llm_stub")
+
+
+def count_tokens(text):
+    """Rough token count (4 characters per token), enough for usage accounting"""
+    return max(1, len(text) // 4) if text else 0
+
+
+def sample_ms(spec, rng):
+    """Draw one value from a distribution spec such as {lognormal: {median: 400, sigma: 0.5}}"""
+    if not spec:
+        return 0.0
+    (kind, params), = spec.items()
+    if kind == 'fixed':
+        return float(params)
+    if kind == 'uniform':
+        return rng.uniform(*params)
+    if kind == 'normal':
+        return max(0.0, rng.gauss(params['mean'], params['std']))
+    if kind == 'lognormal':
+        return params['median'] * float(np.exp(rng.gauss(0.0, params['sigma'])))
+    if kind == 'exponential':
+        return rng.expovariate(1.0 / params['mean'])
+    raise ValueError(f"Unknown latency distribution '{kind}'")
+
+
+def _text(content):
+    """Text of a chat message content, which may be a list of parts"""
+    if isinstance(content, list):
+        return "\n".join(part.get('text', '') for part in content if isinstance(part, dict))
+    return content or ""
+
+
+class _Fields(dict):
+    def __missing__(self, key):
+        return '{' + key + '}'
+
+
+class StubScript:
+    """A loaded stub script: variables, rules, latency model and error injection"""
+
+    def __init__(self, script, seed=None, latency_scale=1.0, error_rate=None):
+        self.variables = script.get('variables', {})
+        self.rules = script.get('rules', [])
+        self.latency = script.get('latency', {})
+        self.errors = dict(script.get('errors', {}))
+        if error_rate is not None:
+            self.errors['rate'] = error_rate
+        self.dimensions = script.get('embeddings', {}).get('dimensions', 256)
+        self.latency_scale = latency_scale
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._requests = itertools.count(1)
+        self._word_vectors = {}
+
+        for rule in self.rules:
+            if ('content' in rule) == ('tool_call' in rule):
+                raise ValueError(f"Rule '{rule.get('name')}' needs exactly one of content / tool_call")
+            for key in ('system', 'last'):
+                if key in rule.get('match', {}):
+                    rule['match'][key] = re.compile(rule['match'][key])
+
+    @classmethod
+    def load(cls, path=DEFAULT_SCRIPT, **kwargs):
+        with open(path) as f:
+            return cls(yaml.safe_load(f), **kwargs)
+
+    def _sample_variables(self):
+        values = {}
+        for name, spec in self.variables.items():
+            (kind, params), = spec.items()
+            values[name] = self.rng.choice(params) if kind == 'choice' else round(sample_ms(spec, self.rng), 3)
+        return values
+
+    def match(self, messages, tools):
+        system = "\n".join(_text(m.get('content')) for m in messages if m.get('role') == 'system')
+        last = messages[-1] if messages else {}
+        for rule in self.rules:
+            condition = rule.get('match', {})
+            if 'system' in condition and not condition['system'].search(system):
+                continue
+            if 'last' in condition and not condition['last'].search(_text(last.get('content'))):
+                continue
+            if 'tools' in condition and bool(tools) != condition['tools']:
+                continue
+            if 'tool_result' in condition and (last.get('role') == 'tool') != condition['tool_result']:
+                continue
+            return rule
+        return {'name': 'unmatched', 'content': ''}
+
+    def respond(self, messages, tools, model):
+        """(rule name, content, tool_calls, latency in s) for one chat completion"""
+        with self._lock:
+            rule = self.match(messages, tools)
+            fields = _Fields(self._sample_variables(), request=next(self._requests), model=model)
+            content, tool_calls = None, None
+            if 'content' in rule:
+                template = rule['content']
+                if isinstance(template, list):
+                    template = self.rng.choices(
+                        [option['content'] for option in template], [option.get('weight', 1.0) for option in template]
+                    )[0]
+                content = template.format_map(fields)
+            else:
+                tool_calls = [self._tool_call(rule['tool_call'], messages, tools, fields)]
+
+            latency = {**self.latency, **rule.get('latency', {})}
+            output = content if content is not None else tool_calls[0]['function']['arguments']
+            delay_ms = sample_ms(latency.get('first_token_ms'), self.rng) \
+                + count_tokens(output) * sample_ms(latency.get('per_token_ms'), self.rng)
+        return rule.get('name', 'unnamed'), content, tool_calls, delay_ms * self.latency_scale / 1e3
+
+    def _tool_call(self, spec, messages, tools, fields):
+        functions = {t['function']['name']: t['function'] for t in tools if t.get('type') == 'function'}
+        name = spec.get('name') or next(iter(functions))
+        schema = functions.get(name, {}).get('parameters', {})
+        context = next((_text(m.get('content')) for m in reversed(messages) if m.get('role') != 'tool'), "")
+
+        arguments = {}
+        for param, param_schema in schema.get('properties', {}).items():
+            if param in spec.get('arguments', {}):
+                value = str(spec['arguments'][param]).format_map(fields)
+            else:
+                found = re.search(rf'\b{re.escape(param)}\s*[=:]\s*(-?\d+(?:\.\d+)?)', context)
+                value = found.group(1) if found else fields.get(param)
+            arguments[param] = self._cast(value, param_schema)
+        return {
+            'id': f'call_{uuid.uuid4().hex[:24]}',
+            'type': 'function',
+            'function': {'name': name, 'arguments': json.dumps(arguments)},
+        }
+
+    def _cast(self, value, schema):
+        types = schema.get('type', 'string')
+        types = [t for t in (types if isinstance(types, list) else [types]) if t != 'null'] or ['null']
+        kind = types[0] if 'anyOf' not in schema else schema['anyOf'][0].get('type', 'string')
+        if kind in ('number', 'integer'):
+            number = float(value) if value is not None else round(self.rng.uniform(0, 1), 3)
+            return int(round(number)) if kind == 'integer' else number
+        if kind == 'boolean':
+            return str(value).lower() in ('1', 'true', 'yes') if value is not None else True
+        if kind == 'null':
+            return None
+        return str(value) if value is not None else 'stub'
+
+    def embed(self, text):
+        """Normalized sum of per-word random vectors: deterministic, and close for similar texts"""
+        vector = np.zeros(self.dimensions)
+        for word in re.findall(r'\w+', text.lower()):
+            word_vector = self._word_vectors.get(word)
+            if word_vector is None:
+                seed = int(hashlib.sha256(word.encode()).hexdigest()[:16], 16)
+                word_vector = self._word_vectors[word] = np.random.default_rng(seed).standard_normal(self.dimensions)
+            vector += word_vector
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def injected_error(self):
+        """None, 'timeout' or an HTTP status to fail this request with"""
+        with self._lock:
+            roll = self.rng.random()
+            if roll < self.errors.get('timeout_rate', 0.0):
+                return 'timeout'
+            if roll < self.errors.get('timeout_rate', 0.0) + self.errors.get('rate', 0.0):
+                return self.rng.choice(self.errors.get('statuses', [500]))
+        return None
+
+
+def _error(status, message):
+    return jsonify({'error': {'message': message, 'type': ERROR_TYPES.get(status, 'server_error'),
+                              'param': None, 'code': status}}), status
+
+
+def create_app(script):
+    app = Flask(__name__)
+    metrics = Metrics()
+    metrics.instrument(app)
+
+    def inject():
+        failure = script.injected_error()
+        if failure == 'timeout':
+            metrics.error('injected_timeout')
+            time.sleep(script.errors.get('timeout_s', 120))
+            return _error(504, "Injected timeout")
+        if failure is not None:
+            metrics.error(f'injected_{failure}')
+            return _error(failure, f"Injected error {failure}")
+        return None
+
+    @app.route('/v1/chat/completions', methods=['POST'])
+    def chat_completions():
+        body = request.get_json(silent=True) or {}
+        messages = body.get('messages', [])
+        tools = body.get('tools') or []
+        model = body.get('model', 'stub')
+        if not messages:
+            return _error(400, "'messages' is required")
+        failure = inject()
+        if failure is not None:
+            return failure
+
+        rule, content, tool_calls, delay = script.respond(messages, tools, model)
+        prompt_tokens = sum(count_tokens(_text(m.get('content'))) for m in messages) + count_tokens(json.dumps(tools) if tools else "")
+        completion_tokens = count_tokens(content if content is not None else tool_calls[0]['function']['arguments'])
+        usage = {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                 'total_tokens': prompt_tokens + completion_tokens}
+        finish_reason = 'tool_calls' if tool_calls else 'stop'
+        completion_id = f'chatcmpl-{uuid.uuid4().hex[:24]}'
+        created = int(time.time())
+        metrics.count(f'rule.{rule}')
+        metrics.count('tokens.prompt', prompt_tokens)
+        metrics.count('tokens.completion', completion_tokens)
+        metrics.observe('stub_latency', delay * 1e3)
+
+        if not body.get('stream'):
+            time.sleep(delay)
+            message = {'role': 'assistant', 'content': content}
+            if tool_calls:
+                message['tool_calls'] = tool_calls
+            return jsonify({
+                'id': completion_id, 'object': 'chat.completion', 'created': created, 'model': model,
+                'choices': [{'index': 0, 'message': message, 'finish_reason': finish_reason, 'logprobs': None}],
+                'usage': usage,
+            }), 200
+
+        include_usage = (body.get('stream_options') or {}).get('include_usage', False)
+
+        def chunk(delta, finish=None, chunk_usage=None):
+            data = {'id': completion_id, 'object': 'chat.completion.chunk', 'created': created, 'model': model,
+                    'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish, 'logprobs': None}] if delta is not None else []}
+            if chunk_usage is not None:
+                data['usage'] = chunk_usage
+            return f"data: {json.dumps(data)}\n\n"
+
+        def stream():
+            # The first-token delay up front, the rest spread over the content pieces
+            pieces = re.findall(r'\S+\s*', content) if content else []
+            time.sleep(delay / 2)
+            yield chunk({'role': 'assistant', 'content': ''})
+            for piece in pieces:
+                time.sleep(delay / 2 / len(pieces))
+                yield chunk({'content': piece})
+            if tool_calls:
+                time.sleep(delay / 2)
+                yield chunk({'tool_calls': [{'index': i, **call} for i, call in enumerate(tool_calls)]})
+            yield chunk({}, finish=finish_reason)
+            if include_usage:
+                yield chunk(None, chunk_usage=usage)
+            yield "data: [DONE]\n\n"
+
+        return Response(stream(), mimetype='text/event-stream')
+
+    @app.route('/v1/embeddings', methods=['POST'])
+    def embeddings():
+        body = request.get_json(silent=True) or {}
+        inputs = body.get('input')
+        if inputs is None:
+            return _error(400, "'input' is required")
+        failure = inject()
+        if failure is not None:
+            return failure
+        if isinstance(inputs, str):
+            inputs = [inputs]
+
+        dimensions = body.get('dimensions') or script.dimensions
+        data = []
+        for index, text in enumerate(inputs):
+            vector = script.embed(str(text))[:dimensions]
+            vector = vector / (np.linalg.norm(vector) or 1.0)
+            if body.get('encoding_format') == 'base64':
+                embedding = base64.b64encode(vector.astype(np.float32).tobytes()).decode()
+            else:
+                embedding = vector.tolist()
+            data.append({'object': 'embedding', 'index': index, 'embedding': embedding})
+        tokens = sum(count_tokens(str(text)) for text in inputs)
+        metrics.count('tokens.embedding', tokens)
+        return jsonify({'object': 'list', 'data': data, 'model': body.get('model', 'stub'),
+                        'usage': {'prompt_tokens': tokens, 'total_tokens': tokens}}), 200
+
+    @app.route('/v1/models', methods=['GET'])
+    def models():
+        return jsonify({'object': 'list', 'data': [{'id': 'stub', 'object': 'model', 'owned_by': 'bench'}]}), 200
+
+    @app.route('/health', methods=['GET'])
+    def health():
+        return jsonify({'status': 'healthy', 'rules': [rule.get('name') for rule in script.rules]}), 200
+
+    return app
+
+
+def serve_in_thread(app, host='127.0.0.1', port=STUB_PORT):
+    """Start the stub on a daemon thread; returns the server (call .shutdown() to stop it)"""
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)  # No access log line per completion
+    server = make_server(host, port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True, name='llm-stub').start()
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Offline OpenAI-compatible LLM stand-in for benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=STUB_PORT)
+    parser.add_argument("--script", default=DEFAULT_SCRIPT, help="YAML response script")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for reproducible responses and latencies")
+    parser.add_argument("--latency_scale", type=float, default=1.0, help="Multiply all scripted latencies (0 disables them)")
+    parser.add_argument("--error_rate", type=float, default=None, help="Override the scripted error rate")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    stub = StubScript.load(args.script, seed=args.seed, latency_scale=args.latency_scale, error_rate=args.error_rate)
+    logger.info(f"LLM stub on http://{args.host}:{args.port}/v1 with {len(stub.rules)} rules from {args.script}")
+    make_server(args.host, args.port, create_app(stub), threaded=True).serve_forever()
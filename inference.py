@@ -13,9 +13,7 @@ from autogen_core.models import ModelFamily
 from autogen_core.tools import FunctionTool, Tool
 from autogen_ext.models.openai import OpenAIChatCompletionClient
 
-from autogen_ext.models.cache import ChatCompletionCache, CHAT_CACHE_VALUE_TYPE
-from autogen_ext.cache_store.diskcache import DiskCacheStore
-from diskcache import Cache
+from autogen_ext.models.cache import ChatCompletionCache
 
 from src.agents import (
     UserProxy,
@@ -27,10 +25,14 @@ from src.group.manage import (
     HypoValidGroupChat
 )
 import src.tools as tools
-from src.utils.config import load_config, init_results
+from src.utils.config import load_config, init_results, save_results
 from src.tools.tools_registry import collect_tools
 from src.utils.console import Console
-from src.group.workflow import PrincipleFlow
+from src.group.workflow import FLOW_PURPOSES, LOCAL_ROUTE, PrincipleFlow, create_embedding
+from src.utils.accounting import UsageLedger
+from src.utils.llm_cache import ResponseStore, StableChatCompletionCache
+from src.utils.replay import TrafficTrace
+from src.utils import tracing
 
 
 logging.basicConfig(
@@ -52,8 +54,16 @@ class PriM:
             is_prompted,
             cache_dir: Optional[str] = None,
             save_dir: Optional[str] = "./",
+            traffic: Optional[TrafficTrace] = None,
+            cache_size_mb: float = 1024,
+            cache_ttl_s: Optional[float] = None,
+            cache_mode: str = "readwrite",
     ) -> None:
         self.args = args
+        # Records, or replays, every LLM, embedding and tool call of the run.
+        self.traffic = traffic
+        # Calls, tokens, latency and cache hits of every model client, by agent and purpose.
+        self.usage = UsageLedger()
 
         self.model_config = load_config(model_cfg_path)
         self.task_config = load_config(task_cfg_path)
@@ -71,7 +81,10 @@ class PriM:
         self.agents: Dict[str, Union[AssistantAgent, UserProxyAgent]] = {}
         self.principle_flow: Optional[PrincipleFlow] = None
 
-        self.cache_storage = DiskCacheStore[CHAT_CACHE_VALUE_TYPE](Cache(directory=cache_dir))
+        # One response cache shared by all clients (keys include the model), if cache_dir is set.
+        self.cache_storage: Optional[ResponseStore] = None
+        if cache_dir is not None:
+            self.cache_storage = ResponseStore(cache_dir, size_limit_mb=cache_size_mb, ttl_s=cache_ttl_s, mode=cache_mode)
 
         for key in self.task_config.get("environment").keys():
             os.environ[key] = self.task_config.get("environment")[key]
@@ -80,9 +93,16 @@ class PriM:
             FunctionTool,
             modules=[
                 tools.characterize_pchembl_value,
+                tools.expand_pchembl_analogs,
+                tools.find_similar_chembl_compounds,
                 tools.characterize_nanohelix_gfactor,
-                tools.characterize_Tc_value
-            ]
+                tools.optimize_nanohelix_gfactor,
+                tools.characterize_Tc_value,
+                tools.characterize_Tc_uncertainty,
+                tools.explore_Tc_variants,
+                tools.find_similar_superconductors
+            ],
+            wrap=self.traffic.wrap_tool if self.traffic is not None else None
         )
 
         self._set_util_client(cache_dir=self.cache_dir)
@@ -141,13 +161,17 @@ class PriM:
         )
 
         if cache_dir is not None:
-            self.util_client: OpenAIChatCompletionClient | ChatCompletionCache = ChatCompletionCache(openai_model_client, self.cache_storage)
+            self.util_client: OpenAIChatCompletionClient | ChatCompletionCache = StableChatCompletionCache(openai_model_client, self.cache_storage)
             logger.debug("Cached client opened for util-model. ")
         else:
             self.util_client: OpenAIChatCompletionClient | ChatCompletionCache = openai_model_client
 
+        if self.traffic is not None:
+            self.util_client = self.traffic.wrap_client(self.util_client)
+        self.util_client = self.usage.wrap_client(self.util_client, agent="util")
+
 
-    def _create_client(self, llm_config: Dict[str, Any], cache_dir: Optional[str] = None, model_type:str = "openai") -> OpenAIChatCompletionClient | ChatCompletionCache:
+    def _create_client(self, llm_config: Dict[str, Any], cache_dir: Optional[str] = None, model_type:str = "openai", agent_name: str = "agent") -> OpenAIChatCompletionClient | ChatCompletionCache:
         """Create an OpenAIChatCompletionClient instance based on LLM configuration."""
 
         api_key = llm_config.get("api_key", os.getenv("OPENAI_API_KEY"))
@@ -168,12 +192,31 @@ class PriM:
                 "structured_output": False,
             }
         )
-        if cache_dir is not None:
-            return ChatCompletionCache(openai_client, self.cache_storage)
-        else:
-            return openai_client
-
-
+        client = StableChatCompletionCache(openai_client, self.cache_storage) if cache_dir is not None else openai_client
+        if self.traffic is not None:
+            client = self.traffic.wrap_client(client)
+        return self.usage.wrap_client(client, agent=agent_name)
+
+
+
+    def _flow_routes(self, routing: Dict[str, str], flow_client) -> Dict[str, Any]:
+        """
+        Map every PrincipleFlow purpose to its client: "util" (default, the cheap util model),
+        "planner" (the planner's own, possibly reasoning, model) or "local" (judge_experiment only:
+        parse the tool call summary without a model call).
+        """
+        unknown = set(routing) - set(FLOW_PURPOSES)
+        if unknown:
+            raise ValueError(f"Unknown flow_routing purposes {sorted(unknown)}, expected {FLOW_PURPOSES}")
+        clients = {"util": self.util_client, "planner": flow_client, LOCAL_ROUTE: LOCAL_ROUTE}
+        routes = {}
+        for purpose in FLOW_PURPOSES:
+            route = routing.get(purpose, "util")
+            if route not in clients:
+                raise ValueError(f"flow_routing.{purpose} must be one of {list(clients)}, got '{route}'")
+            routes[purpose] = clients[route]
+            logger.info(f"PrincipleFlow {purpose} routed to {route}. ")
+        return routes
 
     def _create_agents(self) -> None:
         """Create all agents based on the configuration."""
@@ -200,18 +243,25 @@ class PriM:
                 agent_config = self.model_config.get("agents", {}).get(agent_name, {})
                 llm_config = agent_config.get("api_config", {})
 
+                flow_client = self._create_client(
+                    llm_config=llm_config,
+                    cache_dir=self.cache_dir,
+                    model_type=llm_config.get("model_type", "openai"),
+                    agent_name="principle_flow"
+                )
                 self.principle_flow = PrincipleFlow(
                     task=self.task_config.get("task"),
                     objective=self.task_config.get("objective_value"),
-                    model_client=self._create_client(
-                        llm_config=llm_config,
-                        cache_dir=self.cache_dir,
-                        model_type=llm_config.get("model_type", "openai")
-                    ),
+                    model_client=flow_client,
+                    routes=self._flow_routes(agent_config.get("flow_routing") or {}, flow_client),
                     save_dir=self.save_dir,
                     is_sas=self.is_sas,                 # Dummy value here.
                     is_mas=self.is_mas,                 # Dummy value here.
-                    is_principled=self.is_principled    # Only for the Planner Agent.
+                    is_principled=self.is_principled,   # Only for the Planner Agent.
+                    embedding_fn=self.usage.wrap_embedding(
+                        self.traffic.wrap_embedding(create_embedding) if self.traffic is not None else create_embedding,
+                        agent="principle_flow"
+                    ),
                 )
 
                 # Setting of the Planner.
@@ -221,7 +271,8 @@ class PriM:
                     system_message=agent_config.get("system_prompt", None),
                     model_client=self._create_client(
                         llm_config=llm_config,
-                        cache_dir=self.cache_dir
+                        cache_dir=self.cache_dir,
+                        agent_name=agent_name
                     ),
                     model_client_stream=agent_config.get("streaming", False),
                     tools=[self.available_tools[_]
@@ -247,6 +298,7 @@ class PriM:
                     model_client=self._create_client(
                         llm_config=llm_config,
                         cache_dir=self.cache_dir,
+                        agent_name=agent_name,
                     ),
                     model_client_stream=agent_config.get("streaming", False),
                     tools=[self.available_tools[_] for _ in agent_config.get("tools", [])],
@@ -287,11 +339,30 @@ async def main():
     parser.add_argument("--prompted", action="store_true", help="Enable Planner's prompt, as the PiFlow is always serving as Plug-and-Play module, Planner can also direct guide the Hypothesis without reasoning/interpreting on the principle (off this), but in practice, we suggest using reasoning over suggested principle for better guidance. ")
     parser.add_argument("--sas",  action="store_true", help="Single agent only. Must be True. ")
     parser.add_argument("--debug", action="store_true")
+    parser.add_argument("--record", default=None, help="Record all LLM, embedding and tool traffic to this trace file (.jsonl.gz). ")
+    parser.add_argument("--replay", default=None, help="Serve all LLM, embedding and tool traffic from this recorded trace, without network access. ")
+    parser.add_argument("--replay_latency", choices=["original", "zero"], default="original", help="Reproduce the recorded latencies on replay, or answer immediately. ")
+    parser.add_argument("--cache_dir", default=None, help="Cache LLM responses in this directory and reuse them across runs (shared by all agents). ")
+    parser.add_argument("--cache_mode", choices=["readwrite", "readonly", "refresh"], default="readwrite", help="readonly: never store new responses; refresh: ignore cached responses but store new ones. ")
+    parser.add_argument("--cache_size_mb", type=float, default=1024, help="Evict the least recently used responses beyond this size. ")
+    parser.add_argument("--cache_ttl_h", type=float, default=None, help="Expire cached responses after this many hours (default: never). ")
+    parser.add_argument("--trace", default=None, help="Save timing spans of every agent turn, PrincipleFlow phase, LLM and tool call as a Chrome trace (JSON) to this path. ")
     args = parser.parse_args()
 
     if args.debug:
         logging.getLogger().setLevel(logging.DEBUG)
 
+    if args.trace:
+        tracing.enable(args.trace)
+
+    if args.record and args.replay:
+        parser.error("--record and --replay are mutually exclusive")
+    traffic = None
+    if args.record:
+        traffic = TrafficTrace(args.record, mode="record")
+    elif args.replay:
+        traffic = TrafficTrace(args.replay, mode="replay", latency=args.replay_latency)
+
     # ================== RUN ==================
     prim = PriM(
         args,
@@ -302,14 +373,34 @@ async def main():
         is_mas=False, # Set this False when using Hypothesis, Experiment and Analysis Agent only.
         is_principled=args.principled,
         is_prompted=args.prompted,
-        cache_dir=None
+        cache_dir=args.cache_dir,
+        traffic=traffic,
+        cache_size_mb=args.cache_size_mb,
+        cache_ttl_s=args.cache_ttl_h * 3600 if args.cache_ttl_h is not None else None,
+        cache_mode=args.cache_mode,
     )
 
     stream = prim.team.run_stream(
         task=prim.task,
     )
 
-    await Console(stream, output_stats=True)
+    try:
+        await Console(stream, output_stats=True)
+    finally:
+        if prim.principle_flow is not None:
+            await prim.principle_flow.wait_principles()
+        print(f"\nModel usage by agent and purpose (saved to {prim.save_dir}/usage.md):\n{prim.usage.save(prim.save_dir)}")
+        if prim.cache_storage is not None:
+            cache_stats = prim.cache_storage.stats()
+            save_results(cache_stats, os.path.join(prim.save_dir, "cache_stats.json"))
+            print(f"Response cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+                  f"({cache_stats['hit_ratio']:.1%}), {cache_stats['entries']} entries, {cache_stats['size_mb']:.1f} MB")
+            prim.cache_storage.close()
+        if traffic is not None:
+            traffic.close()
+            logger.info(f"Traffic {traffic.mode}: {dict(traffic.stats)}")
+        if args.trace:
+            logger.info(f"Trace saved to {tracing.disable()}")
 
 
 
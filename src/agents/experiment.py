@@ -19,13 +19,16 @@ from autogen_core.models import FunctionExecutionResult, CreateResult, Assistant
 from autogen_core.tools import Workbench
 from pydantic.dataclasses import dataclass
 
+from src.utils.autogen_compat import call_llm_kwargs, new_message_id, process_result_kwargs
+from src.utils.tracing import TracedLLMCallsMixin
+
 
 @dataclass
 class MyMessageType:
     content: str
 
 
-class ExperimentAgent(AssistantAgent):
+class ExperimentAgent(TracedLLMCallsMixin, AssistantAgent):
     """Agent responsible for analyzing data and results."""
     def __init__(
             self,
@@ -70,6 +73,7 @@ class ExperimentAgent(AssistantAgent):
         tool_call_summary_format = self._tool_call_summary_format
         output_content_type = self._output_content_type
         format_string = self._output_content_type_format
+        message_id = new_message_id()
 
 
         # STEP 1: Add new user/handoff messages to the model context
@@ -100,6 +104,7 @@ class ExperimentAgent(AssistantAgent):
                 agent_name=agent_name,
                 cancellation_token=cancellation_token,
                 output_content_type=output_content_type,
+                **call_llm_kwargs(message_id),
         ):
             if isinstance(inference_output, CreateResult):
                 model_result = inference_output
@@ -141,5 +146,6 @@ class ExperimentAgent(AssistantAgent):
                 tool_call_summary_format=tool_call_summary_format,
                 output_content_type=output_content_type,
                 format_string=format_string,
+                **process_result_kwargs(self, message_id),
         ):
             yield output_event
\ No newline at end of file
@@ -10,9 +10,11 @@ from autogen_agentchat.agents import AssistantAgent
 from autogen_agentchat.messages import TextMessage
 from autogen_core import message_handler, MessageContext, RoutedAgent
 
+from src.utils.tracing import TracedLLMCallsMixin
+
 init(autoreset=True)
 
-class HypothesisAgent(AssistantAgent):
+class HypothesisAgent(TracedLLMCallsMixin, AssistantAgent):
     """Agent responsible for analyzing data and results."""
     def __init__(
             self,
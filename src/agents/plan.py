@@ -19,11 +19,13 @@ from autogen_ext.models.openai import OpenAIChatCompletionClient
 from pydantic import BaseModel
 
 from src.group.workflow import PrincipleFlow
+from src.utils.autogen_compat import call_llm_kwargs, new_message_id, process_result_kwargs
+from src.utils.tracing import TracedLLMCallsMixin, traced
 
 event_logger = logging.getLogger(EVENT_LOGGER_NAME)
 
 
-class Planner(AssistantAgent):
+class Planner(TracedLLMCallsMixin, AssistantAgent):
     """Agent responsible for analyzing data and results."""
     def __init__(
             self,
@@ -61,6 +63,7 @@ class Planner(AssistantAgent):
 
         self.processed_messages = set()  # Track which messages have been processed
 
+    @traced("planner.turn")
     async def on_messages_stream(
             self, messages: Sequence[ChatMessage], cancellation_token: CancellationToken
     ) -> AsyncGenerator[AgentEvent | ChatMessage | Response, None]:
@@ -82,6 +85,7 @@ class Planner(AssistantAgent):
         tool_call_summary_format = self._tool_call_summary_format
         output_content_type = self._output_content_type
         format_string = self._output_content_type_format
+        message_id = new_message_id()
 
         # STEP 1: Add new user/handoff messages to the model context
         await self._add_messages_to_context(
@@ -139,6 +143,7 @@ class Planner(AssistantAgent):
                     agent_name=agent_name,
                     cancellation_token=cancellation_token,
                     output_content_type=output_content_type,
+                    **call_llm_kwargs(message_id),
             ):
                 if isinstance(inference_output, CreateResult):
                     model_result = inference_output
@@ -171,6 +176,7 @@ class Planner(AssistantAgent):
                     agent_name=agent_name,
                     cancellation_token=cancellation_token,
                     output_content_type=output_content_type,
+                    **call_llm_kwargs(message_id),
             ):
                 if isinstance(inference_output, CreateResult):
                     model_result = inference_output
@@ -224,52 +230,6 @@ class Planner(AssistantAgent):
                 tool_call_summary_format=tool_call_summary_format,
                 output_content_type=output_content_type,
                 format_string=format_string,
+                **process_result_kwargs(self, message_id),
         ):
             yield output_event
-
-    @classmethod
-    async def _call_llm(
-        cls,
-        model_client: OpenAIChatCompletionClient,
-        model_client_stream: bool,
-        system_messages: List[SystemMessage],
-        model_context: ChatCompletionContext,
-        workbench: Workbench,
-        handoff_tools: List[BaseTool[Any, Any]],
-        agent_name: str,
-        cancellation_token: CancellationToken,
-        output_content_type: type[BaseModel] | None,
-    ) -> AsyncGenerator[Union[CreateResult, ModelClientStreamingChunkEvent], None]:
-        """
-        Perform a model inference and yield either streaming chunk events or the final CreateResult.
-        """
-        all_messages = await model_context.get_messages()
-        llm_messages = cls._get_compatible_context(model_client=model_client, messages=system_messages + all_messages)
-
-        tools = (await workbench.list_tools()) + handoff_tools
-
-        if model_client_stream:
-            model_result: Optional[CreateResult] = None
-            async for chunk in model_client.create_stream(
-                llm_messages,
-                tools=tools,
-                json_output=output_content_type,
-                cancellation_token=cancellation_token,
-            ):
-                if isinstance(chunk, CreateResult):
-                    model_result = chunk
-                elif isinstance(chunk, str):
-                    yield ModelClientStreamingChunkEvent(content=chunk, source=agent_name)
-                else:
-                    raise RuntimeError(f"Invalid chunk type: {type(chunk)}")
-            if model_result is None:
-                raise RuntimeError("No final model result in streaming mode.")
-            yield model_result
-        else:
-            model_result = await model_client.create(
-                llm_messages,
-                tools=tools,
-                cancellation_token=cancellation_token,
-                json_output=output_content_type,
-            )
-            yield model_result
\ No newline at end of file
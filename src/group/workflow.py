@@ -1,11 +1,16 @@
+import ast
+import asyncio
 import math
 import logging
 import warnings
 import uuid
 from typing import (
     Any,
+    Callable,
     Dict,
     List,
+    Literal,
+    Optional,
     Sequence, Tuple,
 )
 import os
@@ -17,11 +22,19 @@ from autogen_ext.models.openai import OpenAIChatCompletionClient
 
 from autogen_agentchat.messages import ChatMessage, ToolCallSummaryMessage, TextMessage
 from autogen_core import EVENT_LOGGER_NAME
-from autogen_core.models import SystemMessage, UserMessage
+from autogen_core.models import ChatCompletionClient, SystemMessage, UserMessage
+
+from src.utils.accounting import llm_purpose
+from src.utils.tracing import span, traced
 
 
 event_logger = logging.getLogger(EVENT_LOGGER_NAME)
 
+# Hidden model calls of the PrincipleFlow, each routable to its own client.
+FLOW_PURPOSES = ("judge_hypothesis", "judge_experiment", "extract_principle")
+# Route answered without a model, for purposes with a deterministic rule (judge_experiment only).
+LOCAL_ROUTE = "local"
+
 
 @dataclass
 class Hypothesis:
@@ -45,6 +58,20 @@ class Principle:
         return self.experiment.output
 
 
+def create_embedding(sentence: str) -> List[float]:
+    """Embed a sentence with the model configured by the PIFLOW_EMBEDDING_MODEL_* variables"""
+    from openai import OpenAI
+    return OpenAI(
+        base_url=os.environ["PIFLOW_EMBEDDING_MODEL_URL"],
+        api_key=os.environ["PIFLOW_EMBEDDING_MODEL_API_KEY"],
+    ).embeddings.create(
+        model=os.environ["PIFLOW_EMBEDDING_MODEL_NAME"],
+        input=sentence,
+        dimensions=int(os.environ["PIFLOW_EMBEDDING_MODEL_DIMENSIONS"]),
+        encoding_format="float",
+    ).data[0].embedding
+
+
 class PrincipleFlow:
     def __init__(
             self,
@@ -55,12 +82,27 @@ class PrincipleFlow:
             is_principled: bool,
             model_client: OpenAIChatCompletionClient,
             save_dir: None,
+            embedding_fn: Optional[Callable[[str], List[float]]] = None,
+            routes: Optional[Dict[str, ChatCompletionClient | Literal["local"]]] = None,
     ):
         self.task: str = task
         self.objective: str = objective
         self.model_client = model_client
+        # Client per purpose in FLOW_PURPOSES; purposes without a route use model_client.
+        self.routes: Dict[str, ChatCompletionClient | Literal["local"]] = dict(routes or {})
+        for purpose, route in self.routes.items():
+            if purpose not in FLOW_PURPOSES:
+                raise ValueError(f"Unknown PrincipleFlow purpose '{purpose}', expected one of {FLOW_PURPOSES}")
+            # Routes are model clients or the LOCAL_ROUTE string; never compare a client to a string
+            if isinstance(route, str) and route != LOCAL_ROUTE:
+                raise ValueError(f"Unknown route '{route}' for '{purpose}', expected a model client or '{LOCAL_ROUTE}'")
+            if isinstance(route, str) and purpose != "judge_experiment":
+                raise ValueError(f"No local classifier for '{purpose}', route it to a model client")
+        self.embedding_fn = embedding_fn or create_embedding
 
         self.flow: List[Principle] = []
+        # Background principle extraction per principle id, awaited only when the texts are read.
+        self._pending_principles: Dict[str, asyncio.Task] = {}
 
         self.cached_embeddings: Dict[str, List] = {}
 
@@ -84,6 +126,10 @@ class PrincipleFlow:
         self.is_mas = is_mas,
         self.is_principle = is_principled,
 
+    def _client(self, purpose: str) -> ChatCompletionClient | Literal["local"]:
+        return self.routes.get(purpose, self.model_client)
+
+    @traced("flow.llm_assign_principle")
     async def llm_assign_principle(self, hypothesis: str, experiment_result: float) -> str:
         prompt = f"""
     Based on the following Rational of proposing hypothesis, extract or re-formulate a clear scientific principle grounded in physics or chemical mechanisms. 
@@ -97,10 +143,11 @@ class PrincipleFlow:
     Remember, you MUST: formulate a scientific principle with declarative sentence in custom voice, shortly and concisely (1-2 sentences) but include all rationale of hypothesizing, it is strongly recommended that using analyzing methods with (1) major premises, (2) minor premises, and using bullet points. Any other unrelated response will be strongly rejected. """
 
         try:
-            response = await self.model_client.create([
-                SystemMessage(content="You are a scientific principle extractor. You identify underlying scientific principles from hypotheses and experimental data. Formulate a scientific principle with declarative sentence in custom voice, shortly and concisely (1-2 sentences) but include all rationale of hypothesizing, it is strongly recommended that using analyzing methods with (1) major premises, (2) minor premises, and using bullet points. "),
-                UserMessage(content=prompt, source="user")
-            ])
+            with llm_purpose("extract_principle"):
+                response = await self._client("extract_principle").create([
+                    SystemMessage(content="You are a scientific principle extractor. You identify underlying scientific principles from hypotheses and experimental data. Formulate a scientific principle with declarative sentence in custom voice, shortly and concisely (1-2 sentences) but include all rationale of hypothesizing, it is strongly recommended that using analyzing methods with (1) major premises, (2) minor premises, and using bullet points. "),
+                    UserMessage(content=prompt, source="user")
+                ])
 
             principle = response.content.strip()
             return principle
@@ -113,21 +160,37 @@ class PrincipleFlow:
         self.current_candidate = ""
         self.current_result = 0.0
 
-    async def _add_principle_node(self) -> Principle:
+    def _add_principle_node(self) -> Principle:
+        """Append the principle of the current hypothesis and experiment; its text is extracted in the background"""
         hypothesis_obj = Hypothesis(content=self.current_hypothesis)
         experiment_obj = Experiment(input=self.current_candidate, output=self.current_result)
 
         self.all_evidences.append(experiment_obj)
-        principle_text = await self.llm_assign_principle(hypothesis_obj.content, experiment_obj.output)
         new_principle = Principle(
             hypothesis=hypothesis_obj,
             experiment=experiment_obj,
-            llm_claimed_principle=principle_text
+            llm_claimed_principle=""
         )
 
         self.flow.append(new_principle)
+        self._pending_principles[new_principle.id] = asyncio.create_task(
+            self.llm_assign_principle(hypothesis_obj.content, experiment_obj.output),
+            name=f"extract_principle-{len(self.flow)}",
+        )
         return new_principle
 
+    async def wait_principles(self, principles: Optional[Sequence[Principle]] = None) -> None:
+        """Wait for the extraction of `principles` (default: the whole flow) and fill in their texts"""
+        principles = self.flow if principles is None else principles
+        pending = [p for p in principles if p.id in self._pending_principles]
+        if not pending:
+            return
+        with span("flow.wait_principles", pending=len(pending)):
+            texts = await asyncio.gather(*(self._pending_principles[p.id] for p in pending))
+        for principle, text in zip(pending, texts):
+            principle.llm_claimed_principle = text
+            del self._pending_principles[principle.id]
+
     def _is_current_hypo_valid_complete(self) -> bool:
         return (
                 self.current_hypothesis and
@@ -136,23 +199,39 @@ class PrincipleFlow:
         )
 
 
+    @traced("flow.judge_hypothesis")
     async def _judge_hypothesis(self, message) -> bool:
-        judgement = await self.model_client.create(
-            messages=[
-            SystemMessage(content="You are dealing with a text classification task. Only response with `YES` or `NO`. Other responses will be strongly rejected. Testable hypothesis means it contains specific molecule or parameters. [Meta Instruct] Only ONE word are allowed to say. "),
-            UserMessage(content=f"Is the following text containing a scientific hypothesis that can be experimentally tested? Answer YES if it is, else NO. \n\n {message.content}", source="user")
-        ])
+        with llm_purpose("judge_hypothesis"):
+            judgement = await self._client("judge_hypothesis").create(
+                messages=[
+                SystemMessage(content="You are dealing with a text classification task. Only response with `YES` or `NO`. Other responses will be strongly rejected. Testable hypothesis means it contains specific molecule or parameters. [Meta Instruct] Only ONE word are allowed to say. "),
+                UserMessage(content=f"Is the following text containing a scientific hypothesis that can be experimentally tested? Answer YES if it is, else NO. \n\n {message.content}", source="user")
+            ])
         judge = judgement.content.strip()
         return "yes" in judgement.content.lower()
 
+    @traced("flow.judge_experiment")
     async def _judge_experiment(self, message) -> bool:
-        judgement = await self.model_client.create([
-            SystemMessage(content="You are dealing with a scientific text classification task. Only response with `YES` or `NO`. Other responses will be strongly rejected. [Meta Instruct] Only ONE word are allowed to say. "),
-            UserMessage(content=f"Is the following text an experiment result with JSON format (typically include fields such as tool_name, success, error)? Answer YES if it is, else NO. \n\n {message.content}", source="user")
-        ])
+        client = self._client("judge_experiment")
+        if isinstance(client, str):  # LOCAL_ROUTE
+            return self._is_experiment_record(message.content)
+        with llm_purpose("judge_experiment"):
+            judgement = await client.create([
+                SystemMessage(content="You are dealing with a scientific text classification task. Only response with `YES` or `NO`. Other responses will be strongly rejected. [Meta Instruct] Only ONE word are allowed to say. "),
+                UserMessage(content=f"Is the following text an experiment result with JSON format (typically include fields such as tool_name, success, error)? Answer YES if it is, else NO. \n\n {message.content}", source="user")
+            ])
         judge = judgement.content.strip()
         return "yes" in judgement.content.lower()
 
+    @staticmethod
+    def _is_experiment_record(content: str) -> bool:
+        """Local judge: the (first) tool call summary is a dict literal with the experiment's input and output"""
+        try:
+            record = ast.literal_eval(content.strip().split("\n")[0])
+        except (ValueError, TypeError, SyntaxError):
+            return False
+        return isinstance(record, dict) and "input" in record and "output" in record
+
 
     def _report_to_experiment(self, experiment_dict: Dict[str, Any]) -> None:
         self.experiments.append({
@@ -161,21 +240,14 @@ class PrincipleFlow:
         })
 
     def embed_hypothesis(self, sentence):
-        from openai import OpenAI
         if sentence in self.cached_embeddings.keys():
             embedding = self.cached_embeddings[sentence]
         else:
-            embedding = OpenAI(
-                base_url=os.environ["PIFLOW_EMBEDDING_MODEL_URL"],
-                api_key=os.environ["PIFLOW_EMBEDDING_MODEL_API_KEY"],
-            ).embeddings.create(
-                model=os.environ["PIFLOW_EMBEDDING_MODEL_NAME"],
-                input=sentence,
-                dimensions=int(os.environ["PIFLOW_EMBEDDING_MODEL_DIMENSIONS"]),
-                encoding_format="float",
-            ).data[0].embedding
+            with span("flow.embedding", chars=len(sentence)):
+                embedding = self.embedding_fn(sentence)
         return embedding
 
+    @traced("flow.listen_messages")
     async def listen_messages(self, messages: Sequence[ChatMessage]):
         is_new_hypothesis_found = False
         is_new_experiment_found = False
@@ -208,7 +280,7 @@ class PrincipleFlow:
                         is_new_experiment_found = True
 
         if is_new_hypothesis_found and is_new_experiment_found and self._is_current_hypo_valid_complete():
-            principle = await self._add_principle_node()
+            principle = self._add_principle_node()
             self._reset_curr_state()
 
         return None
@@ -378,6 +450,7 @@ class PrincipleFlow:
 
         return action_type, suggestion
 
+    @traced("flow.suggest_action")
     async def suggest_action(self) -> str:
         action_info = {
             "timestamp": time.time(),
@@ -390,6 +463,8 @@ class PrincipleFlow:
         if not self.flow or len(self.flow) < 3:
             return "[PrincipleFlow Suggestion] Initialize one hypothesis to explore as an attempt. Diverse information is crucial for determining the selection. "
 
+        # Scoring reads every principle's text (embeddings, recorded knowledge state).
+        await self.wait_principles()
 
         principles_data = self._extract_principles_data()
         action_info["knowledge_state"]["principles"] = principles_data
@@ -1,11 +1,17 @@
 from ._chembl35_tools import (
     characterize_pchembl_value,
+    expand_pchembl_analogs,
+    find_similar_chembl_compounds,
 )
 
 from ._nanohelix_tools import (
     characterize_nanohelix_gfactor,
+    optimize_nanohelix_gfactor,
 )
 
 from ._supercon_tools import (
     characterize_Tc_value,
+    characterize_Tc_uncertainty,
+    explore_Tc_variants,
+    find_similar_superconductors,
 )
\ No newline at end of file
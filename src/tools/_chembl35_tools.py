@@ -64,9 +64,123 @@ def characterize_pchembl_value(
         }
 
 
+@tool(
+    name="expand_pchembl_analogs",
+    description="Explore the chemical neighborhood of a seed molecule in one call. The service enumerates local analogs of the seed SMILES (substituent swaps, ring edits and bioisosteric replacements), predicts the pChEMBL value of every analog in one batch and returns the seed's prediction together with the top_k analogs ranked by predicted pChEMBL value. Each analog reports the transform that produced it.",
+)
+def expand_pchembl_analogs(
+    smiles: Annotated[str, "ONE seed SMILES string"],
+    top_k: Annotated[int, "Number of best-ranked analogs to return (1-50)"],
+) -> Dict[str, Any]:
+    """
+    Rank single-step analogs of a seed molecule by predicted pChEMBL value.
+
+    Args:
+        smiles: Seed SMILES string
+        top_k: Number of best-ranked analogs to return
+
+    Returns:
+        Dictionary whose output holds the seed prediction, the number of enumerated
+        analogs and the top_k analogs with their transform and predicted pChEMBL value
+    """
+    if not isinstance(smiles, str):
+        return {
+            "tool_name": "expand_pchembl_analogs",
+            "success": False,
+            "error": f"Must be only ONE smiles string.",
+            "smiles": smiles
+        }
+
+    try:
+        response = requests.post(
+            "http://127.0.0.1:12500/analogs",
+            data=json.dumps({'smiles': smiles, 'top_k': max(1, min(int(top_k), 50))}),
+            headers={'Content-type': 'application/json'}
+        ).json()
+
+        response["tool_name"] = "expand_pchembl_analogs"
+        return response
+
+    except requests.exceptions.RequestException as e:
+        return {
+            "tool_name": "expand_pchembl_analogs",
+            "success": False,
+            "error": f"API request failed: {str(e)}",
+            "smiles": smiles
+        }
+    except Exception as e:
+        return {
+            "tool_name": "expand_pchembl_analogs",
+            "success": False,
+            "error": f"Error processing request: {str(e)}",
+            "smiles": smiles
+        }
+
+
+@tool(
+    name="find_similar_chembl_compounds",
+    description="Retrieve the k known ChEMBL compounds most similar to a SMILES (Tanimoto similarity on Morgan fingerprints) from the training set of the pChEMBL model, together with their measured pChEMBL values. Use it to check whether a proposed molecule is close to molecules the model has seen (max_similarity near 1 means well covered, below about 0.3 means the prediction is an extrapolation) and to ground hypotheses in measured activities of close analogs.",
+)
+def find_similar_chembl_compounds(
+    smiles: Annotated[str, "ONE query SMILES string"],
+    k: Annotated[int, "Number of neighbors to return (1-100)"],
+) -> Dict[str, Any]:
+    """
+    Nearest training-set molecules of a query SMILES.
+
+    Args:
+        smiles: Query SMILES string
+        k: Number of neighbors to return
+
+    Returns:
+        Dictionary whose output holds the max similarity and the k neighbors with
+        their SMILES, measured pChEMBL value and Tanimoto similarity
+    """
+    if not isinstance(smiles, str):
+        return {
+            "tool_name": "find_similar_chembl_compounds",
+            "success": False,
+            "error": f"Must be only ONE smiles string.",
+            "smiles": smiles
+        }
+
+    try:
+        response = requests.post(
+            "http://127.0.0.1:12500/neighbors",
+            data=json.dumps({'smiles': smiles, 'k': max(1, min(int(k), 100))}),
+            headers={'Content-type': 'application/json'}
+        ).json()
+
+        response["tool_name"] = "find_similar_chembl_compounds"
+        return response
+
+    except requests.exceptions.RequestException as e:
+        return {
+            "tool_name": "find_similar_chembl_compounds",
+            "success": False,
+            "error": f"API request failed: {str(e)}",
+            "smiles": smiles
+        }
+    except Exception as e:
+        return {
+            "tool_name": "find_similar_chembl_compounds",
+            "success": False,
+            "error": f"Error processing request: {str(e)}",
+            "smiles": smiles
+        }
+
+
 if __name__ == '__main__':
 
     # test tools.
     result_characterize_pchembl_value = characterize_pchembl_value("CCOCC")
     print("result_characterize_pchembl_value: ")
-    print(result_characterize_pchembl_value, end="\n\n")
\ No newline at end of file
+    print(result_characterize_pchembl_value, end="\n\n")
+
+    result_expand_pchembl_analogs = expand_pchembl_analogs("CC(=O)Oc1ccccc1C(=O)O", top_k=5)
+    print("result_expand_pchembl_analogs: ")
+    print(result_expand_pchembl_analogs, end="\n\n")
+
+    result_find_similar_chembl_compounds = find_similar_chembl_compounds("CC(=O)Oc1ccccc1C(=O)O", k=5)
+    print("result_find_similar_chembl_compounds: ")
+    print(result_find_similar_chembl_compounds, end="\n\n")
@@ -73,6 +73,82 @@ def characterize_nanohelix_gfactor(
         }
 
 
+@tool(
+    name="optimize_nanohelix_gfactor",
+    description="Search the whole nanohelix design space (pitch 60-200 nm, fiber_radius 20-60 nm, n_turns 3-10, helix_radius 20-90 nm) with a surrogate-driven optimizer and return the top-k distinct geometries with their predicted g-factors in one call. Set `maximize` to false to search for the lowest g-factor. Give a value for any of fiber_radius, helix_radius, n_turns and pitch to hold that parameter fixed during the search, or null to optimize it. All input are float without units. ",
+)
+def optimize_nanohelix_gfactor(
+        top_k: Annotated[int, "Number of distinct geometries to return (1-50)"],
+        maximize: Annotated[bool, "Search for the highest g-factor if true, the lowest if false"],
+        fiber_radius: Annotated[Optional[float], "Hold the fiber radius fixed at this value (in nm), or null to optimize it"],
+        helix_radius: Annotated[Optional[float], "Hold the helix radius fixed at this value (in nm), or null to optimize it"],
+        n_turns: Annotated[Optional[float], "Hold the number of turns fixed at this value, or null to optimize it"],
+        pitch: Annotated[Optional[float], "Hold the pitch fixed at this value (in nm), or null to optimize it"]
+) -> Dict[str, Any]:
+    """
+    Finds the nanohelix geometries with the highest (or lowest) predicted g-factor.
+
+    The service runs a differential-evolution search directly against the g-factor model,
+    scoring every generation in one batched call, and returns distinct top-k designs.
+
+    Args:
+        top_k: Number of distinct geometries to return (1-50)
+        maximize: Search for the highest g-factor if true, the lowest if false
+        fiber_radius: Fixed fiber radius (in nm), or None to optimize it
+        helix_radius: Fixed helix radius (in nm), or None to optimize it
+        n_turns: Fixed number of turns, or None to optimize it
+        pitch: Fixed pitch (in nm), or None to optimize it
+
+    Returns:
+        Dictionary whose output is a list of geometries with their predicted g-factor, best first
+    """
+    # Construct input data
+    fixed = {
+        "fiber_radius": fiber_radius,
+        "helix_radius": helix_radius,
+        "n_turns": n_turns,
+        "pitch": pitch
+    }
+    input_data = {
+        "top_k": top_k,
+        "maximize": maximize,
+        "fixed": {name: value for name, value in fixed.items() if value is not None}
+    }
+
+    # Call the API
+    try:
+        response = requests.post(
+            "http://127.0.0.1:12501/optimize",
+            data=json.dumps(input_data),
+            headers={'Content-type': 'application/json'}
+        ).json()
+
+        return {
+            "tool_name": "optimize_nanohelix_gfactor",
+            "input": input_data,
+            "output": response["output"],
+            "success": response["success"],
+            "error": response["error"] if not response["success"] else None
+        }
+
+    except requests.exceptions.RequestException as e:
+        return {
+            "tool_name": "optimize_nanohelix_gfactor",
+            "input": input_data,
+            "output": None,
+            "success": False,
+            "error": f"API request failed: {str(e)}"
+        }
+    except Exception as e:
+        return {
+            "tool_name": "optimize_nanohelix_gfactor",
+            "input": input_data,
+            "output": None,
+            "success": False,
+            "error": f"Error processing request: {str(e)}"
+        }
+
+
 if __name__ == '__main__':
     # Test predict_nanohelix_gfactor tool
     result_predict = characterize_nanohelix_gfactor(
@@ -82,4 +158,16 @@ if __name__ == '__main__':
         pitch=0.74
     )
     print("predict_nanohelix_gfactor result:")
-    print(result_predict, end="\n\n")
\ No newline at end of file
+    print(result_predict, end="\n\n")
+
+    # Test optimize_nanohelix_gfactor tool
+    result_optimize = optimize_nanohelix_gfactor(
+        top_k=3,
+        maximize=True,
+        fiber_radius=None,
+        helix_radius=None,
+        n_turns=5,
+        pitch=None
+    )
+    print("optimize_nanohelix_gfactor result:")
+    print(result_optimize, end="\n\n")
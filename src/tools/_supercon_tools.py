@@ -50,6 +50,136 @@ def characterize_Tc_value(
         }
 
 
+@tool(
+    name="characterize_Tc_uncertainty",
+    description="Characterize the Tc value of a superconductor material together with the model's confidence. The input `element` is the chemical formula of the material (e.g., 'Ba0.2La1.8Cu1O4-Y'). The tool returns `tc`, the predicted critical temperature in Kelvin (mean over Monte-Carlo dropout samples), and `tc_std`, its standard deviation. A large `tc_std` means the material is far from what the model has learned and the prediction should be trusted less.",
+)
+def characterize_Tc_uncertainty(
+    element: Annotated[str, "Chemical formula of the material"],
+) -> Dict[str, Any]:
+    if not isinstance(element, str):
+        return {
+            "tool_name": "characterize_Tc_uncertainty",
+            "success": False,
+            "error": f"Must be only ONE element string of the material.",
+            "element": element
+        }
+
+    try:
+        response = requests.post(
+            "http://127.0.0.1:12502/predict",
+            data=json.dumps({'element': element, 'uncertainty': True}),
+            headers={'Content-type': 'application/json'}
+        ).json()
+
+        response["tool_name"] = "characterize_Tc_uncertainty"
+        return response
+
+    except requests.exceptions.RequestException as e:
+        return {
+            "tool_name": "characterize_Tc_uncertainty",
+            "success": False,
+            "error": f"API request failed: {str(e)}",
+            "element": element
+        }
+    except Exception as e:
+        return {
+            "tool_name": "characterize_Tc_uncertainty",
+            "success": False,
+            "error": f"Error processing request: {str(e)}",
+            "element": element
+        }
+
+
+@tool(
+    name="explore_Tc_variants",
+    description="Explore the composition neighborhood of a parent superconductor in one call. The input `element` is the chemical formula of the parent material (e.g., 'Ba0.2La1.8Cu1O4'). The service enumerates doping/substitution variants (a fraction of one host element replaced by a dopant) and stoichiometry variants (one host element scaled up or down), predicts the critical temperature (Tc, in Kelvin) of all of them in one batch and returns the parent Tc with the top_k variants ranked by predicted Tc. Pass a list of element symbols as `dopants` to restrict the substituting elements, or an empty list to try all known elements.",
+)
+def explore_Tc_variants(
+    element: Annotated[str, "Chemical formula of the parent material"],
+    top_k: Annotated[int, "Number of best-ranked variants to return (1-100)"],
+    dopants: Annotated[List[str], "Element symbols allowed as dopants; empty list for all known elements"],
+) -> Dict[str, Any]:
+    if not isinstance(element, str):
+        return {
+            "tool_name": "explore_Tc_variants",
+            "success": False,
+            "error": f"Must be only ONE element string of the material.",
+            "element": element
+        }
+
+    input_data = {'element': element, 'top_k': max(1, min(int(top_k), 100))}
+    if dopants:
+        input_data['dopants'] = list(dopants)
+
+    try:
+        response = requests.post(
+            "http://127.0.0.1:12502/variants",
+            data=json.dumps(input_data),
+            headers={'Content-type': 'application/json'}
+        ).json()
+
+        response["tool_name"] = "explore_Tc_variants"
+        return response
+
+    except requests.exceptions.RequestException as e:
+        return {
+            "tool_name": "explore_Tc_variants",
+            "success": False,
+            "error": f"API request failed: {str(e)}",
+            "element": element
+        }
+    except Exception as e:
+        return {
+            "tool_name": "explore_Tc_variants",
+            "success": False,
+            "error": f"Error processing request: {str(e)}",
+            "element": element
+        }
+
+
+@tool(
+    name="find_similar_superconductors",
+    description="Retrieve the k known superconductors whose composition is closest to a chemical formula (L1 distance between atomic-fraction vectors, from 0 for identical compositions to 2 for no shared elements), together with their measured critical temperature (Tc) in Kelvin. The input `element` is the chemical formula of the material (e.g., 'La1.85Sr0.15Cu1O4'). Use it to check whether a proposed material is close to known materials and to ground hypotheses in measured Tc values.",
+)
+def find_similar_superconductors(
+    element: Annotated[str, "Chemical formula of the query material"],
+    k: Annotated[int, "Number of neighbors to return (1-100)"],
+) -> Dict[str, Any]:
+    if not isinstance(element, str):
+        return {
+            "tool_name": "find_similar_superconductors",
+            "success": False,
+            "error": f"Must be only ONE element string of the material.",
+            "element": element
+        }
+
+    try:
+        response = requests.post(
+            "http://127.0.0.1:12502/neighbors",
+            data=json.dumps({'element': element, 'k': max(1, min(int(k), 100))}),
+            headers={'Content-type': 'application/json'}
+        ).json()
+
+        response["tool_name"] = "find_similar_superconductors"
+        return response
+
+    except requests.exceptions.RequestException as e:
+        return {
+            "tool_name": "find_similar_superconductors",
+            "success": False,
+            "error": f"API request failed: {str(e)}",
+            "element": element
+        }
+    except Exception as e:
+        return {
+            "tool_name": "find_similar_superconductors",
+            "success": False,
+            "error": f"Error processing request: {str(e)}",
+            "element": element
+        }
+
+
 if __name__ == '__main__':
     # test tools.
     result_characterize_pchembl_value = characterize_Tc_value(
@@ -57,4 +187,16 @@ if __name__ == '__main__':
     )
 
     print("result_characterize_pchembl_value: ")
-    print(result_characterize_pchembl_value, end="\n\n")
\ No newline at end of file
+    print(result_characterize_pchembl_value, end="\n\n")
+
+    result_characterize_Tc_uncertainty = characterize_Tc_uncertainty("Nb3Sn1")
+    print("result_characterize_Tc_uncertainty: ")
+    print(result_characterize_Tc_uncertainty, end="\n\n")
+
+    result_explore_Tc_variants = explore_Tc_variants("Ba0.2La1.8Cu1O4", top_k=5, dopants=["Sr", "Ca"])
+    print("result_explore_Tc_variants: ")
+    print(result_explore_Tc_variants, end="\n\n")
+
+    result_find_similar_superconductors = find_similar_superconductors("La1.85Sr0.15Cu1O4", k=5)
+    print("result_find_similar_superconductors: ")
+    print(result_find_similar_superconductors, end="\n\n")
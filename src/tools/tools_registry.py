@@ -1,6 +1,8 @@
 import inspect
 from autogen_core.tools import FunctionTool
 
+from src.utils.tracing import traced
+
 _TOOL_REGISTRY = {}
 
 
@@ -35,13 +37,15 @@ def tool(name=None, description=None):
     return decorator
 
 
-def collect_tools(function_tool_class, modules=None):
+def collect_tools(function_tool_class, modules=None, wrap=None):
     """
     Create FunctionTool objects for all registered tools.
 
     Args:
         function_tool_class: The FunctionTool class from your framework
         modules: Optional list of modules to scan for additional tools
+        wrap: Optional decorator applied to every tool function (it must keep the signature,
+            e.g. TrafficTrace.wrap_tool for recording and replaying tool results)
 
     Returns:
         Dict mapping tool names to FunctionTool objects
@@ -59,8 +63,10 @@ def collect_tools(function_tool_class, modules=None):
     # Create FunctionTool objects for each registered function
     tool_dict = {}
     for name, func in _TOOL_REGISTRY.items():
+        # Each call is a span "tool.<name>" when tracing is enabled
+        tool_func = traced(f"tool.{name}", *inspect.signature(func).parameters)(wrap(func) if wrap is not None else func)
         tool_dict[name] = function_tool_class(
-            func=func,
+            func=tool_func,
             name=name,
             description=func._tool_description,
             strict=True
@@ -0,0 +1,190 @@
+"""
+Per-agent, per-purpose accounting of model calls.
+
+Every chat client created by PriM is wrapped in an AccountedChatCompletionClient that books
+each call (tokens, latency, cache hits, errors) under its agent and the current purpose.
+Purposes default to "chat" and are set around hidden calls with `llm_purpose`, so the
+PrincipleFlow judges and principle extraction show up separately from the agents' turns:
+
+    ledger = UsageLedger()
+    client = ledger.wrap_client(openai_client, agent="principle_flow")
+    with llm_purpose("judge_hypothesis"):
+        await client.create(messages)
+    ledger.save("results/")        # usage.json and usage.md
+"""
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, AsyncGenerator, Callable, Dict, List, Literal, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from autogen_core import CancellationToken
+from autogen_core.models import ChatCompletionClient, CreateResult, LLMMessage, RequestUsage
+from autogen_core.tools import Tool, ToolSchema
+from pydantic import BaseModel
+
+from src.utils.clients import DelegatingChatCompletionClient
+
+_purpose: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("llm_purpose", default=None)
+
+
+@contextmanager
+def llm_purpose(name: str):
+    """Attribute the model calls made inside the block to `name`"""
+    token = _purpose.set(name)
+    try:
+        yield
+    finally:
+        _purpose.reset(token)
+
+
+class UsageLedger:
+    """Thread-safe totals of calls, tokens, latency, cache hits and errors by (agent, purpose)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.entries: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    def record(self, agent: str, purpose: str, latency: float, usage: Optional[RequestUsage] = None,
+               cached: bool = False, error: bool = False) -> None:
+        with self._lock:
+            entry = self.entries.get((agent, purpose))
+            if entry is None:
+                entry = self.entries[(agent, purpose)] = {
+                    "calls": 0, "cache_hits": 0, "errors": 0, "prompt_tokens": 0, "completion_tokens": 0, "latencies": [],
+                }
+            entry["calls"] += 1
+            entry["cache_hits"] += int(cached)
+            entry["errors"] += int(error)
+            entry["latencies"].append(latency)
+            if usage is not None and not cached:
+                entry["prompt_tokens"] += usage.prompt_tokens
+                entry["completion_tokens"] += usage.completion_tokens
+
+    def wrap_client(self, client: ChatCompletionClient, agent: str) -> "AccountedChatCompletionClient":
+        return AccountedChatCompletionClient(client, self, agent)
+
+    def wrap_embedding(self, func: Callable[[str], List[float]], agent: str) -> Callable[[str], List[float]]:
+        """Book every call of an embedding function under (agent, "embedding")"""
+
+        @functools.wraps(func)
+        def wrapper(sentence: str) -> List[float]:
+            start = time.perf_counter()
+            try:
+                embedding = func(sentence)
+            except Exception:
+                self.record(agent, "embedding", time.perf_counter() - start, error=True)
+                raise
+            self.record(agent, "embedding", time.perf_counter() - start)
+            return embedding
+
+        return wrapper
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """One row per (agent, purpose), sorted by total latency"""
+        with self._lock:
+            items = [(key, dict(entry), list(entry["latencies"])) for key, entry in self.entries.items()]
+        rows = []
+        for (agent, purpose), entry, latencies in items:
+            rows.append({
+                "agent": agent,
+                "purpose": purpose,
+                "calls": entry["calls"],
+                "cache_hits": entry["cache_hits"],
+                "errors": entry["errors"],
+                "prompt_tokens": entry["prompt_tokens"],
+                "completion_tokens": entry["completion_tokens"],
+                "total_latency_s": float(sum(latencies)),
+                "mean_latency_s": float(np.mean(latencies)),
+                "p95_latency_s": float(np.percentile(latencies, 95)),
+            })
+        return sorted(rows, key=lambda row: -row["total_latency_s"])
+
+    def table(self) -> str:
+        """Markdown table of summary() with a total row"""
+        rows = self.summary()
+        header = "| agent | purpose | calls | cache hits | errors | prompt tokens | completion tokens | total latency (s) | mean (s) | p95 (s) |"
+        lines = [header, "|" + "---|" * (header.count("|") - 1)]
+        for row in rows:
+            lines.append(
+                f"| {row['agent']} | {row['purpose']} | {row['calls']} | {row['cache_hits']} | {row['errors']} | "
+                f"{row['prompt_tokens']} | {row['completion_tokens']} | {row['total_latency_s']:.2f} | "
+                f"{row['mean_latency_s']:.3f} | {row['p95_latency_s']:.3f} |"
+            )
+        if rows:
+            lines.append(
+                f"| **total** | | {sum(r['calls'] for r in rows)} | {sum(r['cache_hits'] for r in rows)} | "
+                f"{sum(r['errors'] for r in rows)} | {sum(r['prompt_tokens'] for r in rows)} | "
+                f"{sum(r['completion_tokens'] for r in rows)} | {sum(r['total_latency_s'] for r in rows):.2f} | | |"
+            )
+        return "\n".join(lines)
+
+    def save(self, save_dir: str) -> str:
+        """Write usage.json and usage.md to save_dir; returns the table"""
+        os.makedirs(save_dir, exist_ok=True)
+        with open(os.path.join(save_dir, "usage.json"), "w") as f:
+            json.dump(self.summary(), f, indent=4)
+        table = self.table()
+        with open(os.path.join(save_dir, "usage.md"), "w") as f:
+            f.write(table + "\n")
+        return table
+
+
+class AccountedChatCompletionClient(DelegatingChatCompletionClient):
+    """ChatCompletionClient wrapper booking every call in a UsageLedger under its agent and purpose"""
+
+    def __init__(self, client: ChatCompletionClient, ledger: UsageLedger, agent: str):
+        super().__init__(client)
+        self.ledger = ledger
+        self.agent = agent
+
+    async def create(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Tool | ToolSchema] = [],
+        tool_choice: Tool | Literal["auto", "required", "none"] = "auto",
+        json_output: Optional[bool | type[BaseModel]] = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> CreateResult:
+        purpose = _purpose.get() or "chat"
+        start = time.perf_counter()
+        try:
+            result = await self.client.create(
+                messages, tools=tools, tool_choice=tool_choice, json_output=json_output,
+                extra_create_args=extra_create_args, cancellation_token=cancellation_token,
+            )
+        except Exception:
+            self.ledger.record(self.agent, purpose, time.perf_counter() - start, error=True)
+            raise
+        self.ledger.record(self.agent, purpose, time.perf_counter() - start, result.usage, result.cached)
+        return result
+
+    async def create_stream(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Tool | ToolSchema] = [],
+        tool_choice: Tool | Literal["auto", "required", "none"] = "auto",
+        json_output: Optional[bool | type[BaseModel]] = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> AsyncGenerator[Union[str, CreateResult], None]:
+        purpose = _purpose.get() or "chat"
+        start = time.perf_counter()
+        try:
+            async for item in self.client.create_stream(
+                messages, tools=tools, tool_choice=tool_choice, json_output=json_output,
+                extra_create_args=extra_create_args, cancellation_token=cancellation_token,
+            ):
+                if isinstance(item, CreateResult):
+                    self.ledger.record(self.agent, purpose, time.perf_counter() - start, item.usage, item.cached)
+                yield item
+        except Exception:
+            self.ledger.record(self.agent, purpose, time.perf_counter() - start, error=True)
+            raise
@@ -0,0 +1,35 @@
+"""
+Compatibility of the agents' AssistantAgent overrides with autogen-agentchat 0.5 to 0.7.
+
+The planner and experiment agents re-implement `on_messages_stream` against the 0.5 internals.
+From 0.6 on, `_call_llm` / `_process_model_result` also take a message id and the tool-iteration
+settings. These helpers pass the extra arguments only when the installed version expects them.
+"""
+import inspect
+import uuid
+from typing import Any, Dict
+
+from autogen_agentchat.agents import AssistantAgent
+
+_CALL_LLM_PARAMS = inspect.signature(AssistantAgent._call_llm).parameters
+_PROCESS_RESULT_PARAMS = inspect.signature(AssistantAgent._process_model_result).parameters
+
+
+def new_message_id() -> str:
+    return str(uuid.uuid4())
+
+
+def call_llm_kwargs(message_id: str) -> Dict[str, Any]:
+    """Extra keyword arguments of AssistantAgent._call_llm in the installed version"""
+    return {'message_id': message_id} if 'message_id' in _CALL_LLM_PARAMS else {}
+
+
+def process_result_kwargs(agent: AssistantAgent, message_id: str) -> Dict[str, Any]:
+    """Extra keyword arguments of AssistantAgent._process_model_result in the installed version"""
+    extra = {
+        'message_id': message_id,
+        'tool_call_summary_formatter': getattr(agent, '_tool_call_summary_formatter', None),
+        'max_tool_iterations': getattr(agent, '_max_tool_iterations', 1),
+    }
+    return {name: value for name, value in extra.items() if name in _PROCESS_RESULT_PARAMS}
+
@@ -0,0 +1,144 @@
+"""
+Whole-run response cache for the model clients of PriM.
+
+All clients share one ResponseStore (diskcache with an LRU size limit and an optional TTL),
+and StableChatCompletionCache keys every request by content that is stable across reruns:
+the model and its sampling arguments, the messages with tool-call ids replaced by their
+order of appearance and without reasoning `thought`s, the tools, the output format and the
+non-volatile create arguments. A rerun of the same task therefore hits the cache for
+every turn until the conversation first diverges.
+
+    store = ResponseStore("cache/", size_limit_mb=1024, ttl_s=7 * 24 * 3600)
+    client = StableChatCompletionCache(openai_client, store)
+    ...
+    store.stats()     # {"hits": ..., "misses": ..., "hit_ratio": ..., "entries": ..., ...}
+"""
+import hashlib
+import json
+import threading
+from typing import Any, Dict, Mapping, Optional, Sequence, Union
+
+from autogen_core import CacheStore
+from autogen_core.models import ChatCompletionClient, CreateResult, LLMMessage
+from autogen_core.tools import Tool, ToolSchema
+from autogen_ext.models.cache import CHAT_CACHE_VALUE_TYPE, ChatCompletionCache
+from diskcache import Cache
+from pydantic import BaseModel
+
+CACHE_MODES = ("readwrite", "readonly", "refresh")
+
+# Create arguments that change between runs without changing the answer
+VOLATILE_CREATE_ARGS = frozenset({"user", "timeout", "extra_headers", "stream_options"})
+
+
+def model_args(client: ChatCompletionClient) -> Dict[str, Any]:
+    """Model name and sampling arguments of the innermost client under any wrappers"""
+    while not hasattr(client, "_create_args") and hasattr(client, "client"):
+        client = client.client
+    return {key: value for key, value in getattr(client, "_create_args", {}).items() if key not in VOLATILE_CREATE_ARGS}
+
+
+def _stable_messages(messages: Sequence[LLMMessage]) -> list:
+    call_ids: Dict[str, str] = {}
+
+    def call_id(value):
+        return call_ids.setdefault(value, f"call_{len(call_ids)}")
+
+    stable = []
+    for message in messages:
+        data = message.model_dump(mode="json")
+        data.pop("thought", None)
+        if isinstance(data.get("content"), list):
+            for item in data["content"]:
+                if isinstance(item, dict):
+                    if "call_id" in item:
+                        item["call_id"] = call_id(item["call_id"])
+                    elif "id" in item and "arguments" in item:
+                        item["id"] = call_id(item["id"])
+        stable.append(data)
+    return stable
+
+
+def stable_request_key(model: Mapping[str, Any], messages: Sequence[LLMMessage], tools: Sequence[Tool | ToolSchema],
+                       json_output: Optional[bool | type[BaseModel]], extra_create_args: Mapping[str, Any]) -> str:
+    """sha256 of a chat completion request without its volatile fields"""
+    if isinstance(json_output, type) and issubclass(json_output, BaseModel):
+        json_output = json.dumps(json_output.model_json_schema(), sort_keys=True)
+    data = {
+        "model": dict(model),
+        "messages": _stable_messages(messages),
+        "tools": [tool.schema if isinstance(tool, Tool) else tool for tool in tools],
+        "json_output": json_output,
+        "extra_create_args": {key: value for key, value in extra_create_args.items() if key not in VOLATILE_CREATE_ARGS},
+    }
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class ResponseStore(CacheStore[CHAT_CACHE_VALUE_TYPE]):
+    """
+    diskcache-backed store shared by all clients of a run, evicting the least recently used
+    responses beyond size_limit_mb and expiring them after ttl_s seconds (None: never)
+    """
+
+    def __init__(self, directory: str, size_limit_mb: float = 1024, ttl_s: Optional[float] = None, mode: str = "readwrite"):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"mode must be one of {CACHE_MODES}")
+        self.cache = Cache(directory, size_limit=int(size_limit_mb * 2 ** 20), eviction_policy="least-recently-used")
+        self.ttl_s = ttl_s
+        self.mode = mode
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def get(self, key: str, default: Optional[CHAT_CACHE_VALUE_TYPE] = None) -> Optional[CHAT_CACHE_VALUE_TYPE]:
+        value = None if self.mode == "refresh" else self.cache.get(key, default)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: CHAT_CACHE_VALUE_TYPE) -> None:
+        if self.mode == "readonly":
+            return
+        self.cache.set(key, value, expire=self.ttl_s)
+        with self._lock:
+            self.writes += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "mode": self.mode,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "writes": self.writes,
+            "entries": len(self.cache),
+            "size_mb": self.cache.volume() / 2 ** 20,
+            "size_limit_mb": self.cache.size_limit / 2 ** 20,
+            "ttl_s": self.ttl_s,
+            "directory": self.cache.directory,
+        }
+
+    def close(self) -> None:
+        self.cache.close()
+
+
+class StableChatCompletionCache(ChatCompletionCache):
+    """ChatCompletionCache keyed by stable_request_key, so one store can serve clients of different models"""
+
+    def __init__(self, client: ChatCompletionClient, store: CacheStore[CHAT_CACHE_VALUE_TYPE]):
+        super().__init__(client, store)
+        self._model = model_args(client)
+
+    def _check_cache(
+        self,
+        messages: Sequence[LLMMessage],
+        tools: Sequence[Tool | ToolSchema],
+        json_output: Optional[bool | type[BaseModel]],
+        extra_create_args: Mapping[str, Any],
+    ) -> tuple[Optional[Union[CreateResult, list]], str]:
+        cache_key = stable_request_key(self._model, messages, tools, json_output, extra_create_args)
+        return self.store.get(cache_key), cache_key
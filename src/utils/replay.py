@@ -0,0 +1,253 @@
+"""
+Record and replay of all external traffic of a discovery run.
+
+In record mode every chat completion (create and create_stream), every embedding call
+and every tool result is appended to a gzipped JSON-lines trace, together with its
+latency. In replay mode the same run is served from the trace without any network
+access: requests are matched by a hash of their content (model, messages, tools,
+arguments), repeated identical requests are answered in recorded order, and the
+recorded latency is either reproduced or skipped.
+
+    trace = TrafficTrace("runs/demo.trace.jsonl.gz", mode="record")
+    client = trace.wrap_client(OpenAIChatCompletionClient(...))
+    tool_func = trace.wrap_tool(characterize_Tc_value)
+    embed = trace.wrap_embedding(create_embedding)
+    ...
+    trace.close()
+
+    trace = TrafficTrace("runs/demo.trace.jsonl.gz", mode="replay", latency="zero")
+"""
+import asyncio
+import functools
+import gzip
+import hashlib
+import inspect
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, AsyncGenerator, Callable, Dict, List, Literal, Mapping, Optional, Sequence, Union
+
+from autogen_core import CancellationToken
+from autogen_core.models import ChatCompletionClient, CreateResult, LLMMessage
+from autogen_core.tools import Tool, ToolSchema
+from pydantic import BaseModel
+
+from src.utils.clients import DelegatingChatCompletionClient
+from src.utils.llm_cache import model_args, stable_request_key
+
+# Version 2: chat keys from llm_cache.stable_request_key (tool-call ids and reasoning excluded)
+TRACE_VERSION = 2
+MODES = ("record", "replay")
+LATENCIES = ("original", "zero")
+
+
+class ReplayMissError(KeyError):
+    """A request during replay that is not (or no longer) in the trace"""
+
+
+def _key(*parts: Any) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class TrafficTrace:
+    def __init__(self, path: str, mode: str = "record", latency: str = "original", strict: bool = True):
+        """
+        Args:
+            path: Trace file (gzipped JSON lines)
+            mode: "record" to capture a live run, "replay" to serve a captured one
+            latency: During replay, "original" sleeps for the recorded latency, "zero" answers at once
+            strict: During replay, a request missing from the trace raises ReplayMissError; with
+                strict=False it is answered with the next unused entry of the same kind instead
+        """
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}")
+        if latency not in LATENCIES:
+            raise ValueError(f"latency must be one of {LATENCIES}")
+
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self.strict = strict
+        self.stats: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+        if mode == "record":
+            self._file = gzip.open(path, "wt", encoding="utf-8")
+            self._write({"kind": "header", "version": TRACE_VERSION, "created": time.time()})
+        else:
+            self._file = None
+            self._entries: Dict[tuple, deque] = defaultdict(deque)
+            self._order: Dict[str, deque] = defaultdict(deque)
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for seq, line in enumerate(f):
+                    entry = json.loads(line)
+                    if entry["kind"] == "header":
+                        if entry.get("version") != TRACE_VERSION:
+                            raise ValueError(
+                                f"Trace {path} has version {entry.get('version')}, but this version of PiFlow "
+                                f"replays version {TRACE_VERSION} traces only (request keys changed); re-record it"
+                            )
+                        continue
+                    if seq == 0:
+                        raise ValueError(f"Trace {path} has no header, re-record it")
+                    entry["seq"] = seq
+                    self._entries[(entry["kind"], entry["key"])].append(entry)
+                    self._order[entry["kind"]].append(entry)
+            self._used: set = set()
+
+    def _write(self, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._file.write(json.dumps(entry, default=str) + "\n")
+            self._file.flush()
+            self.stats[entry["kind"]] += 1
+
+    def record(self, kind: str, key: str, request: Any, response: Any, latency: float) -> None:
+        self._write({"kind": kind, "key": key, "request": request, "response": response, "latency": latency})
+
+    def lookup(self, kind: str, key: str) -> Dict[str, Any]:
+        """Next unused recorded entry for this request"""
+        with self._lock:
+            candidates = self._entries.get((kind, key))
+            while candidates and candidates[0]["seq"] in self._used:
+                candidates.popleft()
+            if candidates:
+                entry = candidates.popleft()
+            elif self.strict:
+                raise ReplayMissError(f"No recorded {kind} response for request {key[:12]} in {self.path}")
+            else:
+                order = self._order[kind]
+                while order and order[0]["seq"] in self._used:
+                    order.popleft()
+                if not order:
+                    raise ReplayMissError(f"Trace {self.path} has no {kind} responses left")
+                entry = order.popleft()
+                self.stats[f"{kind}_fallback"] += 1
+            self._used.add(entry["seq"])
+            self.stats[kind] += 1
+            return entry
+
+    def delay(self, entry: Dict[str, Any]) -> float:
+        return entry["latency"] if self.latency == "original" else 0.0
+
+    def wrap_client(self, client: ChatCompletionClient) -> "TracedChatCompletionClient":
+        return TracedChatCompletionClient(client, self)
+
+    def wrap_tool(self, func: Callable) -> Callable:
+        """Record or replay a (synchronous) tool function, keeping its signature for FunctionTool"""
+        signature = inspect.signature(func)
+        name = getattr(func, "_tool_name", func.__name__)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            arguments = dict(signature.bind(*args, **kwargs).arguments)
+            key = _key("tool", name, arguments)
+            if self.mode == "replay":
+                entry = self.lookup("tool", key)
+                time.sleep(self.delay(entry))
+                return entry["response"]
+
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            self.record("tool", key, {"name": name, "arguments": arguments}, result, time.perf_counter() - start)
+            return result
+
+        return wrapper
+
+    def wrap_embedding(self, func: Callable[[str], List[float]]) -> Callable[[str], List[float]]:
+        """Record or replay an embedding function mapping a sentence to its vector"""
+
+        @functools.wraps(func)
+        def wrapper(sentence: str) -> List[float]:
+            key = _key("embedding", sentence)
+            if self.mode == "replay":
+                entry = self.lookup("embedding", key)
+                time.sleep(self.delay(entry))
+                return entry["response"]
+
+            start = time.perf_counter()
+            embedding = func(sentence)
+            self.record("embedding", key, {"input": sentence}, list(embedding), time.perf_counter() - start)
+            return embedding
+
+        return wrapper
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class TracedChatCompletionClient(DelegatingChatCompletionClient):
+    """
+    ChatCompletionClient wrapper that records every completion to a TrafficTrace, or in
+    replay mode answers from it without calling the wrapped client.
+    """
+
+    def __init__(self, client: ChatCompletionClient, trace: TrafficTrace):
+        super().__init__(client)
+        self.trace = trace
+
+    def _key(self, messages, tools, json_output, extra_create_args) -> str:
+        return stable_request_key(model_args(self.client), messages, tools, json_output, extra_create_args)
+
+    async def create(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Tool | ToolSchema] = [],
+        tool_choice: Tool | Literal["auto", "required", "none"] = "auto",
+        json_output: Optional[bool | type[BaseModel]] = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> CreateResult:
+        key = self._key(messages, tools, json_output, extra_create_args)
+        if self.trace.mode == "replay":
+            entry = self.trace.lookup("chat", key)
+            await asyncio.sleep(self.trace.delay(entry))
+            return CreateResult.model_validate(entry["response"])
+
+        start = time.perf_counter()
+        result = await self.client.create(
+            messages, tools=tools, tool_choice=tool_choice, json_output=json_output,
+            extra_create_args=extra_create_args, cancellation_token=cancellation_token,
+        )
+        self.trace.record("chat", key, {"n_messages": len(messages)}, result.model_dump(mode="json"),
+                          time.perf_counter() - start)
+        return result
+
+    async def create_stream(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Tool | ToolSchema] = [],
+        tool_choice: Tool | Literal["auto", "required", "none"] = "auto",
+        json_output: Optional[bool | type[BaseModel]] = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> AsyncGenerator[Union[str, CreateResult], None]:
+        # Streams are stored in the same entries as create(): the chunks and the final result
+        key = self._key(messages, tools, json_output, extra_create_args)
+        if self.trace.mode == "replay":
+            entry = self.trace.lookup("chat", key)
+            await asyncio.sleep(self.trace.delay(entry))
+            for chunk in entry.get("chunks", []):
+                yield chunk
+            yield CreateResult.model_validate(entry["response"])
+            return
+
+        start = time.perf_counter()
+        chunks: List[str] = []
+        async for item in self.client.create_stream(
+            messages, tools=tools, tool_choice=tool_choice, json_output=json_output,
+            extra_create_args=extra_create_args, cancellation_token=cancellation_token,
+        ):
+            if isinstance(item, CreateResult):
+                self.trace._write({
+                    "kind": "chat", "key": key, "request": {"n_messages": len(messages)},
+                    "response": item.model_dump(mode="json"), "chunks": chunks,
+                    "latency": time.perf_counter() - start,
+                })
+            else:
+                chunks.append(item)
+            yield item
@@ -0,0 +1,188 @@
+"""
+Timing spans over the hot path of an agent turn, saved as a Chrome trace.
+
+Spans are collected only while tracing is enabled; otherwise `span()` returns a shared no-op
+context and `@traced` functions cost one global lookup per call. Each asyncio task (and each
+thread, e.g. the executor threads running tools) gets its own track, so concurrent calls do
+not interleave. Open the saved file in chrome://tracing or https://ui.perfetto.dev.
+
+    tracing.enable("results/trace.json")
+    with tracing.span("embedding", chars=len(sentence)):
+        ...
+
+    @traced("flow.judge_hypothesis")
+    async def _judge_hypothesis(self, message): ...
+
+    tracing.disable()          # writes the trace
+"""
+import asyncio
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, List, Optional
+
+_tracer: Optional["Tracer"] = None
+_NULL_SPAN = nullcontext()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "args", "start")
+
+    def __init__(self, tracer: "Tracer", name: str, args: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        if exc_type is not None and exc_type is not GeneratorExit:
+            self.args["error"] = exc_type.__name__
+        self.tracer.add(self.name, self.start, end, self.args)
+        return False
+
+
+class Tracer:
+    """Collects complete ("X") events in Chrome trace format, one track per asyncio task or thread"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.origin = time.perf_counter_ns()
+        self.pid = os.getpid()
+        self.events: List[Dict[str, Any]] = []
+        self._tracks: Dict[tuple, int] = {}
+        self._lock = threading.Lock()
+
+    def _track(self) -> int:
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        key = ("task", id(task)) if task is not None else ("thread", threading.get_ident())
+        tid = self._tracks.get(key)
+        if tid is None:
+            with self._lock:
+                tid = self._tracks[key] = len(self._tracks) + 1
+                label = task.get_name() if task is not None else threading.current_thread().name
+                self.events.append({"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid,
+                                    "args": {"name": label}})
+        return tid
+
+    def span(self, name: str, args: Dict[str, Any]) -> _Span:
+        return _Span(self, name, args)
+
+    def add(self, name: str, start_ns: int, end_ns: int, args: Dict[str, Any]) -> None:
+        self.events.append({
+            "name": name,
+            "cat": name.split(".", 1)[0],
+            "ph": "X",
+            "ts": (start_ns - self.origin) / 1e3,
+            "dur": (end_ns - start_ns) / 1e3,
+            "pid": self.pid,
+            "tid": self._track(),
+            "args": args,
+        })
+
+    def save(self) -> str:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "w") as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f, default=str)
+        return self.path
+
+
+def enable(path: str) -> Tracer:
+    """Start collecting spans for a run, to be written to `path` by disable()"""
+    global _tracer
+    _tracer = Tracer(path)
+    return _tracer
+
+
+def disable() -> Optional[str]:
+    """Stop collecting spans and write the trace; returns its path"""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer.save() if tracer is not None else None
+
+
+def is_enabled() -> bool:
+    return _tracer is not None
+
+
+def span(name: str, **args: Any):
+    """Context manager timing its block as one span (a shared no-op when tracing is disabled)"""
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return tracer.span(name, args)
+
+
+def traced(name: Optional[str] = None, *capture: str) -> Callable:
+    """
+    Decorator timing every call of a function, coroutine function or async generator function.
+
+    Args:
+        name: Span name (defaults to the function's qualified name)
+        capture: Names of keyword arguments to record in the span's args, e.g. "agent_name"
+    """
+
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        def span_args(kwargs):
+            return {key: kwargs[key] for key in capture if key in kwargs}
+
+        if inspect.isasyncgenfunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                tracer = _tracer
+                if tracer is None:
+                    async for item in func(*args, **kwargs):
+                        yield item
+                    return
+                with tracer.span(span_name, span_args(kwargs)):
+                    async for item in func(*args, **kwargs):
+                        yield item
+
+        elif inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                tracer = _tracer
+                if tracer is None:
+                    return await func(*args, **kwargs)
+                with tracer.span(span_name, span_args(kwargs)):
+                    return await func(*args, **kwargs)
+
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                tracer = _tracer
+                if tracer is None:
+                    return func(*args, **kwargs)
+                with tracer.span(span_name, span_args(kwargs)):
+                    return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class TracedLLMCallsMixin:
+    """
+    Mixin for AssistantAgent subclasses timing every model call as an "llm.call" span tagged
+    with the agent name. List it before AssistantAgent: class Planner(TracedLLMCallsMixin, AssistantAgent).
+    """
+
+    @classmethod
+    @traced("llm.call", "agent_name")
+    async def _call_llm(cls, *args, **kwargs):
+        async for output in super()._call_llm(*args, **kwargs):
+            yield output